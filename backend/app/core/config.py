@@ -1,4 +1,284 @@
 import os
+from dotenv import load_dotenv
+
+load_dotenv()
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-CHROMA_PATH = os.path.join(BASE_DIR, "data", "processed", "chroma_db")
\ No newline at end of file
+CHROMA_PATH = os.path.join(BASE_DIR, "data", "processed", "chroma_db")
+
+# -----------------------------
+# Profiling statistics
+# -----------------------------
+# exact: full sorts / value_counts; approximate: mergeable sketches;
+# auto: sketches once a dataset has STATS_APPROX_MIN_ROWS rows or more
+STATS_MODE = os.getenv("STATS_MODE", "auto").lower()
+STATS_APPROX_MIN_ROWS = int(os.getenv("STATS_APPROX_MIN_ROWS", "1000000"))
+STATS_CHUNK_ROWS = int(os.getenv("STATS_CHUNK_ROWS", "250000"))
+STATS_WORKERS = int(os.getenv("STATS_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Correlation scan: pairs above CORR_THRESHOLD, at most CORR_TOP_K reported,
+# rows sampled beyond CORR_SAMPLE_ROWS (0 = never), blocked beyond CORR_BLOCK_COLS
+CORR_THRESHOLD = float(os.getenv("CORR_THRESHOLD", "0.7"))
+CORR_TOP_K = int(os.getenv("CORR_TOP_K", "100"))
+CORR_SAMPLE_ROWS = int(os.getenv("CORR_SAMPLE_ROWS", "200000"))
+CORR_BLOCK_COLS = int(os.getenv("CORR_BLOCK_COLS", "1024"))
+
+# -----------------------------
+# Dataset loading
+# -----------------------------
+LOAD_OPTIMIZE_DTYPES = os.getenv("LOAD_OPTIMIZE_DTYPES", "true").lower() == "true"
+# String columns with at most this share of distinct values become `category`
+LOAD_CATEGORY_MAX_RATIO = float(os.getenv("LOAD_CATEGORY_MAX_RATIO", "0.5"))
+# float64 -> float32 even when it loses precision (default: only if lossless)
+LOAD_ALLOW_FLOAT32 = os.getenv("LOAD_ALLOW_FLOAT32", "false").lower() == "true"
+# Remaining string columns as Arrow-backed strings (requires pyarrow)
+LOAD_ARROW_STRINGS = os.getenv("LOAD_ARROW_STRINGS", "false").lower() == "true"
+
+# -----------------------------
+# Model evaluation
+# -----------------------------
+# Per-fold transformed matrices above this size are memory-mapped from disk
+TRANSFORM_CACHE_MMAP_BYTES = int(os.getenv("TRANSFORM_CACHE_MMAP_BYTES", str(256 * 2**20)))
+TRANSFORM_CACHE_DIR = os.getenv(
+    "TRANSFORM_CACHE_DIR", os.path.join(BASE_DIR, "data", "processed", "fold_cache")
+)
+
+# Clustering (unsupervised path)
+CLUSTER_K_MIN = int(os.getenv("CLUSTER_K_MIN", "2"))
+CLUSTER_K_MAX = int(os.getenv("CLUSTER_K_MAX", "8"))
+CLUSTER_MINIBATCH_ROWS = int(os.getenv("CLUSTER_MINIBATCH_ROWS", "20000"))
+CLUSTER_N_JOBS = int(os.getenv("CLUSTER_N_JOBS", "-1"))
+SILHOUETTE_SAMPLE_SIZE = int(os.getenv("SILHOUETTE_SAMPLE_SIZE", "5000"))
+GMM_SAMPLE_SIZE = int(os.getenv("GMM_SAMPLE_SIZE", "50000"))
+
+# -----------------------------
+# LLM provider
+# -----------------------------
+# One of: ollama, gemini, openai, openrouter, stub
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "ollama").lower()
+LLM_MODEL = os.getenv("LLM_MODEL")  # None -> provider default
+LLM_TEMPERATURE = (
+    float(os.environ["LLM_TEMPERATURE"]) if os.getenv("LLM_TEMPERATURE") else None
+)  # None -> provider default
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+
+# Micro-batching (only used by backends that accept several prompts per call)
+LLM_BATCHING = os.getenv("LLM_BATCHING", "false").lower() == "true"
+LLM_BATCH_MAX_SIZE = int(os.getenv("LLM_BATCH_MAX_SIZE", "8"))
+LLM_BATCH_MAX_WAIT_MS = float(os.getenv("LLM_BATCH_MAX_WAIT_MS", "10"))
+
+# Shared HTTP connection pool
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+GEMINI_BASE_URL = os.getenv(
+    "GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta"
+)
+LLM_STUB_URL = os.getenv("LLM_STUB_URL", "http://127.0.0.1:8001/v1")
+
+# -----------------------------
+# Startup
+# -----------------------------
+# Heavy modules (sklearn, LangChain, Chroma) and the embedding model are
+# loaded in a background thread after the server starts; /ready reports
+# when that is done. Disabled, they load lazily on first use.
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+WARMUP_EMBEDDINGS = os.getenv("WARMUP_EMBEDDINGS", "true").lower() == "true"
+
+# -----------------------------
+# Dataset cache
+# -----------------------------
+# Loaded frames kept in memory (LRU) so re-targeting skips parsing the CSV
+DATASET_CACHE_MAX_FRAMES = int(os.getenv("DATASET_CACHE_MAX_FRAMES", "4"))
+
+# -----------------------------
+# Responses
+# -----------------------------
+# Responses smaller than this are sent uncompressed
+GZIP_MIN_BYTES = int(os.getenv("GZIP_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+
+# -----------------------------
+# Pipeline executor
+# -----------------------------
+# Threads running independent pipeline stages concurrently
+PIPELINE_MAX_WORKERS = int(os.getenv("PIPELINE_MAX_WORKERS", "4"))
+# Cached outputs of deterministic stages, keyed by input fingerprints
+PIPELINE_CACHE_MAX_ENTRIES = int(os.getenv("PIPELINE_CACHE_MAX_ENTRIES", "64"))
+
+# -----------------------------
+# Vector store
+# -----------------------------
+# chroma: persistent Chroma collections (float32 HNSW)
+# local:  on-disk flat store with float32 / float16 / int8 vectors
+# faiss:  on-disk FAISS flat / IVF index (optional faiss-cpu dependency)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma").lower()
+VECTOR_DTYPE = os.getenv("VECTOR_DTYPE", "float32").lower()
+VECTOR_STORE_PATH = os.getenv(
+    "VECTOR_STORE_PATH", os.path.join(BASE_DIR, "data", "processed", "vector_store")
+)
+
+# Lifecycle: collections of datasets no longer in the registry are
+# dropped after the grace period, others after VECTOR_TTL_SECONDS without
+# access (0 = never), and the least recently used beyond the cap
+VECTOR_TTL_SECONDS = float(os.getenv("VECTOR_TTL_SECONDS", str(7 * 24 * 3600)))
+VECTOR_ORPHAN_GRACE_SECONDS = float(os.getenv("VECTOR_ORPHAN_GRACE_SECONDS", "3600"))
+VECTOR_MAX_COLLECTIONS = int(os.getenv("VECTOR_MAX_COLLECTIONS", "50"))
+# Eviction + compaction period (0 disables the background task)
+VECTOR_MAINTENANCE_INTERVAL_SECONDS = float(
+    os.getenv("VECTOR_MAINTENANCE_INTERVAL_SECONDS", "3600")
+)
+
+# -----------------------------
+# ANN index
+# -----------------------------
+# Applied when a collection is created: the metric, HNSW M and
+# ef_construction and the FAISS index type cannot change afterwards
+# (ef_search / nprobe follow the current settings)
+VECTOR_METRIC = os.getenv("VECTOR_METRIC", "cosine").lower()  # cosine | l2 | ip
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "100"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "100"))
+# VECTOR_BACKEND=faiss (needs faiss-cpu): flat = exact, ivf = inverted
+# lists for very large datasets (nlist 0 = 4 * sqrt(rows))
+FAISS_INDEX = os.getenv("FAISS_INDEX", "flat").lower()
+FAISS_NLIST = int(os.getenv("FAISS_NLIST", "0"))
+FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", "8"))
+
+# -----------------------------
+# Embeddings
+# -----------------------------
+# torch: sentence-transformers on PyTorch
+# onnx:  same model on ONNX Runtime (optionally int8-quantized)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+# CPU threads per embedding call (0 = library default, usually all cores)
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+EMBEDDING_MAX_LENGTH = int(os.getenv("EMBEDDING_MAX_LENGTH", "256"))
+# Directory with model.onnx + tokenizer.json (offline hosts); empty
+# downloads the ONNX export published with EMBEDDING_MODEL
+EMBEDDING_ONNX_PATH = os.getenv("EMBEDDING_ONNX_PATH", "")
+EMBEDDING_ONNX_QUANTIZE = os.getenv("EMBEDDING_ONNX_QUANTIZE", "false").lower() == "true"
+EMBEDDING_CACHE_DIR = os.getenv(
+    "EMBEDDING_CACHE_DIR", os.path.join(BASE_DIR, "data", "models")
+)
+
+# -----------------------------
+# RAG indexing
+# -----------------------------
+# Datasets are indexed progressively: a column summary and an evenly
+# spaced sample of RAG_FIRST_PASS_CHUNKS rows first (chat answers, flagged
+# as partial, from then on), then the remaining chunks in committed
+# batches of RAG_COMMIT_CHUNKS. Progress is kept on disk so job workers
+# can report it and an interrupted index resumes after the last batch
+RAG_FIRST_PASS_CHUNKS = int(os.getenv("RAG_FIRST_PASS_CHUNKS", "256"))
+RAG_COMMIT_CHUNKS = int(os.getenv("RAG_COMMIT_CHUNKS", "2048"))
+RAG_PROGRESS_DIR = os.getenv(
+    "RAG_PROGRESS_DIR", os.path.join(BASE_DIR, "data", "processed", "rag_progress")
+)
+
+# -----------------------------
+# Forest evaluation
+# -----------------------------
+# oob: grow forests with warm_start in FOREST_TREES_STEP increments until
+#      the out-of-bag score plateaus, report it instead of CV refits
+# cv:  fixed 100 trees + k-fold cross-validation like the other models
+FOREST_EVALUATION = os.getenv("FOREST_EVALUATION", "oob").lower()
+FOREST_MIN_TREES = int(os.getenv("FOREST_MIN_TREES", "50"))
+FOREST_MAX_TREES = int(os.getenv("FOREST_MAX_TREES", "300"))
+FOREST_TREES_STEP = int(os.getenv("FOREST_TREES_STEP", "25"))
+# Plateau = FOREST_OOB_PATIENCE increments each improving less than this
+FOREST_OOB_TOLERANCE = float(os.getenv("FOREST_OOB_TOLERANCE", "0.002"))
+FOREST_OOB_PATIENCE = int(os.getenv("FOREST_OOB_PATIENCE", "2"))
+
+# -----------------------------
+# Admission control
+# -----------------------------
+# Uploads / re-targets reserve their estimated peak memory before they
+# run; jobs that do not fit wait (FIFO), a full queue gets 429 and a
+# wait over ADMISSION_MAX_WAIT_SECONDS gets 503 (both with Retry-After)
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+# 0 = ADMISSION_MEMORY_FRACTION of the container / host memory
+ADMISSION_MEMORY_BUDGET_MB = float(os.getenv("ADMISSION_MEMORY_BUDGET_MB", "0"))
+ADMISSION_MEMORY_FRACTION = float(os.getenv("ADMISSION_MEMORY_FRACTION", "0.7"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "8"))
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "300"))
+ADMISSION_SAMPLE_ROWS = int(os.getenv("ADMISSION_SAMPLE_ROWS", "2000"))
+# Interpreter, libraries and models present regardless of the dataset
+ADMISSION_BASE_MB = float(os.getenv("ADMISSION_BASE_MB", "300"))
+
+# -----------------------------
+# Feature importance
+# -----------------------------
+# Computed from the fitted holdout models (impurity / coefficients) plus
+# permutation importance of the best model on a holdout sample, within
+# FEATURE_IMPORTANCE_BUDGET_FRACTION of the pipeline's training time
+FEATURE_IMPORTANCE_BUDGET_FRACTION = float(os.getenv("FEATURE_IMPORTANCE_BUDGET_FRACTION", "0.1"))
+# Floor so small datasets (fast training) still get permutation importance
+FEATURE_IMPORTANCE_MIN_SECONDS = float(os.getenv("FEATURE_IMPORTANCE_MIN_SECONDS", "1.0"))
+FEATURE_IMPORTANCE_SAMPLE_ROWS = int(os.getenv("FEATURE_IMPORTANCE_SAMPLE_ROWS", "2000"))
+FEATURE_IMPORTANCE_MIN_ROWS = int(os.getenv("FEATURE_IMPORTANCE_MIN_ROWS", "200"))
+FEATURE_IMPORTANCE_REPEATS = int(os.getenv("FEATURE_IMPORTANCE_REPEATS", "5"))
+FEATURE_IMPORTANCE_N_JOBS = int(os.getenv("FEATURE_IMPORTANCE_N_JOBS", "-1"))
+
+# -----------------------------
+# Redundancy checks
+# -----------------------------
+# Duplicate rows, duplicate / constant columns and copies of the target,
+# found from per-column value hashes (see redundancy.py)
+REDUNDANCY_NEAR_DUPLICATE_SHARE = float(os.getenv("REDUNDANCY_NEAR_DUPLICATE_SHARE", "0.99"))
+REDUNDANCY_NEAR_CONSTANT_SHARE = float(os.getenv("REDUNDANCY_NEAR_CONSTANT_SHARE", "0.99"))
+REDUNDANCY_SIGNATURE_ROWS = int(os.getenv("REDUNDANCY_SIGNATURE_ROWS", "512"))
+REDUNDANCY_MAX_VERIFY_PAIRS = int(os.getenv("REDUNDANCY_MAX_VERIFY_PAIRS", "50"))
+# Applied before preprocessing / training: drop exact duplicate rows, and
+# constant, identifier, duplicate and target-copy columns
+DEDUPLICATE_ROWS = os.getenv("DEDUPLICATE_ROWS", "false").lower() == "true"
+DROP_REDUNDANT_COLUMNS = os.getenv("DROP_REDUNDANT_COLUMNS", "false").lower() == "true"
+
+# -----------------------------
+# Feature pruning
+# -----------------------------
+# Before preprocessing: drop constant, duplicate, identifier and free-text
+# columns, hash high-cardinality categoricals into PRUNE_HASH_BUCKETS
+# levels and keep one column per group correlated above PRUNE_CORR_THRESHOLD
+FEATURE_PRUNING = os.getenv("FEATURE_PRUNING", "true").lower() == "true"
+PRUNE_MAX_CATEGORIES = int(os.getenv("PRUNE_MAX_CATEGORIES", "100"))
+PRUNE_HASH_BUCKETS = int(os.getenv("PRUNE_HASH_BUCKETS", "32"))
+PRUNE_CORR_THRESHOLD = float(os.getenv("PRUNE_CORR_THRESHOLD", "0.95"))
+
+# -----------------------------
+# Request profiling
+# -----------------------------
+# Sampling profiler (see core/profiling.py) around uploads, re-targets,
+# appends and chats. A request opts in with ?profile=1 or an "X-Profile: 1" header
+# (when PROFILE_REQUESTS); with PROFILE_SLOW_SECONDS > 0 any request still
+# running after that many seconds is profiled from then on. Speedscope
+# and folded-stack files land in PROFILE_DIR, one per dataset and kind.
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "true").lower() == "true"
+PROFILE_SLOW_SECONDS = float(os.getenv("PROFILE_SLOW_SECONDS", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "10"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(BASE_DIR, "data", "profiles"))
+
+# -----------------------------
+# Job limits
+# -----------------------------
+# Analysis / re-target / RAG indexing jobs record wall time, CPU time,
+# peak RSS and thread count in the dataset record (see job_runner.py).
+# thread:  run in the API process (accounting only; CPU / RSS / threads
+#          are process-wide there, concurrent jobs included)
+# process: run each job in a spawned worker process where the limits
+#          below are enforced; a job over a limit fails with a diagnostic
+JOB_ISOLATION = os.getenv("JOB_ISOLATION", "thread").lower()
+# 0 = no limit
+JOB_MAX_MEMORY_MB = float(os.getenv("JOB_MAX_MEMORY_MB", "0"))
+JOB_MAX_CPU_SECONDS = float(os.getenv("JOB_MAX_CPU_SECONDS", "0"))
+JOB_TIMEOUT_SECONDS = float(os.getenv("JOB_TIMEOUT_SECONDS", "0"))
+# BLAS / joblib / ONNX threads per worker (0 = every core)
+JOB_MAX_THREADS = int(os.getenv("JOB_MAX_THREADS", "0"))
+JOB_SAMPLE_SECONDS = float(os.getenv("JOB_SAMPLE_SECONDS", "0.5"))
@@ -0,0 +1,105 @@
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+# Stage durations range from milliseconds (target detection on a small
+# file) to many minutes (embedding a large CSV)
+STAGE_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1, 2.5, 5, 10, 30, 60, 120, 300, 600
+)
+
+
+# =====================================================
+# HISTOGRAM (Prometheus text exposition format)
+# =====================================================
+class Histogram:
+    """Minimal thread-safe Prometheus histogram with labels."""
+
+    def __init__(self, name: str, documentation: str, labelnames, buckets=STAGE_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    "counts": [0] * len(self.buckets), "sum": 0.0, "count": 0
+                }
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                labels = ",".join(
+                    f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)
+                )
+                prefix = f"{labels}," if labels else ""
+                for bound, count in zip(self.buckets, series["counts"]):
+                    lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {series["count"]}')
+                lines.append(f"{self.name}_sum{{{labels}}} {series['sum']}")
+                lines.append(f"{self.name}_count{{{labels}}} {series['count']}")
+        return "\n".join(lines)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+STAGE_SECONDS = Histogram(
+    "automl_stage_duration_seconds",
+    "Wall time of each pipeline stage.",
+    labelnames=("pipeline", "stage"),
+)
+
+_registry = [STAGE_SECONDS]
+
+
+def render_metrics() -> str:
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+# =====================================================
+# STAGE TIMERS
+# =====================================================
+@contextmanager
+def timed_stage(pipeline: str, stage: str, timings: dict | None = None):
+    """
+    Times a block, records it in the stage histogram and, when given,
+    adds the seconds to `timings[stage]` (repeated stages accumulate).
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, pipeline=pipeline, stage=stage)
+        if timings is not None:
+            timings[stage] = round(timings.get(stage, 0.0) + elapsed, 4)
+
+
+def timed(pipeline: str, stage: str):
+    """Decorator form of `timed_stage` (histogram only)."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed_stage(pipeline, stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,323 @@
+import asyncio
+import contextvars
+import itertools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from app.core.config import (
+    PROFILE_REQUESTS,
+    PROFILE_SLOW_SECONDS,
+    PROFILE_INTERVAL_MS,
+    PROFILE_DIR,
+)
+
+PROFILE_KINDS = ("upload", "retarget", "append", "chat")
+PROFILE_FORMATS = {
+    "speedscope": ("speedscope.json", "application/json"),
+    "folded": ("folded.txt", "text/plain"),
+}
+
+# A thread whose innermost Python frame is in one of these modules is
+# blocked (pool workers waiting for work, the event loop in select(),
+# a stage waiting on its futures) and is not sampled
+_IDLE_MODULES = (
+    "threading.py", "queue.py", "selectors.py",
+    os.path.join("concurrent", "futures", "thread.py"),
+    os.path.join("concurrent", "futures", "_base.py"),
+)
+_SAFE_ID = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+# Profiling scope of the current request ("p1", "p2", ...). Thread pools
+# started for it carry the scope in their thread names (see
+# scoped_thread_name), which is how the sampler tells its threads from
+# those of concurrent requests
+_SCOPE = contextvars.ContextVar("profile_scope", default=None)
+_SCOPE_IDS = itertools.count(1)
+
+
+# =====================================================
+# SAMPLER
+# =====================================================
+def _short_path(filename: str) -> str:
+    for marker in ("site-packages" + os.sep, "backend" + os.sep):
+        if marker in filename:
+            return filename.rsplit(marker, 1)[1]
+    return os.path.basename(filename)
+
+
+def _scope_of(thread_name: str):
+    # "pipeline@p3_0" -> "p3"
+    if "@" not in thread_name:
+        return None
+    return thread_name.split("@", 1)[1].split("_", 1)[0]
+
+
+def scoped_thread_name(name: str) -> str:
+    """
+    thread_name_prefix for a pool started on behalf of the current
+    request: tagged with its profiling scope, taken from the context or
+    from the (already tagged) pool thread this runs on. Unchanged when
+    nothing is being profiled.
+    """
+    scope = _SCOPE.get() or _scope_of(threading.current_thread().name)
+    return f"{name}@{scope}" if scope else name
+
+
+def _thread_group(name: str) -> str:
+    # pipeline@p3_0, pipeline@p3_1 ... -> pipeline_N
+    return re.sub(r"\d+", "N", re.sub(r"@[^_]*", "", name))
+
+
+def _stack(frame):
+    """Root-first (file, function, first line) of each frame; None when idle."""
+    if frame.f_code.co_filename.endswith(_IDLE_MODULES):
+        return None
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_filename, code.co_name, code.co_firstlineno))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stack of every busy thread of the process every
+    `interval` seconds from a background thread, so the profiled code is
+    not instrumented at all. Each sample is weighted by the wall time
+    since the previous one: a C call holding the GIL delays the next
+    sample but still gets its time. Blocked threads (idle pool workers,
+    the event loop in select() while a chat awaits the LLM) are left out:
+    the profile shows where busy time went, the request timings cover
+    the waits.
+
+    With a `scope`, only the `owner` thread and threads whose names carry
+    that scope (pools named with scoped_thread_name) are sampled, so
+    concurrent requests do not end up in each other's profiles.
+
+    Identical stacks are aggregated, so memory grows with the number of
+    distinct stacks, not with the duration.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL_MS / 1000,
+                 scope: str | None = None, owner: int | None = None):
+        self.interval = interval
+        self.scope = scope
+        self.owner = owner
+        self.stacks = Counter()    # (thread group, frame, ...) -> seconds
+        self.samples = 0
+        self.started = None
+        self.stopped = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start(self):
+        with self._lock:
+            if self._closed or self._thread is not None:
+                return self
+            self.started = time.perf_counter()
+            self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops sampling; a start() after this (e.g. a late timer) is a no-op."""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+            self.stopped = time.perf_counter()
+        return self
+
+    @property
+    def seconds(self):
+        if self.started is None:
+            return 0.0
+        return (self.stopped or time.perf_counter()) - self.started
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                name = names.get(ident, "thread")
+                if name.startswith("profiler"):
+                    continue
+                if self.scope is not None and ident != self.owner and _scope_of(name) != self.scope:
+                    continue
+                stack = _stack(frame)
+                if stack is not None:
+                    self.stacks[(_thread_group(name),) + stack] += elapsed
+                    self.samples += 1
+
+    # ---------------- EXPORT ----------------
+    def to_speedscope(self, name: str) -> dict:
+        """https://www.speedscope.app file: one sampled profile per thread group."""
+        frames, index = [], {}
+        profiles = {}
+        for (group, *stack), seconds in self.stacks.items():
+            ids = []
+            for filename, func, line in stack:
+                key = (filename, func, line)
+                if key not in index:
+                    index[key] = len(frames)
+                    frames.append({"name": func, "file": _short_path(filename), "line": line})
+                ids.append(index[key])
+            profile = profiles.setdefault(group, {"samples": [], "weights": []})
+            profile["samples"].append(ids)
+            profile["weights"].append(round(seconds, 6))
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "automl-rag profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": group,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": round(sum(p["weights"]), 6),
+                    **p,
+                }
+                for group, p in sorted(profiles.items(), key=lambda kv: -sum(kv[1]["weights"]))
+            ],
+        }
+
+    def to_folded(self) -> str:
+        """Folded stacks (flamegraph.pl / speedscope / inferno), weights in ms."""
+        lines = []
+        for (group, *stack), seconds in self.stacks.most_common():
+            frames = [group] + [f"{func} ({_short_path(f)}:{line})" for f, func, line in stack]
+            lines.append(f"{';'.join(frames)} {max(1, round(seconds * 1000))}")
+        return "\n".join(lines) + "\n"
+
+
+# =====================================================
+# STORAGE
+# =====================================================
+def profile_path(dataset_id: str, kind: str, fmt: str = "speedscope") -> str:
+    if not _SAFE_ID.match(dataset_id or ""):
+        raise ValueError(f"Invalid dataset id '{dataset_id}'")
+    if kind not in PROFILE_KINDS:
+        raise ValueError(f"Unknown profile kind '{kind}'. Choose one of: {', '.join(PROFILE_KINDS)}")
+    if fmt not in PROFILE_FORMATS:
+        raise ValueError(f"Unknown profile format '{fmt}'. Choose one of: {', '.join(PROFILE_FORMATS)}")
+    return os.path.join(PROFILE_DIR, f"{dataset_id}_{kind}.{PROFILE_FORMATS[fmt][0]}")
+
+
+def save_profile(profiler: SamplingProfiler, dataset_id: str, kind: str, trigger: str,
+                 scope: str = "process") -> dict:
+    """
+    Writes both formats (replacing the previous profile of this kind).
+    `scope` says which threads were sampled and is kept in the metadata.
+    """
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    info = {
+        "kind": kind,
+        "trigger": trigger,
+        "scope": scope,
+        "thread_groups": sorted({key[0] for key in profiler.stacks}),
+        "seconds": round(profiler.seconds, 3),
+        "samples": profiler.samples,
+        "interval_ms": round(profiler.interval * 1000, 3),
+        "created_at": time.time(),
+    }
+    name = f"{kind} {dataset_id} ({trigger}, {info['seconds']}s, {info['samples']} samples)"
+    with open(profile_path(dataset_id, kind, "speedscope"), "w") as f:
+        json.dump(profiler.to_speedscope(name), f)
+    with open(profile_path(dataset_id, kind, "folded"), "w") as f:
+        f.write(profiler.to_folded())
+    with open(os.path.join(PROFILE_DIR, f"{dataset_id}_{kind}.meta.json"), "w") as f:
+        json.dump(info, f)
+    return info
+
+
+def list_profiles(dataset_id: str) -> dict:
+    profiles = {}
+    for kind in PROFILE_KINDS:
+        meta = os.path.join(PROFILE_DIR, f"{dataset_id}_{kind}.meta.json")
+        if _SAFE_ID.match(dataset_id or "") and os.path.exists(meta):
+            with open(meta) as f:
+                profiles[kind] = json.load(f)
+    return profiles
+
+
+# =====================================================
+# REQUEST HOOK
+# =====================================================
+def profile_requested(request) -> bool:
+    """?profile=1 or an X-Profile header (a starlette Request)."""
+    flag = request.query_params.get("profile") or request.headers.get("x-profile") or ""
+    return flag.lower() in ("1", "true", "yes", "on")
+
+
+@contextmanager
+def profile_request(dataset_id: str, kind: str, requested: bool = False):
+    """
+    Profiles the enclosed block when the request asked for it, or, with
+    PROFILE_SLOW_SECONDS > 0, once it has run that long (the profile then
+    starts at the threshold). Yields a dict that holds the saved
+    profile's metadata afterwards, and stays empty when nothing was
+    captured. With neither trigger active this adds no thread, timer or
+    sampling at all.
+
+    Only the calling thread and the pools it starts with
+    scoped_thread_name are sampled. Called on the event loop (chat), the
+    loop thread is shared with other requests' coroutines, which the
+    saved metadata records as scope "request+event_loop".
+    """
+    info = {}
+    requested = requested and PROFILE_REQUESTS
+    if not requested and PROFILE_SLOW_SECONDS <= 0:
+        yield info
+        return
+    if not _SAFE_ID.match(dataset_id or ""):
+        yield info
+        return
+
+    scope_id = f"p{next(_SCOPE_IDS)}"
+    try:
+        asyncio.get_running_loop()
+        scope = "request+event_loop"
+    except RuntimeError:
+        scope = "request"
+    profiler = SamplingProfiler(scope=scope_id, owner=threading.get_ident())
+    token = _SCOPE.set(scope_id)
+    timer = None
+    if requested:
+        trigger = "requested"
+        profiler.start()
+    else:
+        trigger = f"slower than {PROFILE_SLOW_SECONDS:g}s"
+        timer = threading.Timer(PROFILE_SLOW_SECONDS, profiler.start)
+        timer.daemon = True
+        timer.start()
+    try:
+        yield info
+    finally:
+        _SCOPE.reset(token)
+        if timer is not None:
+            timer.cancel()
+        profiler.stop()
+        if profiler.samples:
+            try:
+                info.update(save_profile(profiler, dataset_id, kind, trigger, scope))
+                print(f"🔥 Saved {kind} profile for {dataset_id}: "
+                      f"{info['samples']} samples over {info['seconds']}s")
+            except OSError as e:
+                print(f"⚠️ Could not save profile for {dataset_id}: {e}")
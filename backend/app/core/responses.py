@@ -0,0 +1,137 @@
+import base64
+import binascii
+import json
+import orjson
+from fastapi.responses import JSONResponse
+
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    # numpy / pandas scalars that OPT_SERIALIZE_NUMPY does not cover
+    if hasattr(obj, "item"):
+        return obj.item()
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+# =====================================================
+# FAST JSON RESPONSE
+# =====================================================
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson: compact output, numpy arrays and
+    scalars serialised natively, NaN/inf written as null.
+
+    Returning an instance directly from a handler also skips FastAPI's
+    `jsonable_encoder` pass over the payload.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+
+
+# =====================================================
+# FIELD PROJECTION (?fields=a,b.c)
+# =====================================================
+def project(data, fields: str):
+    """
+    Keeps only the requested dotted paths, e.g.
+    "analysis_status,analysis_result.best_model". Paths that do not exist
+    (yet) are left out rather than rejected, so pollers can ask for
+    results before they are available.
+    """
+    if not isinstance(data, dict):
+        return data
+
+    result = {}
+    paths = sorted({tuple(p.strip().split(".")) for p in fields.split(",") if p.strip()}, key=len)
+    included = set()
+    for keys in paths:
+        # Already covered by a shorter path (e.g. "a" and "a.b")
+        if any(keys[:i] in included for i in range(1, len(keys))):
+            continue
+
+        node = data
+        for key in keys:
+            if not isinstance(node, dict) or key not in node:
+                break
+            node = node[key]
+        else:
+            target = result
+            for key in keys[:-1]:
+                target = target.setdefault(key, {})
+            target[keys[-1]] = node
+            included.add(keys)
+    return result
+
+
+# =====================================================
+# CURSOR PAGINATION OVER PER-COLUMN SECTIONS
+# =====================================================
+# section -> (dotted path inside analysis_result, key field for list items)
+COLUMN_SECTIONS = {
+    "feature_analysis": ("feature_analysis", "name"),
+    "column_transformations": ("column_transformations", "column"),
+    "boxplot_stats": ("boxplot_stats", None),
+    "numeric_distributions": ("numeric_distributions", None),
+    "missing_summary": ("missing_summary", None),
+    "outliers": ("preprocessing_visuals.outliers.before", None),
+}
+
+
+def encode_cursor(column: str) -> str:
+    raw = json.dumps({"after": column}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        return json.loads(raw)["after"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def _section_items(analysis_result: dict, section: str):
+    """(items, key of each item) for a section; dict sections become rows."""
+    path, key_field = COLUMN_SECTIONS[section]
+    node = analysis_result
+    for key in path.split("."):
+        node = node.get(key) if isinstance(node, dict) else None
+    if node is None:
+        return [], []
+    if isinstance(node, dict):
+        items = [{"column": column, "stats": value} for column, value in node.items()]
+        return items, list(node)
+    return list(node), [item.get(key_field) for item in node]
+
+
+def paginate_section(analysis_result: dict, section: str, cursor: str | None, limit: int):
+    """
+    One page of a per-column section. The cursor is keyed on the last
+    column returned (not an offset), so pages stay consistent when a
+    re-analysis reorders or refreshes the section between requests.
+    """
+    if section not in COLUMN_SECTIONS:
+        raise KeyError(section)
+
+    items, columns = _section_items(analysis_result, section)
+    start = 0
+    if cursor:
+        after = decode_cursor(cursor)
+        if after not in columns:
+            raise ValueError("Cursor refers to a column that no longer exists")
+        start = columns.index(after) + 1
+
+    page = items[start:start + limit]
+    has_more = start + limit < len(items)
+    return {
+        "section": section,
+        "items": page,
+        "total": len(items),
+        "next_cursor": encode_cursor(columns[start + len(page) - 1]) if has_more and page else None,
+    }
@@ -1,13 +1,50 @@
-from fastapi import FastAPI, UploadFile, File, BackgroundTasks, Form
+from fastapi import FastAPI, UploadFile, File, BackgroundTasks, Form, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse, JSONResponse, FileResponse
+from contextlib import asynccontextmanager
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import threading
 import uuid
 import os
 #sudhakar
 from app.api.v1 import chat
-from app.services.ml_service import process_and_analyze_dataset
-from app.services.rag_service import index_dataset_for_rag
+from app.core.config import (
+    WARMUP_ON_STARTUP,
+    GZIP_MIN_BYTES,
+    GZIP_LEVEL,
+    VECTOR_MAINTENANCE_INTERVAL_SECONDS,
+    ADMISSION_ENABLED,
+)
+from app.core.responses import FastJSONResponse, project, paginate_section
+from app.services.llm_service import close_http_client
+from app.services.warmup import start_warmup, readiness
+from app.core.metrics import render_metrics
+from app.core.profiling import profile_requested
+from app.services.job_runner import run_job, JobLimitExceeded
+
+# pandas, sklearn, LangChain and Chroma are imported inside the handlers
+# (or by the background warmup) so the process starts serving in well
+# under a second; see benchmarks/startup.py.
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARMUP_ON_STARTUP:
+        start_warmup()
+    maintenance = None
+    if VECTOR_MAINTENANCE_INTERVAL_SECONDS > 0:
+        maintenance = asyncio.create_task(vector_maintenance_loop())
+    yield
+    if maintenance is not None:
+        maintenance.cancel()
+    # Release pooled keep-alive connections held by the LLM providers
+    await close_http_client()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # -----------------------------
 # In-memory dataset store
@@ -28,16 +65,29 @@ app.add_middleware(
     allow_origins=["*"],  # tighten in production
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
+# -----------------------------
+# Compression
+# -----------------------------
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_BYTES, compresslevel=GZIP_LEVEL)
+
 # -----------------------------
 # Background RAG task
 # -----------------------------
-def run_rag_background(file_path: str, dataset_id: str):
+def run_rag_background(file_path: str, dataset_id: str, lock=None):
     try:
         dataset_db[dataset_id]["rag_status"] = "indexing"
 
-        success = index_dataset_for_rag(file_path, dataset_id)
+        rag_timings = {}
+        success, job = run_job(
+            "rag_index", "app.services.rag_service:index_dataset_for_rag", dataset_id,
+            {"file_path": file_path, "dataset_id": dataset_id, "timings": rag_timings}
+        )
+        record_job(dataset_db[dataset_id], job)
+        refresh_rag_progress(dataset_db[dataset_id])
+        dataset_db[dataset_id]["rag_timings"] = rag_timings
 
         dataset_db[dataset_id]["rag_status"] = (
             "ready" if success else "failed"
@@ -45,14 +95,134 @@ def run_rag_background(file_path: str, dataset_id: str):
 
     except Exception as e:
         print(f"RAG error for {dataset_id}: {e}")
+        record_job(dataset_db[dataset_id], getattr(e, "job", None))
+        dataset_db[dataset_id]["rag_status"] = "failed"
+
+    finally:
+        if lock is not None:
+            lock.release()
+
+
+def run_rag_append_background(rows_path: str, dataset_id: str, source_path: str, start_row: int,
+                              lock=None):
+    try:
+        dataset_db[dataset_id]["rag_status"] = "indexing"
+
+        rag_timings = {}
+        success, job = run_job(
+            "rag_append", "app.services.rag_service:append_rows_to_rag", dataset_id,
+            {"rows_path": rows_path, "dataset_id": dataset_id, "source_path": source_path,
+             "start_row": start_row, "timings": rag_timings}
+        )
+        record_job(dataset_db[dataset_id], job)
+        refresh_rag_progress(dataset_db[dataset_id])
+        dataset_db[dataset_id]["rag_timings"] = rag_timings
+
+        dataset_db[dataset_id]["rag_status"] = (
+            "ready" if success else "failed"
+        )
+
+    except Exception as e:
+        print(f"RAG append error for {dataset_id}: {e}")
+        record_job(dataset_db[dataset_id], getattr(e, "job", None))
         dataset_db[dataset_id]["rag_status"] = "failed"
 
+    finally:
+        if os.path.exists(rows_path):
+            os.remove(rows_path)
+        if lock is not None:
+            lock.release()
+
+
+def refresh_rag_progress(entry: dict):
+    """Copies the index's percent-indexed (written by the indexing job) into the entry."""
+    from app.services.rag_service import rag_progress
+
+    progress = rag_progress(entry["id"])
+    if progress is not None:
+        entry["rag_progress"] = progress
+
+
+# -----------------------------
+# Job accounting (see job_runner.py)
+# -----------------------------
+def record_job(entry: dict, job: dict | None):
+    """Keeps a job's resource accounting (and its profile, if one was
+    captured) in the dataset record, under "jobs" / "profiles"."""
+    if entry is None or not job:
+        return
+    job = dict(job)
+    profile = job.pop("profile", None)
+    entry.setdefault("jobs", {})[job["kind"]] = job
+    if profile:
+        entry.setdefault("profiles", {})[job["kind"]] = profile
+
+
+async def run_dataset_job(entry: dict, kind: str, target: str, profile: bool = False, **kwargs):
+    """run_job off the event loop, recording the accounting even when it fails."""
+    try:
+        result, job = await run_in_threadpool(run_job, kind, target, entry["id"], kwargs, profile)
+    except Exception as e:
+        record_job(entry, getattr(e, "job", None))
+        raise
+    record_job(entry, job)
+    return result
+
+
+# -----------------------------
+# Per-dataset write lock
+# -----------------------------
+# Appends and re-targets rewrite a dataset's file and profile; one at a
+# time per dataset. A threading.Lock so a background task can release it.
+_dataset_locks = {}
+
+
+async def lock_dataset(dataset_id: str):
+    """Waits for the dataset's write lock without blocking the event loop."""
+    lock = _dataset_locks.setdefault(dataset_id, threading.Lock())
+    while not lock.acquire(blocking=False):
+        await asyncio.sleep(0.05)
+    return lock
+
+
+# -----------------------------
+# Admission control (memory budget)
+# -----------------------------
+async def admit_job(file_path: str, label: str, target_column: str | None = None):
+    """Waits until the job's estimated peak memory fits the budget;
+    413 / 429 / 503 (+ Retry-After) when it is not admitted."""
+    if not ADMISSION_ENABLED:
+        return None
+    from app.services.admission import ADMISSION, AdmissionRejected, estimate_job_memory
+
+    estimate = await run_in_threadpool(estimate_job_memory, file_path, target_column)
+    try:
+        return await ADMISSION.acquire(label, estimate["peak_bytes"], estimate)
+    except AdmissionRejected as e:
+        headers = {"Retry-After": str(e.retry_after)} if e.retry_after else None
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=headers)
+
+
+def release_job(reservation):
+    if reservation is not None:
+        from app.services.admission import ADMISSION
+        ADMISSION.release(reservation)
+
+
+@app.get("/api/v1/admission")
+async def admission_status():
+    if not ADMISSION_ENABLED:
+        return {"enabled": False}
+    from app.services.admission import ADMISSION
+    return {"enabled": True, **ADMISSION.snapshot()}
+
 
 # -----------------------------
 # Upload + Analysis endpoint
 # -----------------------------
 @app.post("/api/v1/upload")
 async def upload_dataset(
+    request: Request,
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     target_column: str | None = Form(None)
@@ -72,10 +242,19 @@ async def upload_dataset(
         buffer.write(content)
 
     print("📁 Saved file size:", os.path.getsize(temp_path), "bytes")
+
+    # Reserve memory before anything heavy runs (may wait in the queue)
+    try:
+        reservation = await admit_job(temp_path, f"upload:{dataset_id}", target_column)
+    except HTTPException:
+        os.remove(temp_path)
+        raise
+
     # Initialize dataset state
     dataset_db[dataset_id] = {
         "id": dataset_id,
         "name": file.filename,
+        "file_path": temp_path,
         "file_size": file_size,
         # analysis
         "analysis_status": "analyzing",
@@ -89,12 +268,23 @@ async def upload_dataset(
 
 # ... inside upload_dataset endpoint ...
     try:
-        result = process_and_analyze_dataset(
+        # Off the event loop (or in a worker process, JOB_ISOLATION), so
+        # queued uploads and polling stay responsive
+        result = await run_dataset_job(
+            dataset_db[dataset_id],
+            "upload",
+            "app.services.ml_service:process_and_analyze_dataset",
+            profile=profile_requested(request),
             file_path=temp_path,
             dataset_id=dataset_id,
             user_target_column=target_column
         )
 
+        # The pipeline runs the first RAG pass (summary + row sample)
+        # concurrently with training, so chat works from here on
+        dataset_db[dataset_id]["rag_status"] = result.get("rag_status", "pending")
+        refresh_rag_progress(dataset_db[dataset_id])
+
         # 1. Handle the "Did you mean...?" scenario
         if result.get("analysis_status") == "needs_user_input":
             dataset_db[dataset_id]["analysis_status"] = "needs_user_input"
@@ -106,20 +296,322 @@ async def upload_dataset(
         # Use .get() to avoid KeyError if something goes wrong
         dataset_db[dataset_id]["analysis_result"] = result.get("analysis_result") 
 
-        # 3. Start RAG
-        background_tasks.add_task(run_rag_background, temp_path, dataset_id)
+        # 3. Stream the remaining chunks in the background (or retry
+        #    the first pass if it failed)
+        if dataset_db[dataset_id]["rag_status"] != "ready":
+            dataset_db[dataset_id]["rag_status"] = "indexing"
+            background_tasks.add_task(run_rag_background, temp_path, dataset_id)
 
     except Exception as e:
         print(f"❌ Analysis error for {dataset_id}: {e}")
         dataset_db[dataset_id]["analysis_status"] = "failed"
         dataset_db[dataset_id]["error_message"] = str(e)
 
+    finally:
+        release_job(reservation)
+
     return dataset_db[dataset_id]
 
 
+# -----------------------------
+# Append rows endpoint
+# -----------------------------
+@app.post("/api/v1/dataset/{dataset_id}/rows")
+async def append_rows(
+    dataset_id: str,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...)
+):
+    entry = dataset_db.get(dataset_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    content = await file.read()
+    if not content:
+        raise HTTPException(status_code=400, detail="Uploaded file is empty")
+
+    # Held from validation through the RAG append (released by the
+    # background task), so appends and re-targets never interleave
+    lock = await lock_dataset(dataset_id)
+    handed_over = False
+    rows_file = f"app/data/raw/{dataset_id}_rows_{uuid.uuid4().hex}.csv"
+    try:
+        if entry["analysis_status"] != "completed":
+            raise HTTPException(
+                status_code=409,
+                detail=f"Dataset analysis is '{entry['analysis_status']}', expected 'completed'"
+            )
+
+        os.makedirs("app/data/raw", exist_ok=True)
+        with open(rows_file, "wb") as buffer:
+            buffer.write(content)
+
+        try:
+            reservation = await admit_job(rows_file, f"append:{dataset_id}")
+        except ValueError as e:  # the estimate's sample read (pandas ParserError)
+            raise HTTPException(status_code=400, detail=f"Could not parse the appended rows: {e}")
+        try:
+            result = await run_dataset_job(
+                entry,
+                "append",
+                "app.services.ml_service:append_csv_to_dataset",
+                profile=profile_requested(request),
+                file_path=entry["file_path"],
+                dataset_id=dataset_id,
+                rows_file=rows_file,
+                analysis_result=entry["analysis_result"]
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except JobLimitExceeded as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        finally:
+            release_job(reservation)
+
+        # A worker process (JOB_ISOLATION=process) invalidated only its own copy
+        from app.services.dataset_cache import invalidate_dataset
+        invalidate_dataset(dataset_id)
+
+        entry["file_size"] = os.path.getsize(entry["file_path"])
+        entry["analysis_result"] = result["analysis_result"]
+        entry["model_status"] = "stale"
+
+        # Embed only the new rows into the existing collection; an evicted
+        # collection is rebuilt from the (already appended) full file instead
+        evicted = entry.get("rag_status") == "evicted"
+        entry["rag_status"] = "indexing"
+        if evicted:
+            background_tasks.add_task(run_rag_background, entry["file_path"], dataset_id, lock)
+        else:
+            background_tasks.add_task(
+                run_rag_append_background,
+                result["rows_path"],
+                dataset_id,
+                entry["file_path"],
+                result["start_row"],
+                lock
+            )
+        handed_over = True
+    finally:
+        if not handed_over:
+            lock.release()
+        if os.path.exists(rows_file):
+            os.remove(rows_file)
+
+    return {
+        "dataset_id": dataset_id,
+        "rows_added": result["rows_added"],
+        "total_rows": result["total_rows"],
+        "model_status": "stale",
+        "rag_status": "indexing",
+    }
+
+
+# -----------------------------
+# Re-target endpoint
+# -----------------------------
+class TargetRequest(BaseModel):
+    target_column: str
+
+
+@app.post("/api/v1/dataset/{dataset_id}/target")
+async def retarget(dataset_id: str, request: TargetRequest, background_tasks: BackgroundTasks,
+                   http_request: Request):
+    entry = dataset_db.get(dataset_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    if entry["analysis_status"] == "analyzing":
+        raise HTTPException(status_code=409, detail="Dataset is still being analyzed")
+
+    lock = await lock_dataset(dataset_id)
+    try:
+        reservation = await admit_job(
+            entry["file_path"], f"retarget:{dataset_id}", request.target_column
+        )
+    except HTTPException:
+        lock.release()
+        raise
+    previous_status = entry["analysis_status"]
+    entry["analysis_status"] = "analyzing"
+    try:
+        result = await run_dataset_job(
+            entry,
+            "retarget",
+            "app.services.ml_service:retarget_dataset",
+            profile=profile_requested(http_request),
+            file_path=entry["file_path"],
+            dataset_id=dataset_id,
+            target_column=request.target_column
+        )
+    except ValueError as e:
+        entry["analysis_status"] = previous_status
+        raise HTTPException(status_code=400, detail=str(e))
+    except JobLimitExceeded as e:
+        entry["analysis_status"] = previous_status
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception:
+        entry["analysis_status"] = previous_status
+        raise
+    finally:
+        release_job(reservation)
+        lock.release()
+
+    if result.get("analysis_status") == "needs_user_input":
+        entry["analysis_status"] = "needs_user_input"
+        entry["analysis_result"] = result
+        return entry
+
+    entry["analysis_status"] = "completed"
+    entry["analysis_result"] = result.get("analysis_result")
+    entry["model_status"] = "fresh"
+    entry.pop("error_message", None)
+
+    # The RAG index does not depend on the target; build it only if the
+    # upload stopped before indexing (e.g. it needed user input)
+    if entry.get("rag_status") not in ("ready", "indexing"):
+        entry["rag_status"] = "indexing"
+        background_tasks.add_task(run_rag_background, entry["file_path"], dataset_id)
+
+    return entry
+
+
 # -----------------------------
 # Dataset status endpoint
 # -----------------------------
 @app.get("/api/v1/dataset/{dataset_id}")
-async def get_status(dataset_id: str):
-    return dataset_db.get(dataset_id)
\ No newline at end of file
+async def get_status(dataset_id: str, fields: str | None = None):
+    """
+    Full dataset entry, or only the dotted paths in `fields`, e.g.
+    ?fields=analysis_status,rag_status,analysis_result.best_model
+    """
+    entry = dataset_db.get(dataset_id)
+    if entry is not None and entry.get("rag_status") == "indexing":
+        refresh_rag_progress(entry)
+    if entry is not None and fields:
+        entry = project(entry, fields)
+    # Returned directly: orjson renders the entry without jsonable_encoder
+    return FastJSONResponse(entry)
+
+
+@app.get("/api/v1/dataset/{dataset_id}/columns/{section}")
+async def get_column_section(
+    dataset_id: str,
+    section: str,
+    cursor: str | None = None,
+    limit: int = Query(50, ge=1, le=500)
+):
+    """
+    Cursor-paginated per-column section of the analysis (feature_analysis,
+    column_transformations, boxplot_stats, numeric_distributions,
+    missing_summary, outliers).
+    """
+    entry = dataset_db.get(dataset_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    if entry["analysis_status"] != "completed" or not entry.get("analysis_result"):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Dataset analysis is '{entry['analysis_status']}', expected 'completed'"
+        )
+
+    try:
+        page = paginate_section(entry["analysis_result"], section, cursor, limit)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown section '{section}'")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse(page)
+
+
+# -----------------------------
+# Profiles (see core/profiling.py)
+# -----------------------------
+@app.get("/api/v1/dataset/{dataset_id}/profiles")
+async def get_profiles(dataset_id: str):
+    from app.core.profiling import list_profiles
+    return {"dataset_id": dataset_id, "profiles": list_profiles(dataset_id)}
+
+
+@app.get("/api/v1/dataset/{dataset_id}/profile")
+async def get_profile(dataset_id: str, kind: str = "upload", format: str = "speedscope"):
+    """
+    Latest profile of an upload / retarget / append / chat: a speedscope file
+    (open at https://www.speedscope.app) or folded stacks for flamegraph.pl.
+    """
+    from app.core.profiling import profile_path, PROFILE_FORMATS
+
+    try:
+        path = profile_path(dataset_id, kind, format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f"No {kind} profile for this dataset")
+    return FileResponse(path, media_type=PROFILE_FORMATS[format][1], filename=os.path.basename(path))
+
+
+# -----------------------------
+# Vector store lifecycle
+# -----------------------------
+def run_vector_maintenance():
+    """Evicts orphaned / idle collections, compacts the store and marks
+    evicted datasets so the next re-target re-indexes them."""
+    from app.services.vector_store import run_maintenance
+
+    report = run_maintenance(active_ids=set(dataset_db))
+    for item in report["evicted"]:
+        entry = dataset_db.get(item["name"])
+        if entry is not None:
+            entry["rag_status"] = "evicted"
+    return report
+
+
+async def vector_maintenance_loop():
+    while True:
+        await asyncio.sleep(VECTOR_MAINTENANCE_INTERVAL_SECONDS)
+        try:
+            report = await run_in_threadpool(run_vector_maintenance)
+            print(f"🧹 Vector maintenance: {len(report['evicted'])} evicted in {report['seconds']}s")
+        except Exception as e:
+            print(f"Vector maintenance error: {e}")
+
+
+@app.get("/api/v1/vector-store")
+async def vector_store_status():
+    from app.services.vector_store import get_vector_store, list_collections
+
+    collections = await run_in_threadpool(list_collections)
+    return {
+        "backend": get_vector_store().name,
+        "collections": collections,
+    }
+
+
+@app.post("/api/v1/vector-store/maintenance")
+async def vector_store_maintenance():
+    return await run_in_threadpool(run_vector_maintenance)
+
+
+# -----------------------------
+# Health / readiness endpoints
+# -----------------------------
+@app.get("/health")
+async def health():
+    # Liveness: answers as soon as the process is up
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+async def ready():
+    # Readiness: 503 until the warmup has loaded the models
+    state = readiness()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
+
+# -----------------------------
+# Metrics endpoint
+# -----------------------------
+@app.get("/metrics")
+async def metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,292 @@
+import asyncio
+import io
+import math
+import os
+import threading
+import time
+import uuid
+from app.core.config import (
+    ADMISSION_MEMORY_BUDGET_MB,
+    ADMISSION_MEMORY_FRACTION,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_MAX_WAIT_SECONDS,
+    ADMISSION_SAMPLE_ROWS,
+    ADMISSION_BASE_MB,
+    TRANSFORM_CACHE_MMAP_BYTES,
+    FOREST_EVALUATION,
+    FOREST_MAX_TREES,
+)
+
+MB = 2**20
+
+
+class AdmissionRejected(Exception):
+    """Job not admitted: `status_code` 413 (never fits), 429 (queue full)
+    or 503 (waited too long); `retry_after` seconds for 429/503."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int | None = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+# =====================================================
+# MEMORY BUDGET
+# =====================================================
+def available_memory_bytes() -> int:
+    """Container (cgroup v2 / v1) limit when set, otherwise host RAM."""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+            # "max" / absurdly large values mean "no limit"
+            if value.isdigit() and int(value) < 2**60:
+                return int(value)
+        except OSError:
+            continue
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+
+def memory_budget_bytes() -> int:
+    if ADMISSION_MEMORY_BUDGET_MB > 0:
+        return int(ADMISSION_MEMORY_BUDGET_MB * MB)
+    return int(available_memory_bytes() * ADMISSION_MEMORY_FRACTION)
+
+
+# =====================================================
+# PEAK MEMORY ESTIMATE
+# =====================================================
+def _estimate_cardinality(counts, total_rows: int) -> int:
+    """
+    Distinct values in the full column from a head sample (bias-corrected
+    Chao1: values seen once vs twice bound how many were not seen yet).
+    ID-like columns (nearly all singletons) come out at the row count;
+    low-cardinality columns at what the sample already shows.
+    """
+    distinct = len(counts)
+    f1 = int((counts == 1).sum())
+    f2 = int((counts == 2).sum())
+    return int(min(total_rows, distinct + f1 * (f1 - 1) / (2 * (f2 + 1))))
+
+
+# Bytes per node of a fitted sklearn tree: the Node struct plus its value
+# array (one float64 per class; one for regression)
+_TREE_NODE_BYTES = 64
+
+
+def estimate_job_memory(file_path: str, target_column: str | None = None,
+                        sample_rows: int = ADMISSION_SAMPLE_ROWS) -> dict:
+    """
+    Peak memory of analysing `file_path`, from the file size and a head
+    sample: the loaded frame (plus the feature copy), the dense one-hot
+    matrices FoldTransformCache holds (holdout + one CV fold), one
+    working copy for model fitting, the random forest's trees, the RAG
+    documents and a fixed base.
+    """
+    import pandas as pd
+    from app.services.dtype_optimizer import NUMERIC_DTYPES, CATEGORICAL_DTYPES
+
+    file_bytes = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        head = [f.readline() for _ in range(sample_rows + 1)]
+    head = [line for line in head if line]
+    head_bytes = sum(len(line) for line in head[1:])
+
+    sample = pd.read_csv(io.BytesIO(b"".join(head)))
+    n_sample = max(len(sample), 1)
+    rows = int(file_bytes / max(head_bytes / n_sample, 1)) if len(head) > sample_rows else len(sample)
+    rows = max(rows, len(sample))
+
+    features = sample.drop(columns=[target_column]) if target_column in sample.columns else sample
+    numeric = features.select_dtypes(include=NUMERIC_DTYPES).columns
+    categorical = features.select_dtypes(include=CATEGORICAL_DTYPES).columns
+    cardinality = {
+        col: _estimate_cardinality(features[col].value_counts(), rows)
+        for col in categorical
+    }
+
+    frame_bytes = int(sample.memory_usage(deep=True).sum() / n_sample * rows)
+    one_hot_width = len(numeric) + sum(cardinality.values())
+    matrix_bytes = rows * one_hot_width * 4  # dense float32, all rows
+
+    # The holdout and the current CV fold (folds are transformed one at a
+    # time) each hold a train (~80%) and a test (~20%) array; arrays above
+    # the mmap threshold are memory-mapped from disk
+    splits = 2
+    fold_bytes = splits * sum(
+        part for part in (0.8 * matrix_bytes, 0.2 * matrix_bytes)
+        if part < TRANSFORM_CACHE_MMAP_BYTES
+    )
+
+    # A fully grown tree on a bootstrap sample has ~0.5 nodes per training
+    # row; OOB growth can reach FOREST_MAX_TREES, CV keeps two 100-tree
+    # forests alive
+    n_classes = min(int(sample[target_column].nunique()), 100) if target_column in sample.columns else 1
+    trees = FOREST_MAX_TREES if FOREST_EVALUATION == "oob" else 200
+    forest_bytes = int(trees * 0.5 * 0.8 * rows * (_TREE_NODE_BYTES + 8 * n_classes))
+
+    components = {
+        "frame": 2 * frame_bytes,
+        "fold_matrices": int(fold_bytes),
+        # (LogisticRegression fits on a float64 copy)
+        "model_working_copy": 2 * matrix_bytes,
+        "forest": forest_bytes,
+        "rag_documents": 3 * file_bytes,
+        "base": int(ADMISSION_BASE_MB * MB),
+    }
+    return {
+        "file_bytes": file_bytes,
+        "estimated_rows": rows,
+        "one_hot_width": one_hot_width,
+        "widest_categoricals": dict(sorted(cardinality.items(), key=lambda kv: -kv[1])[:5]),
+        "components": components,
+        "peak_bytes": sum(components.values()),
+    }
+
+
+# =====================================================
+# ADMISSION CONTROLLER
+# =====================================================
+class Reservation:
+    def __init__(self, label: str, nbytes: int, details: dict | None):
+        self.id = str(uuid.uuid4())
+        self.label = label
+        self.bytes = nbytes
+        self.details = details or {}
+        self.state = "queued"
+        self.queued_at = time.time()
+        self.started_at = None
+
+    def to_dict(self):
+        now = time.time()
+        return {
+            "id": self.id,
+            "label": self.label,
+            "state": self.state,
+            "reserved_mb": round(self.bytes / MB, 1),
+            "waited_seconds": round((self.started_at or now) - self.queued_at, 2),
+            "running_seconds": round(now - self.started_at, 2) if self.started_at else None,
+        }
+
+
+class AdmissionController:
+    """
+    Memory budget shared by the heavy analysis jobs.
+
+    A job reserves its estimated peak memory before it starts. Jobs that
+    do not fit wait in FIFO order (a big job at the head is not starved by
+    small ones behind it) until running jobs release enough; a full queue
+    is rejected at once with 429, a wait longer than `max_wait_seconds`
+    with 503, both with a Retry-After derived from recent job durations.
+
+    State is guarded by a threading lock and waiters are futures of the
+    loop they were created on, so releases may come from any thread.
+    """
+
+    def __init__(self, budget_bytes: int | None = None, max_queue: int = ADMISSION_MAX_QUEUE,
+                 max_wait_seconds: float = ADMISSION_MAX_WAIT_SECONDS):
+        self.budget_bytes = budget_bytes if budget_bytes is not None else memory_budget_bytes()
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self._lock = threading.Lock()
+        self._running = {}
+        self._queue = []        # [(reservation, loop, future)]
+        self._avg_job_seconds = 30.0
+        self.admitted = 0
+        self.rejected = 0
+
+    @property
+    def reserved_bytes(self) -> int:
+        return sum(r.bytes for r in self._running.values())
+
+    def _start(self, reservation: Reservation):
+        reservation.state = "running"
+        reservation.started_at = time.time()
+        self._running[reservation.id] = reservation
+        self.admitted += 1
+
+    def _retry_after(self) -> int:
+        # Roughly: the jobs ahead drain at the current concurrency
+        ahead = len(self._queue) + 1
+        return max(1, math.ceil(self._avg_job_seconds * ahead / max(len(self._running), 1)))
+
+    def _reject(self, status_code: int, detail: str, retry: bool = True):
+        self.rejected += 1
+        raise AdmissionRejected(status_code, detail, self._retry_after() if retry else None)
+
+    async def acquire(self, label: str, nbytes: int, details: dict | None = None) -> Reservation:
+        reservation = Reservation(label, nbytes, details)
+        with self._lock:
+            if nbytes > self.budget_bytes:
+                self._reject(
+                    413,
+                    f"Job needs ~{nbytes / MB:.0f} MB, more than the whole "
+                    f"memory budget ({self.budget_bytes / MB:.0f} MB)",
+                    retry=False
+                )
+            if not self._queue and self.reserved_bytes + nbytes <= self.budget_bytes:
+                self._start(reservation)
+                return reservation
+            if len(self._queue) >= self.max_queue:
+                self._reject(429, "Too many analysis jobs queued, retry later")
+
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._queue.append((reservation, loop, future))
+
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            with self._lock:
+                if reservation.state == "queued":
+                    self._queue = [item for item in self._queue if item[0] is not reservation]
+                    self._reject(503, "Server is busy with other analysis jobs, retry later")
+        except asyncio.CancelledError:
+            # Client went away while queued (or right after being admitted)
+            self.release(reservation)
+            raise
+        return reservation
+
+    def release(self, reservation: Reservation):
+        with self._lock:
+            if reservation.state == "queued":
+                self._queue = [item for item in self._queue if item[0] is not reservation]
+            elif self._running.pop(reservation.id, None) is not None:
+                seconds = time.time() - reservation.started_at
+                self._avg_job_seconds = 0.8 * self._avg_job_seconds + 0.2 * seconds
+            reservation.state = "released"
+            self._grant()
+
+    def _grant(self):
+        # FIFO: stop at the first job that does not fit yet
+        while self._queue:
+            reservation, loop, future = self._queue[0]
+            if self.reserved_bytes + reservation.bytes > self.budget_bytes:
+                break
+            self._queue.pop(0)
+            self._start(reservation)
+            loop.call_soon_threadsafe(_resolve, future)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            reserved = self.reserved_bytes
+            return {
+                "budget_mb": round(self.budget_bytes / MB, 1),
+                "reserved_mb": round(reserved / MB, 1),
+                "available_mb": round((self.budget_bytes - reserved) / MB, 1),
+                "running": [r.to_dict() for r in self._running.values()],
+                "queued": [item[0].to_dict() for item in self._queue],
+                "max_queue": self.max_queue,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "avg_job_seconds": round(self._avg_job_seconds, 1),
+            }
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+ADMISSION = AdmissionController()
@@ -0,0 +1,123 @@
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.mixture import GaussianMixture
+from sklearn.metrics import (
+    silhouette_score,
+    calinski_harabasz_score,
+    davies_bouldin_score
+)
+from app.core.config import (
+    CLUSTER_K_MIN,
+    CLUSTER_K_MAX,
+    CLUSTER_MINIBATCH_ROWS,
+    CLUSTER_N_JOBS,
+    SILHOUETTE_SAMPLE_SIZE,
+    GMM_SAMPLE_SIZE,
+)
+
+
+# =====================================================
+# SCORING
+# =====================================================
+def stratified_sample_indices(labels, sample_size: int, random_state: int = 42):
+    """
+    Row indices of a fixed-size sample that keeps every cluster's share
+    (at least two rows per cluster so silhouette stays defined).
+    """
+    labels = np.asarray(labels)
+    n = labels.size
+    if n <= sample_size:
+        return np.arange(n)
+
+    rng = np.random.default_rng(random_state)
+    picked = []
+    for label in np.unique(labels):
+        members = np.flatnonzero(labels == label)
+        take = max(2, int(round(sample_size * members.size / n)))
+        picked.append(rng.choice(members, size=min(take, members.size), replace=False))
+    return np.sort(np.concatenate(picked))
+
+
+def score_clustering(X, labels, sample_size: int = SILHOUETTE_SAMPLE_SIZE):
+    """
+    Silhouette on a stratified sample (O(sample^2) instead of O(n^2)),
+    plus Calinski-Harabasz and Davies-Bouldin on the full data (O(n*k)).
+    """
+    n_labels = np.unique(labels).size
+    if n_labels < 2 or n_labels >= len(labels):
+        return {
+            "silhouette_score": -1.0,
+            "calinski_harabasz": None,
+            "davies_bouldin": None,
+            "silhouette_sample_size": 0,
+        }
+
+    idx = stratified_sample_indices(labels, sample_size)
+    return {
+        "silhouette_score": float(silhouette_score(X[idx], labels[idx])),
+        "calinski_harabasz": float(calinski_harabasz_score(X, labels)),
+        "davies_bouldin": float(davies_bouldin_score(X, labels)),
+        "silhouette_sample_size": int(idx.size),
+    }
+
+
+# =====================================================
+# K SWEEP
+# =====================================================
+def _make_kmeans(k: int, n_rows: int):
+    if n_rows >= CLUSTER_MINIBATCH_ROWS:
+        return MiniBatchKMeans(n_clusters=k, batch_size=4096, n_init=3, random_state=42)
+    return KMeans(n_clusters=k, random_state=42)
+
+
+def _fit_k(X, k: int):
+    labels = _make_kmeans(k, X.shape[0]).fit_predict(X)
+    return {"k": k, **score_clustering(X, labels)}
+
+
+def evaluate_clustering(X, k_min: int = CLUSTER_K_MIN, k_max: int = CLUSTER_K_MAX,
+                        n_jobs: int = CLUSTER_N_JOBS):
+    """
+    Sweeps k for (MiniBatch)KMeans in parallel, picks the k with the best
+    sampled silhouette and fits a GaussianMixture with that k on a sample.
+
+    Returns metrics in the format `select_best_model` expects.
+    """
+    X = np.asarray(X)
+    n_rows = X.shape[0]
+    k_max = min(k_max, n_rows - 1)
+    k_values = list(range(k_min, k_max + 1))
+    if not k_values:
+        raise ValueError("Not enough rows for clustering")
+
+    sweep = Parallel(n_jobs=n_jobs)(delayed(_fit_k)(X, k) for k in k_values)
+    best = max(sweep, key=lambda r: r["silhouette_score"])
+    best_k = best["k"]
+
+    kmeans_name = "MiniBatch KMeans" if n_rows >= CLUSTER_MINIBATCH_ROWS else "KMeans"
+    results = [{
+        "model": kmeans_name,
+        "n_clusters": best_k,
+        **{key: value for key, value in best.items() if key != "k"},
+        "k_sweep": sweep,
+    }]
+
+    # ---------------- GAUSSIAN MIXTURE ----------------
+    # Fitted on a sample, then labels assigned to every row
+    rng = np.random.default_rng(42)
+    fit_idx = (
+        rng.choice(n_rows, size=GMM_SAMPLE_SIZE, replace=False)
+        if n_rows > GMM_SAMPLE_SIZE else np.arange(n_rows)
+    )
+    gmm = GaussianMixture(n_components=best_k, random_state=42).fit(X[fit_idx])
+    labels = gmm.predict(X)
+
+    results.append({
+        "model": "Gaussian Mixture",
+        "n_clusters": best_k,
+        **score_clustering(X, labels),
+        "fit_sample_size": int(fit_idx.size),
+    })
+
+    return results
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+from app.core.config import CORR_THRESHOLD, CORR_TOP_K, CORR_SAMPLE_ROWS, CORR_BLOCK_COLS
+
+
+# =====================================================
+# CORRELATION KERNELS
+# =====================================================
+def _prepare(values: np.ndarray):
+    """Centers each column (float32) and returns it with its validity mask."""
+    mask = ~np.isnan(values)
+    counts = mask.sum(axis=0)
+    means = np.nansum(values, axis=0) / np.maximum(counts, 1)
+    centered = np.where(mask, values - means, 0).astype("float32")
+    return centered, mask.astype("float32"), bool(mask.all())
+
+
+def _corr_block(xa, ma, dense_a, xb, mb, dense_b):
+    """
+    Pearson correlation between every column of block a and block b.
+
+    Without missing values this is a single BLAS product of standardized
+    columns. Otherwise it is the pairwise-complete estimate (what pandas
+    computes) from four products over zero-filled values and masks.
+    """
+    if dense_a and dense_b:
+        n = xa.shape[0]
+        std_a = np.sqrt((xa * xa).sum(axis=0) / n)
+        std_b = np.sqrt((xb * xb).sum(axis=0) / n)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (xa.T @ xb) / n / np.outer(std_a, std_b)
+
+    n = ma.T @ mb                    # pairwise counts
+    sum_a = xa.T @ mb                # sum of a over rows where b is present
+    sum_b = ma.T @ xb
+    sq_a = (xa * xa).T @ mb
+    sq_b = ma.T @ (xb * xb)
+    cross = xa.T @ xb
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = n * cross - sum_a * sum_b
+        var_a = n * sq_a - sum_a * sum_a
+        var_b = n * sq_b - sum_b * sum_b
+        corr = cov / np.sqrt(var_a * var_b)
+    corr[n < 2] = np.nan
+    return corr
+
+
+def _keep_top(rows, cols, vals, top_k):
+    if top_k is None or vals.size <= top_k:
+        return rows, cols, vals
+    keep = np.argpartition(-vals, top_k - 1)[:top_k]
+    return rows[keep], cols[keep], vals[keep]
+
+
+# =====================================================
+# STRONG PAIRS
+# =====================================================
+def strong_correlations(
+    df: pd.DataFrame,
+    numeric_cols,
+    threshold: float = CORR_THRESHOLD,
+    top_k: int | None = CORR_TOP_K,
+    sample_rows: int | None = CORR_SAMPLE_ROWS,
+    block_cols: int = CORR_BLOCK_COLS,
+    random_state: int = 42
+):
+    """
+    Column pairs with |corr| > threshold, strongest first.
+
+    Tables wider than `block_cols` are processed in column blocks, so the
+    full p x p matrix is never materialised; only the upper triangle of
+    each block pair is scanned and at most `top_k` pairs are kept.
+    """
+    numeric_cols = list(numeric_cols)
+    if len(numeric_cols) < 2:
+        return []
+
+    data = df[numeric_cols]
+    if sample_rows and len(data) > sample_rows:
+        data = data.sample(n=sample_rows, random_state=random_state)
+
+    values = data.to_numpy(dtype="float32", na_value=np.nan)
+    p = values.shape[1]
+    block = p if p <= block_cols else block_cols
+
+    starts = list(range(0, p, block))
+    prepared = {s: _prepare(values[:, s:s + block]) for s in starts}
+
+    rows = np.empty(0, dtype="int64")
+    cols = np.empty(0, dtype="int64")
+    vals = np.empty(0, dtype="float32")
+
+    for i, a in enumerate(starts):
+        for b in starts[i:]:
+            corr = np.abs(_corr_block(*prepared[a], *prepared[b]))
+
+            # Upper triangle only (diagonal blocks) and above threshold
+            hit = np.nan_to_num(corr, nan=0.0) > threshold
+            if a == b:
+                hit &= np.triu(np.ones_like(hit, dtype=bool), k=1)
+
+            r, c = np.nonzero(hit)
+            rows = np.concatenate([rows, r + a])
+            cols = np.concatenate([cols, c + b])
+            vals = np.concatenate([vals, corr[r, c]])
+            rows, cols, vals = _keep_top(rows, cols, vals, top_k)
+
+    order = np.argsort(-vals, kind="stable")
+    return [
+        {
+            "feature_1": numeric_cols[rows[k]],
+            "feature_2": numeric_cols[cols[k]],
+            "correlation": round(float(vals[k]), 3)
+        }
+        for k in order
+    ]
@@ -1,11 +1,21 @@
 import pandas as pd
 import numpy as np
 import math
+from app.services.sketches import resolve_stats_mode
+from app.services.dataset_profile import DatasetProfile, build_dataset_profile
+from app.services.dtype_optimizer import NUMERIC_DTYPES, CATEGORICAL_DTYPES
+from app.services.correlation import strong_correlations
+
+def compute_boxplot_stats(df: pd.DataFrame,
+                          mode: str | None = None,
+                          profile: DatasetProfile | None = None):
+    # Approximate mode reads quartiles from KLL sketches instead of sorting
+    if resolve_stats_mode(len(df), mode) == "approximate":
+        return (profile or build_dataset_profile(df)).boxplot_stats()
 
-def compute_boxplot_stats(df: pd.DataFrame):
     boxplot_data = {}
 
-    numeric_cols = df.select_dtypes(include=["int64", "float64"]).columns
+    numeric_cols = df.select_dtypes(include=NUMERIC_DTYPES).columns
 
     for col in numeric_cols:
         series = df[col].dropna()
@@ -46,8 +56,13 @@ def safe_float(value, default=None):
         return float(value)
     except Exception:
         return default
-def analyze_dataset(df: pd.DataFrame):
+def analyze_dataset(df: pd.DataFrame,
+                    mode: str | None = None,
+                    profile: DatasetProfile | None = None):
     analysis = {}
+    approximate = resolve_stats_mode(len(df), mode) == "approximate"
+    if approximate:
+        profile = profile or build_dataset_profile(df)
 
     # ---------------- BASIC STATS ----------------
     analysis["rows"] = df.shape[0]
@@ -55,43 +70,45 @@ def analyze_dataset(df: pd.DataFrame):
     analysis["column_names"] = df.columns.tolist()
     analysis["data_types"] = df.dtypes.astype(str).to_dict()
     analysis["missing_values"] = df.isnull().sum().to_dict()
+    analysis["unique_counts"] = (
+        profile.unique_counts() if approximate else df.nunique().to_dict()
+    )
 
     # ---------------- NUMERIC DISTRIBUTIONS ----------------
-    numeric_cols = df.select_dtypes(include=["int64", "float64"]).columns
+    numeric_cols = df.select_dtypes(include=NUMERIC_DTYPES).columns
     analysis["numeric_distributions"] = {}
 
-    for col in numeric_cols:
-         analysis["numeric_distributions"][col] = {
-        "mean": safe_float(df[col].mean()),
-        "median": safe_float(df[col].median()),
-        "std": safe_float(df[col].std()),
-        "min": safe_float(df[col].min()),
-        "max": safe_float(df[col].max()),
-        "skewness": safe_float(df[col].skew())
-    }
+    if approximate:
+        analysis["numeric_distributions"] = profile.numeric_distributions()
+    else:
+        for col in numeric_cols:
+             analysis["numeric_distributions"][col] = {
+            "mean": safe_float(df[col].mean()),
+            "median": safe_float(df[col].median()),
+            "std": safe_float(df[col].std()),
+            "min": safe_float(df[col].min()),
+            "max": safe_float(df[col].max()),
+            "skewness": safe_float(df[col].skew())
+        }
 
 
     # ---------------- CATEGORICAL DISTRIBUTIONS ----------------
-    categorical_cols = df.select_dtypes(include=["object", "category", "bool"]).columns
+    categorical_cols = df.select_dtypes(include=CATEGORICAL_DTYPES).columns
     analysis["categorical_distributions"] = {}
 
-    for col in categorical_cols:
-        top_values = df[col].value_counts().head(3).to_dict()
-        analysis["categorical_distributions"][col] = top_values
+    if approximate:
+        analysis["categorical_distributions"] = profile.categorical_distributions(3)
+    else:
+        for col in categorical_cols:
+            top_values = df[col].value_counts().head(3).to_dict()
+            analysis["categorical_distributions"][col] = top_values
+
+    # ---------------- APPROXIMATION BOUNDS ----------------
+    analysis["stats_mode"] = "approximate" if approximate else "exact"
+    analysis["error_bounds"] = profile.error_bounds() if approximate else None
 
     # ---------------- CORRELATIONS ----------------
-    analysis["strong_correlations"] = []
-    if len(numeric_cols) >= 2:
-        corr_matrix = df[numeric_cols].corr().abs()
-
-        for i in range(len(numeric_cols)):
-            for j in range(i + 1, len(numeric_cols)):
-                val = corr_matrix.iloc[i, j]
-                if val > 0.7:
-                    analysis["strong_correlations"].append({
-                        "feature_1": numeric_cols[i],
-                        "feature_2": numeric_cols[j],
-                        "correlation": round(val, 3)
-                    })
+    # float32 BLAS product + upper-triangle mask (see correlation.py)
+    analysis["strong_correlations"] = strong_correlations(df, numeric_cols)
 
     return analysis
@@ -0,0 +1,52 @@
+import threading
+from collections import OrderedDict
+from app.core.config import DATASET_CACHE_MAX_FRAMES
+
+
+# =====================================================
+# TARGET-INDEPENDENT STATE PER DATASET
+# =====================================================
+# Everything the pipeline computes before a target is chosen: the loaded
+# frame, load report, boxplot stats and the raw analysis (distributions,
+# correlations, unique counts). Re-targeting reuses it and only re-runs
+# the target-dependent stages.
+#
+# The small results are kept for every dataset (like the profile
+# registry); frames are the bulk of the memory and only the most recently
+# used DATASET_CACHE_MAX_FRAMES stay loaded.
+_lock = threading.Lock()
+_results = {}
+_frames = OrderedDict()
+
+
+def cache_dataset(dataset_id: str, df, results: dict):
+    """`df=None` keeps only the results (e.g. from a job worker process)."""
+    with _lock:
+        _results[dataset_id] = results
+        if df is None:
+            _frames.pop(dataset_id, None)
+            return
+        _frames[dataset_id] = df
+        _frames.move_to_end(dataset_id)
+        while len(_frames) > DATASET_CACHE_MAX_FRAMES:
+            _frames.popitem(last=False)
+
+
+def get_cached_results(dataset_id: str) -> dict | None:
+    with _lock:
+        return _results.get(dataset_id)
+
+
+def get_cached_frame(dataset_id: str):
+    with _lock:
+        df = _frames.get(dataset_id)
+        if df is not None:
+            _frames.move_to_end(dataset_id)
+        return df
+
+
+def invalidate_dataset(dataset_id: str):
+    """Drops cached state (e.g. after rows were appended to the file)."""
+    with _lock:
+        _results.pop(dataset_id, None)
+        _frames.pop(dataset_id, None)
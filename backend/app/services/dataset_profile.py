@@ -0,0 +1,208 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from app.core.config import STATS_CHUNK_ROWS, STATS_WORKERS
+from app.core.profiling import scoped_thread_name
+from app.services.sketches import MomentSketch, KLLSketch, HyperLogLog, SpaceSaving
+from app.services.dtype_optimizer import NUMERIC_DTYPES, CATEGORICAL_DTYPES
+
+
+def safe_float(v):
+    if v is None:
+        return None
+    if isinstance(v, float) and (math.isnan(v) or math.isinf(v)):
+        return None
+    return float(v)
+
+
+# =====================================================
+# MERGEABLE DATASET PROFILE
+# =====================================================
+class DatasetProfile:
+    """
+    Per-column mergeable sketches for one dataset.
+
+    Numeric columns get moments (Welford) and a KLL quantile sketch,
+    categorical columns a Space-Saving top-k counter, and every column a
+    HyperLogLog distinct counter. Profiles built on separate chunks or
+    workers merge into one; appended rows are sketched on their own and
+    merged in, so refreshing the statistics costs O(new rows).
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.rows = 0
+        self.missing = {col: 0 for col in self.columns}
+        self.moments = {}
+        self.quantiles = {}
+        self.cardinality = {}
+        self.top_values = {}
+
+    def update(self, df: pd.DataFrame):
+        # Column kinds are fixed by the first chunk, so a small appended
+        # chunk that pandas infers differently (e.g. all-NaN) is coerced.
+        if self.rows == 0:
+            numeric_cols = df.select_dtypes(include=NUMERIC_DTYPES).columns.tolist()
+            categorical_cols = df.select_dtypes(include=CATEGORICAL_DTYPES).columns.tolist()
+        else:
+            numeric_cols = [col for col in self.moments if col in df.columns]
+            categorical_cols = [col for col in self.top_values if col in df.columns]
+
+        self.rows += len(df)
+
+        for col, missing in df.isnull().sum().items():
+            self.missing[col] = self.missing.get(col, 0) + int(missing)
+
+        for col in numeric_cols:
+            values = pd.to_numeric(df[col], errors="coerce").to_numpy(
+                dtype="float64", na_value=float("nan")
+            )
+            self.moments.setdefault(col, MomentSketch()).update(values)
+            self.quantiles.setdefault(col, KLLSketch()).update(values)
+            self.cardinality.setdefault(col, HyperLogLog()).update(values)
+
+        for col in categorical_cols:
+            self.top_values.setdefault(col, SpaceSaving()).update(df[col])
+
+        for col in df.columns:
+            if col not in numeric_cols:
+                self.cardinality.setdefault(col, HyperLogLog()).update(df[col])
+
+        return self
+
+    def merge(self, other: "DatasetProfile"):
+        self.rows += other.rows
+        for col, missing in other.missing.items():
+            self.missing[col] = self.missing.get(col, 0) + missing
+        for col, sketch in other.moments.items():
+            self.moments.setdefault(col, MomentSketch()).merge(sketch)
+        for col, sketch in other.quantiles.items():
+            self.quantiles.setdefault(col, KLLSketch(sketch.k)).merge(sketch)
+        for col, sketch in other.cardinality.items():
+            self.cardinality.setdefault(col, HyperLogLog(sketch.p)).merge(sketch)
+        for col, sketch in other.top_values.items():
+            self.top_values.setdefault(col, SpaceSaving(sketch.capacity)).merge(sketch)
+        return self
+
+    # -------------------------------
+    # Views in the existing response formats
+    # -------------------------------
+    def boxplot_stats(self):
+        """Same shape as data_analysis.compute_boxplot_stats."""
+        boxplot_data = {}
+        for col, moments in self.moments.items():
+            if moments.n == 0:
+                continue
+
+            sketch = self.quantiles[col]
+            q1, q2, q3 = sketch.quantile([0.25, 0.5, 0.75])
+            iqr = q3 - q1
+            lower = q1 - 1.5 * iqr
+            upper = q3 + 1.5 * iqr
+
+            # Outliers estimated from the sketch CDF
+            below = sketch.rank(lower)
+            above = 1 - sketch.rank(upper)
+            outliers = round(moments.n * max(0.0, below + above))
+
+            boxplot_data[col] = {
+                "min": float(moments.min),
+                "q1": float(q1),
+                "median": float(q2),
+                "q3": float(q3),
+                "max": float(moments.max),
+                "outliers": int(outliers),
+            }
+        return boxplot_data
+
+    def numeric_distributions(self):
+        """Same shape as analyze_dataset()["numeric_distributions"]."""
+        return {
+            col: {
+                "mean": safe_float(moments.mean if moments.n else None),
+                "median": safe_float(self.quantiles[col].quantile(0.5)),
+                "std": safe_float(moments.std),
+                "min": safe_float(moments.min if moments.n else None),
+                "max": safe_float(moments.max if moments.n else None),
+                "skewness": safe_float(moments.skewness),
+            }
+            for col, moments in self.moments.items()
+        }
+
+    def categorical_distributions(self, k: int = 3):
+        """Same shape as analyze_dataset()["categorical_distributions"]."""
+        return {col: dict(sketch.top(k)) for col, sketch in self.top_values.items()}
+
+    def analysis_view(self, k: int = 3):
+        """The analyze_dataset() fields a profile can answer on its own."""
+        return {
+            "rows": self.rows,
+            "column_names": list(self.columns),
+            "missing_values": dict(self.missing),
+            "unique_counts": self.unique_counts(),
+            "numeric_distributions": self.numeric_distributions(),
+            "categorical_distributions": self.categorical_distributions(k),
+        }
+
+    def unique_counts(self):
+        return {col: sketch.count() for col, sketch in self.cardinality.items()}
+
+    def missing_summary(self):
+        return {col: n for col, n in self.missing.items() if n > 0}
+
+    def error_bounds(self):
+        """Worst-case error of each approximate statistic."""
+        return {
+            "quantile_rank_error": round(
+                max((s.rank_error for s in self.quantiles.values()), default=0.0), 4
+            ),
+            "distinct_count_relative_error": round(
+                max((s.relative_error for s in self.cardinality.values()), default=0.0), 4
+            ),
+            "top_k_count_error": max(
+                (s.max_count_error for s in self.top_values.values()), default=0
+            ),
+        }
+
+
+def build_dataset_profile(
+    df: pd.DataFrame,
+    chunk_rows: int = STATS_CHUNK_ROWS,
+    n_jobs: int = STATS_WORKERS
+) -> DatasetProfile:
+    """Sketches `df` in row chunks on a thread pool and merges the partials."""
+    if len(df) <= chunk_rows or n_jobs <= 1:
+        return DatasetProfile(df.columns).update(df)
+
+    chunks = [df.iloc[i:i + chunk_rows] for i in range(0, len(df), chunk_rows)]
+    with ThreadPoolExecutor(max_workers=n_jobs, thread_name_prefix=scoped_thread_name("stats")) as pool:
+        partials = list(pool.map(lambda c: DatasetProfile(df.columns).update(c), chunks))
+
+    profile = partials[0]
+    for partial in partials[1:]:
+        profile.merge(partial)
+    return profile
+
+
+def profile_csv(file_path: str, chunk_rows: int = STATS_CHUNK_ROWS) -> DatasetProfile:
+    """Streams a CSV in chunks so the whole file never has to be in memory."""
+    profile = None
+    for chunk in pd.read_csv(file_path, chunksize=chunk_rows):
+        if profile is None:
+            profile = DatasetProfile(chunk.columns)
+        profile.update(chunk)
+    return profile
+
+
+# =====================================================
+# REGISTRY (in-memory, like dataset_db)
+# =====================================================
+_profiles = {}
+
+
+def register_profile(dataset_id: str, profile: DatasetProfile):
+    _profiles[dataset_id] = profile
+
+
+def get_profile(dataset_id: str) -> DatasetProfile | None:
+    return _profiles.get(dataset_id)
@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from app.core.config import (
+    LOAD_OPTIMIZE_DTYPES,
+    LOAD_CATEGORY_MAX_RATIO,
+    LOAD_ALLOW_FLOAT32,
+    LOAD_ARROW_STRINGS,
+    STATS_CHUNK_ROWS,
+)
+
+try:
+    import pyarrow  # noqa: F401
+    _ARROW_AVAILABLE = True
+except Exception:
+    _ARROW_AVAILABLE = False
+
+
+# Dtype selectors shared by the services, so downcast columns
+# (int8, float32, category, string[pyarrow]) are never silently dropped
+NUMERIC_DTYPES = ["number"]
+CATEGORICAL_DTYPES = ["object", "category", "bool", "string"]
+
+
+# =====================================================
+# COLUMN-LEVEL CONVERSIONS
+# =====================================================
+def downcast_numeric(s: pd.Series, allow_float32: bool = LOAD_ALLOW_FLOAT32) -> pd.Series:
+    """Smallest integer width that holds every value; float32 only if lossless."""
+    if pd.api.types.is_bool_dtype(s):
+        return s
+
+    if pd.api.types.is_integer_dtype(s):
+        return pd.to_numeric(s, downcast="integer")
+
+    if pd.api.types.is_float_dtype(s) and s.dtype != "float32":
+        narrow = s.astype("float32")
+        if allow_float32 or np.array_equal(
+            narrow.to_numpy(dtype="float64"), s.to_numpy(dtype="float64"), equal_nan=True
+        ):
+            return narrow
+
+    return s
+
+
+def is_low_cardinality(s: pd.Series, max_ratio: float = LOAD_CATEGORY_MAX_RATIO) -> bool:
+    return s.nunique(dropna=True) <= max_ratio * max(1, len(s))
+
+
+def optimize_dtypes(
+    df: pd.DataFrame,
+    category_cols: list[str] | None = None,
+    max_ratio: float = LOAD_CATEGORY_MAX_RATIO,
+    arrow_strings: bool = LOAD_ARROW_STRINGS,
+) -> pd.DataFrame:
+    """
+    Shrinks a DataFrame in place of the int64 / float64 / object defaults.
+
+    `category_cols` fixes which string columns become `category`; when it
+    is None the choice is made from this frame's cardinality.
+    """
+    for col in df.columns:
+        s = df[col]
+
+        if pd.api.types.is_numeric_dtype(s):
+            df[col] = downcast_numeric(s)
+
+        elif s.dtype == object:
+            to_category = (
+                col in category_cols if category_cols is not None
+                else is_low_cardinality(s, max_ratio)
+            )
+            if to_category:
+                df[col] = s.astype("category")
+            elif arrow_strings and _ARROW_AVAILABLE:
+                df[col] = s.astype("string[pyarrow]")
+
+    return df
+
+
+# =====================================================
+# LOAD
+# =====================================================
+def _concat_chunks(chunks, category_cols):
+    # Give every chunk the same categories so concat keeps `category`
+    for col in category_cols:
+        categories = union_categoricals(
+            [c[col] for c in chunks if c[col].dtype == "category"],
+            ignore_order=True
+        ).categories
+        for c in chunks:
+            c[col] = c[col].astype(pd.CategoricalDtype(categories))
+
+    df = pd.concat(chunks, ignore_index=True)
+
+    # Chunks may have been downcast to different widths
+    for col in df.columns:
+        if pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = downcast_numeric(df[col])
+    return df
+
+
+def read_csv_optimized(file_path: str,
+                       chunk_rows: int = STATS_CHUNK_ROWS,
+                       optimize: bool = LOAD_OPTIMIZE_DTYPES):
+    """
+    Loads a CSV with narrow dtypes.
+
+    The file is parsed in chunks and each chunk is shrunk before the next
+    one is read, so the wide int64 / object representation of the whole
+    file never exists at once. Which string columns become categorical is
+    decided on the first chunk and applied to all of them.
+
+    Returns the DataFrame and a report of the conversions.
+    """
+    if not optimize:
+        df = pd.read_csv(file_path)
+        return df, {"optimized": False, "memory_bytes": int(df.memory_usage(deep=True).sum())}
+
+    chunks = []
+    category_cols = None
+    original_dtypes = None
+
+    for chunk in pd.read_csv(file_path, chunksize=chunk_rows):
+        if category_cols is None:
+            original_dtypes = chunk.dtypes.astype(str).to_dict()
+            category_cols = [
+                col for col in chunk.columns
+                if chunk[col].dtype == object and is_low_cardinality(chunk[col])
+            ]
+        chunks.append(optimize_dtypes(chunk, category_cols=category_cols))
+
+    if not chunks:
+        df = pd.read_csv(file_path)
+        return df, {"optimized": False, "memory_bytes": int(df.memory_usage(deep=True).sum())}
+
+    df = chunks[0] if len(chunks) == 1 else _concat_chunks(chunks, category_cols)
+    del chunks
+
+    report = {
+        "optimized": True,
+        "memory_bytes": int(df.memory_usage(deep=True).sum()),
+        "converted_columns": {
+            col: {"from": original_dtypes.get(col), "to": str(dtype)}
+            for col, dtype in df.dtypes.items()
+            if original_dtypes.get(col) != str(dtype)
+        },
+    }
+    return df, report
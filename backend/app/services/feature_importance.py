@@ -0,0 +1,231 @@
+import time
+import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.preprocessing import OneHotEncoder
+from app.core.config import (
+    FEATURE_IMPORTANCE_SAMPLE_ROWS,
+    FEATURE_IMPORTANCE_REPEATS,
+    FEATURE_IMPORTANCE_N_JOBS,
+    FEATURE_IMPORTANCE_MIN_ROWS,
+)
+
+
+# =====================================================
+# ONE-HOT COLUMNS -> SOURCE COLUMNS
+# =====================================================
+def _step_outputs(step, inputs):
+    """Source column of each output of one fitted pipeline step."""
+    if isinstance(step, OneHotEncoder):
+        drop_idx = getattr(step, "drop_idx_", None)
+        sources = []
+        for i, (col, categories) in enumerate(zip(inputs, step.categories_)):
+            n = len(categories) - (drop_idx is not None and drop_idx[i] is not None)
+            sources.extend([col] * n)
+        return sources
+    if hasattr(step, "get_feature_names_out"):
+        # e.g. SimpleImputer drops all-missing columns
+        return list(step.get_feature_names_out(inputs))
+    return list(inputs)
+
+
+def output_sources(transformer, n_outputs: int, feature_names=None):
+    """
+    Source (raw) column of every column of the transformed matrix, read
+    from a fitted ColumnTransformer: one-hot outputs map back to the
+    categorical column they encode. Without a transformer the matrix is
+    model-ready and each column is its own source.
+    """
+    if transformer is None:
+        names = list(feature_names) if feature_names is not None else []
+        return names if len(names) == n_outputs else [f"x{i}" for i in range(n_outputs)]
+
+    sources = ["unknown"] * n_outputs
+    for name, pipe, columns in transformer.transformers_:
+        if name == "remainder" or isinstance(pipe, str):
+            continue
+        outputs = list(columns)
+        for _, step in getattr(pipe, "steps", [(name, pipe)]):
+            outputs = _step_outputs(step, outputs)
+
+        block = transformer.output_indices_[name]
+        if len(outputs) == block.stop - block.start:
+            sources[block] = outputs
+    return sources
+
+
+def _by_source(values, sources):
+    totals = {}
+    for value, source in zip(values, sources):
+        totals[source] = totals.get(source, 0.0) + float(value)
+    return totals
+
+
+def _normalize(scores: dict):
+    total = sum(max(v, 0.0) for v in scores.values())
+    if total <= 0:
+        return {}
+    shares = {col: round(max(v, 0.0) / total, 6) for col, v in scores.items()}
+    return dict(sorted(shares.items(), key=lambda kv: -kv[1]))
+
+
+# =====================================================
+# MODEL-SPECIFIC IMPORTANCE (no extra training)
+# =====================================================
+def model_importance(model, sources):
+    """
+    Impurity importance (trees) or |coefficient| (linear models, inputs
+    are standard-scaled / one-hot) of a fitted model, summed per source
+    column and normalised to 1. None for models exposing neither.
+    """
+    if hasattr(model, "feature_importances_"):
+        kind, values = "impurity", np.asarray(model.feature_importances_)
+    elif hasattr(model, "coef_"):
+        coef = np.abs(np.atleast_2d(model.coef_))
+        kind, values = "coefficients", coef.mean(axis=0)  # mean over classes
+    else:
+        return None
+    if values.shape[0] != len(sources):
+        return None
+    return {"type": kind, "scores": _normalize(_by_source(values, sources))}
+
+
+# =====================================================
+# PERMUTATION IMPORTANCE (holdout, row-sampled)
+# =====================================================
+def _permute_group(model, X, y, columns, scorer, baseline, repeats, seed, deadline):
+    """Score drops when `columns` (one source column's outputs) are shuffled together."""
+    X = X.copy()
+    original = X[:, columns].copy()
+    rng = np.random.default_rng(seed)
+    drops = []
+    for _ in range(repeats):
+        X[:, columns] = original[rng.permutation(len(X))]
+        drops.append(baseline - scorer(y, model.predict(X)))
+        if time.perf_counter() > deadline:
+            break
+    return drops
+
+
+def permutation_importance(model, X_test, y_test, sources, scorer, budget_seconds: float,
+                           sample_rows: int = FEATURE_IMPORTANCE_SAMPLE_ROWS,
+                           repeats: int = FEATURE_IMPORTANCE_REPEATS,
+                           n_jobs: int = FEATURE_IMPORTANCE_N_JOBS):
+    """
+    Mean / std drop of the holdout score when each source column is
+    shuffled (all of its one-hot outputs jointly), on at most
+    `sample_rows` holdout rows, one parallel task per source column.
+
+    One baseline prediction times the model; repeats and then rows are cut
+    so the planned work fits `budget_seconds`, and tasks stop repeating
+    once the deadline passes. Returns {"skipped": reason} when even one
+    repeat on FEATURE_IMPORTANCE_MIN_ROWS rows would not fit.
+    """
+    start = time.perf_counter()
+    y_test = np.asarray(y_test)
+    rng = np.random.default_rng(42)
+    rows = rng.choice(len(y_test), size=min(sample_rows, len(y_test)), replace=False)
+    X = np.asarray(X_test[np.sort(rows)], dtype="float64")
+    y = y_test[np.sort(rows)]
+
+    baseline = float(scorer(y, model.predict(X)))
+    seconds_per_predict = max(time.perf_counter() - start, 1e-4)
+
+    groups = {}
+    for i, source in enumerate(sources):
+        groups.setdefault(source, []).append(i)
+    workers = min(effective_n_jobs(n_jobs), len(groups))
+    rounds = -(-len(groups) // workers)  # tasks run in `rounds` waves
+
+    # Plan: predictions scale with rows; shrink repeats first, then rows
+    def planned(n_rows, n_repeats):
+        return seconds_per_predict * n_rows / len(y) * n_repeats * rounds
+
+    while repeats > 1 and planned(len(y), repeats) > budget_seconds:
+        repeats -= 1
+    if planned(len(y), repeats) > budget_seconds:
+        keep = int(len(y) * budget_seconds / planned(len(y), repeats))
+        if keep < min(FEATURE_IMPORTANCE_MIN_ROWS, len(y)):
+            return {"skipped": f"over the {budget_seconds:.2f}s budget"}
+        X, y = X[:keep], y[:keep]
+        baseline = float(scorer(y, model.predict(X)))
+
+    deadline = start + budget_seconds
+    names = list(groups)
+    drops = Parallel(n_jobs=workers, prefer="threads")(
+        delayed(_permute_group)(model, X, y, groups[name], scorer, baseline, repeats, seed, deadline)
+        for seed, name in enumerate(names)
+    )
+    return {
+        "baseline_score": round(baseline, 6),
+        "rows": int(len(y)),
+        "repeats": int(repeats),
+        "seconds": round(time.perf_counter() - start, 3),
+        "scores": {
+            name: {"mean": round(float(np.mean(d)), 6), "std": round(float(np.std(d)), 6)}
+            for name, d in zip(names, drops)
+        },
+    }
+
+
+# =====================================================
+# COMBINED
+# =====================================================
+def compute_feature_importance(models: dict, best_model: str, X_test, y_test, transformer,
+                               scorer, budget_seconds: float, feature_names=None):
+    """
+    Per-source-column importance from the already fitted holdout models:
+    impurity / coefficient shares of every model, plus permutation
+    importance of `best_model` on the holdout within `budget_seconds`.
+
+    "scores" (normalised to 1) is the permutation importance when it ran
+    and is informative, otherwise the average of the model shares.
+    """
+    sources = output_sources(transformer, X_test.shape[1], feature_names)
+
+    by_model = {}
+    for name, model in models.items():
+        importance = model_importance(model, sources)
+        if importance is not None:
+            by_model[name] = importance
+
+    permutation = permutation_importance(
+        models[best_model], X_test, y_test, sources, scorer, budget_seconds
+    )
+    permutation["model"] = best_model
+
+    scores = _normalize({
+        col: s["mean"] for col, s in permutation.get("scores", {}).items()
+    })
+    method = "permutation"
+    if not scores and by_model:
+        columns = {col for m in by_model.values() for col in m["scores"]}
+        scores = _normalize({
+            col: np.mean([m["scores"].get(col, 0.0) for m in by_model.values()])
+            for col in columns
+        })
+        method = "model_average"
+
+    return {
+        "method": method,
+        "scores": scores,
+        "by_model": by_model,
+        "permutation": permutation,
+        "budget_seconds": round(budget_seconds, 3),
+    }
+
+
+def importance_level(scores: dict, column: str):
+    """
+    high / medium / low by cumulative share: the columns that together
+    explain the first 50% of the importance are "high", up to 85% "medium".
+    """
+    if column not in scores:
+        return "low" if scores else "n/a"
+    cumulative = 0.0
+    for col, share in scores.items():  # sorted, most important first
+        if col == column:
+            if cumulative < 0.5:
+                return "high"
+            return "medium" if cumulative < 0.85 else "low"
+        cumulative += share
+    return "low"
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+from app.services.correlation import strong_correlations
+from app.services.redundancy import column_hashes
+from app.services.target_detection import column_role
+from app.services.dtype_optimizer import NUMERIC_DTYPES
+from app.services.preprocessing import feature_frame
+from app.core.config import (
+    PRUNE_MAX_CATEGORIES,
+    PRUNE_HASH_BUCKETS,
+    PRUNE_CORR_THRESHOLD,
+)
+
+
+# =====================================================
+# PLAN
+# =====================================================
+def _correlated_drops(df: pd.DataFrame, columns, threshold: float, missing: pd.Series):
+    """
+    Numeric columns to drop as {column: (kept column, |corr|)}. Columns
+    are visited most complete first, then in column order; one is dropped
+    only when its own |corr| with an already kept column is >= threshold,
+    so in a chain a ~ b ~ c with |corr(a, c)| below it, c is kept.
+    """
+    linked = {}
+    for pair in strong_correlations(df, columns, threshold=threshold, top_k=None):
+        a, b, r = pair["feature_1"], pair["feature_2"], pair["correlation"]
+        linked.setdefault(a, {})[b] = r
+        linked.setdefault(b, {})[a] = r
+
+    kept, drops = set(), {}
+    for col in sorted(linked, key=lambda c: (missing[c], columns.index(c))):
+        partners = [(r, other) for other, r in linked[col].items() if other in kept]
+        if partners:
+            r, other = max(partners)
+            drops[col] = (other, r)
+        else:
+            kept.add(col)
+    return drops
+
+
+def plan_pruning(df: pd.DataFrame, target_column, redundancy: dict, prune: bool = True,
+                 drop_redundant: bool = False, max_categories: int = PRUNE_MAX_CATEGORIES,
+                 buckets: int = PRUNE_HASH_BUCKETS, corr_threshold: float = PRUNE_CORR_THRESHOLD):
+    """
+    Which feature columns to drop or hash before preprocessing, as
+    {"columns": {column: {"action": "drop" | "hash", "reason": ...}}, ...}.
+
+    With `prune`: constant and duplicate columns (from the redundancy
+    report), identifier and free-text columns are dropped, categoricals
+    with more than `max_categories` levels are hashed into `buckets`
+    levels, and a numeric column is dropped when its |corr| with a more
+    complete, kept numeric column reaches `corr_threshold`.
+    `drop_redundant` (DROP_REDUNDANT_COLUMNS) also drops every column the
+    redundancy report marks droppable, target copies included.
+    """
+    features = [c for c in df.columns if c != target_column]
+    unique_counts = redundancy.get("unique_counts", {})
+    plan = {}
+
+    if drop_redundant:
+        for col, reason in redundancy.get("droppable_columns", {}).items():
+            plan[col] = {"action": "drop", "reason": reason}
+
+    if prune:
+        for col in redundancy.get("constant_columns", []):
+            plan.setdefault(col, {"action": "drop", "reason": "constant"})
+        for dup in redundancy.get("duplicate_columns", []):
+            if dup["kind"] != "near":
+                plan.setdefault(dup["column"], {
+                    "action": "drop",
+                    "reason": f"{dup['kind']} duplicate of {dup['duplicate_of']}"
+                })
+
+        numeric = set(df.select_dtypes(include=NUMERIC_DTYPES).columns)
+        for col in features:
+            if col in plan:
+                continue
+            role = column_role(df[col], col, unique_counts.get(col))
+            if role in ("identifier", "free_text"):
+                plan[col] = {"action": "drop", "reason": role.replace("_", " ")}
+            elif col not in numeric and unique_counts.get(col, 0) > max_categories:
+                plan[col] = {
+                    "action": "hash",
+                    "reason": f"{unique_counts[col]} categories hashed into {buckets} buckets"
+                }
+
+        remaining = [c for c in features if c in numeric and c not in plan]
+        missing = df[remaining].isna().sum()
+        drops = _correlated_drops(df, remaining, corr_threshold, missing)
+        for col, (keep, r) in drops.items():
+            plan[col] = {
+                "action": "drop",
+                "reason": f"correlated with {keep} (|r| = {r:g} >= {corr_threshold:g})",
+                "correlated_with": keep,
+                "correlation": r,
+            }
+
+    dropped = [c for c, p in plan.items() if p["action"] == "drop" and c in features]
+    return {
+        "columns": {c: plan[c] for c in features if c in plan},
+        "hash_buckets": buckets,
+        "features_before": len(features),
+        "features_after": len(features) - len(dropped),
+    }
+
+
+# =====================================================
+# APPLY
+# =====================================================
+def hash_buckets(series: pd.Series, buckets: int) -> pd.Series:
+    """Stable bucket label per value (same value -> same bucket); NaN stays NaN."""
+    labels = np.array([f"bucket_{i}" for i in range(buckets)], dtype=object)
+    values = pd.Series(labels[column_hashes(series) % np.uint64(buckets)], index=series.index)
+    return values.where(series.notna()).astype("category")
+
+
+def apply_pruning(df: pd.DataFrame, pruning: dict) -> pd.DataFrame:
+    """`df` with the planned columns dropped or hashed (kept columns are not copied)."""
+    columns = (pruning or {}).get("columns", {})
+    if not columns:
+        return df
+    drop = {c for c, p in columns.items() if p["action"] == "drop"}
+    df = feature_frame(df, [c for c in df.columns if c not in drop])
+    for col, p in columns.items():
+        if p["action"] == "hash" and col in df.columns:
+            df[col] = hash_buckets(df[col], pruning["hash_buckets"])
+    return df
@@ -0,0 +1,379 @@
+import importlib
+import math
+import multiprocessing
+import os
+import pickle
+import signal
+import sys
+import threading
+import time
+import traceback
+from contextlib import nullcontext
+from app.core.config import (
+    JOB_ISOLATION,
+    JOB_MAX_MEMORY_MB,
+    JOB_MAX_CPU_SECONDS,
+    JOB_TIMEOUT_SECONDS,
+    JOB_MAX_THREADS,
+    JOB_SAMPLE_SECONDS,
+)
+from app.core.profiling import profile_request, PROFILE_KINDS
+
+# (numpy / pandas are not imported here: a worker process must set its
+# thread caps before anything loads BLAS)
+try:
+    import resource
+    _RESOURCE_AVAILABLE = True
+except ImportError:  # not on Windows
+    _RESOURCE_AVAILABLE = False
+
+ISOLATION_MODES = ("thread", "process")
+MB = 2**20
+
+# Read by OpenBLAS / MKL / OpenMP when they load, and by joblib's
+# cpu_count() (so n_jobs=-1 means JOB_MAX_THREADS)
+_THREAD_ENV = (
+    "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS", "LOKY_MAX_CPU_COUNT",
+)
+# RLIMIT_DATA caps address space, not resident memory: thread stacks and
+# malloc arenas reserve far more than they touch. The resident limit is
+# enforced by the supervisor; the rlimit only stops a single runaway
+# allocation before the next poll
+_RLIMIT_DATA_HEADROOM = 2
+# Seconds between the SIGXCPU of the soft CPU limit and the SIGKILL of the hard one
+_CPU_GRACE_SECONDS = 5
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+class JobFailed(RuntimeError):
+    """A job whose worker failed without a transportable exception; `job` holds its accounting."""
+
+    def __init__(self, message: str, job: dict):
+        super().__init__(message)
+        self.job = job
+
+
+class JobLimitExceeded(JobFailed):
+    """A job stopped for exceeding JOB_MAX_MEMORY_MB, JOB_MAX_CPU_SECONDS or JOB_TIMEOUT_SECONDS."""
+
+
+# =====================================================
+# RESOURCE USAGE (/proc, Linux)
+# =====================================================
+def read_usage(pid: int):
+    """CPU seconds, RSS, anonymous RSS and thread count of a live process, or None."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/status") as f:
+            status = dict(line.split(":", 1) for line in f if ":" in line)
+    except (OSError, IndexError):
+        return None
+
+    def mb(key):
+        return int(status.get(key, "0 kB").split()[0]) / 1024
+
+    return {
+        "cpu_seconds": (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS,
+        "rss_mb": mb("VmRSS"),
+        # Heap / array memory; file-backed pages (e.g. memory-mapped fold
+        # matrices) can be dropped by the kernel and do not count
+        "anon_mb": mb("RssAnon"),
+        "threads": int(status.get("Threads", "0").strip() or 0),
+    }
+
+
+class _Peaks:
+    def __init__(self):
+        self.rss_mb = 0.0
+        self.anon_mb = 0.0
+        self.threads = 0
+        self.cpu_seconds = 0.0
+
+    def update(self, sample):
+        if sample is None:
+            return
+        self.rss_mb = max(self.rss_mb, sample["rss_mb"])
+        self.anon_mb = max(self.anon_mb, sample["anon_mb"])
+        self.threads = max(self.threads, sample["threads"])
+        self.cpu_seconds = max(self.cpu_seconds, sample["cpu_seconds"])
+
+
+def _own_usage():
+    """CPU seconds and peak RSS (MB) of this process so far."""
+    if not _RESOURCE_AVAILABLE:
+        return {"cpu_seconds": time.process_time(), "peak_rss_mb": None}
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return {"cpu_seconds": usage.ru_utime + usage.ru_stime, "peak_rss_mb": usage.ru_maxrss / 1024}
+
+
+def _limits():
+    return {
+        "memory_mb": JOB_MAX_MEMORY_MB or None,
+        "cpu_seconds": JOB_MAX_CPU_SECONDS or None,
+        "timeout_seconds": JOB_TIMEOUT_SECONDS or None,
+        "threads": JOB_MAX_THREADS or None,
+    }
+
+
+def _profiled(dataset_id: str, kind: str, profile: bool):
+    if kind in PROFILE_KINDS:
+        return profile_request(dataset_id, kind, profile)
+    return nullcontext({})
+
+
+def _resolve(target: str):
+    module, name = target.split(":")
+    return getattr(importlib.import_module(module), name)
+
+
+# =====================================================
+# DATASET STATE (profile + cached results)
+# =====================================================
+# A worker process has its own (empty) dataset cache and profile
+# registry: the API process hands over what it has for the dataset and
+# takes back what the job produced, so re-targets and appends keep
+# working. The loaded frame stays behind (re-read when needed).
+def _collect_state(dataset_id: str):
+    if "app.services.dataset_cache" not in sys.modules:
+        return {}
+    from app.services.dataset_cache import get_cached_results
+    from app.services.dataset_profile import get_profile
+    return {"profile": get_profile(dataset_id), "results": get_cached_results(dataset_id)}
+
+
+def _restore_state(dataset_id: str, state: dict):
+    if state.get("profile") is not None:
+        from app.services.dataset_profile import register_profile
+        register_profile(dataset_id, state["profile"])
+    if state.get("results") is not None:
+        from app.services.dataset_cache import cache_dataset
+        cache_dataset(dataset_id, None, state["results"])
+
+
+# =====================================================
+# RUN
+# =====================================================
+def run_job(kind: str, target: str, dataset_id: str, kwargs: dict | None = None,
+            profile: bool = False, isolation: str | None = None):
+    """
+    Runs `target` ("module:function") with `kwargs` as job `kind` of a
+    dataset and returns (result, job), where job is its accounting:
+    wall / CPU seconds, peak RSS, peak thread count, limits and status.
+
+    isolation (default JOB_ISOLATION) "thread" runs it here (nothing enforced; CPU, RSS and
+    threads are those of the whole process). isolation="process" runs it
+    in a spawned worker with JOB_* limits; a job over a limit raises
+    JobLimitExceeded. Either way a failing job's exception carries the
+    accounting as `.job`. A `timings` dict in kwargs is filled as usual.
+    """
+    isolation = isolation or JOB_ISOLATION
+    if isolation not in ISOLATION_MODES:
+        raise ValueError(
+            f"Unknown job isolation '{isolation}'. Choose one of: {', '.join(ISOLATION_MODES)}"
+        )
+    kwargs = kwargs or {}
+    if isolation == "process":
+        return _run_process(kind, target, dataset_id, kwargs, profile)
+    return _run_inline(kind, target, dataset_id, kwargs, profile)
+
+
+def _run_inline(kind, target, dataset_id, kwargs, profile):
+    peaks, stop, pid = _Peaks(), threading.Event(), os.getpid()
+
+    def monitor():
+        while True:
+            peaks.update(read_usage(pid))
+            if stop.wait(JOB_SAMPLE_SECONDS):
+                break
+
+    job = {"kind": kind, "isolation": "thread", "scope": "process", "status": "running"}
+    thread = threading.Thread(target=monitor, name="job-monitor", daemon=True)
+    thread.start()
+    before = _own_usage()
+    start = time.perf_counter()
+    try:
+        with _profiled(dataset_id, kind, profile) as profile_info:
+            result = _resolve(target)(**kwargs)
+        job["status"] = "completed"
+        return result, job
+    except Exception as e:
+        job["status"] = "failed"
+        job["error"] = f"{type(e).__name__}: {e}"
+        e.job = job
+        raise
+    finally:
+        stop.set()
+        thread.join()
+        after = _own_usage()
+        job.update(
+            wall_seconds=round(time.perf_counter() - start, 3),
+            cpu_seconds=round(after["cpu_seconds"] - before["cpu_seconds"], 3),
+            peak_rss_mb=round(peaks.rss_mb or after["peak_rss_mb"] or 0, 1),
+            max_threads=peaks.threads or threading.active_count(),
+            limits={},
+        )
+        if profile_info:
+            job["profile"] = profile_info
+
+
+def _run_process(kind, target, dataset_id, kwargs, profile):
+    limits = _limits()
+    ctx = multiprocessing.get_context("spawn")
+    receiver, sender = ctx.Pipe(duplex=False)
+    process = ctx.Process(
+        target=_worker_main,
+        args=(sender, kind, target, dataset_id, kwargs, profile, limits, _collect_state(dataset_id)),
+        name=f"job-{kind}",
+        daemon=True,
+    )
+
+    peaks, message, reason = _Peaks(), None, None
+    start = time.perf_counter()
+    process.start()
+    sender.close()
+    try:
+        while True:
+            if receiver.poll(JOB_SAMPLE_SECONDS):
+                try:
+                    message = receiver.recv()
+                except EOFError:  # died without reporting
+                    pass
+                break
+            peaks.update(read_usage(process.pid))
+            elapsed = time.perf_counter() - start
+            if limits["timeout_seconds"] and elapsed > limits["timeout_seconds"]:
+                reason = (f"wall time limit exceeded: still running after {elapsed:.0f}s "
+                          f"(JOB_TIMEOUT_SECONDS={limits['timeout_seconds']:g})")
+                break
+            if limits["memory_mb"] and peaks.anon_mb > limits["memory_mb"]:
+                reason = (f"memory limit exceeded: {peaks.anon_mb:.0f} MB resident "
+                          f"(JOB_MAX_MEMORY_MB={limits['memory_mb']:g})")
+                break
+    finally:
+        if message is None:
+            process.kill()
+        process.join()
+        receiver.close()
+
+    job = {
+        "kind": kind,
+        "isolation": "process",
+        "scope": "job",
+        "wall_seconds": round(time.perf_counter() - start, 3),
+        "cpu_seconds": round(peaks.cpu_seconds, 3),
+        "peak_rss_mb": round(peaks.rss_mb, 1),
+        "max_threads": peaks.threads,
+        "limits": limits,
+        "exit_code": process.exitcode,
+    }
+
+    if message is None:
+        if reason is None:
+            reason = _exit_reason(process.exitcode, peaks, limits)
+        job["status"] = "limit_exceeded" if "limit" in reason else "failed"
+        job["error"] = reason
+        error_type = JobLimitExceeded if job["status"] == "limit_exceeded" else JobFailed
+        raise error_type(f"{kind} job {reason}", job)
+
+    status, payload, details, extras = message
+    usage = extras["usage"]
+    job["cpu_seconds"] = round(max(peaks.cpu_seconds, usage["cpu_seconds"]), 3)
+    job["peak_rss_mb"] = round(max(peaks.rss_mb, usage["peak_rss_mb"] or 0), 1)
+    if extras.get("profile"):
+        job["profile"] = extras["profile"]
+    if extras.get("timings") is not None and kwargs.get("timings") is not None:
+        kwargs["timings"].update(extras["timings"])
+
+    if status == "completed":
+        _restore_state(dataset_id, extras.get("state") or {})
+        job["status"] = "completed"
+        return payload, job
+
+    job["error"] = details.strip().splitlines()[-1] if details else "unknown error"
+    if isinstance(payload, MemoryError) and limits["memory_mb"]:
+        job["status"] = "limit_exceeded"
+        job["error"] = (f"memory limit exceeded: allocation failed at "
+                        f"{job['peak_rss_mb']:.0f} MB peak (JOB_MAX_MEMORY_MB={limits['memory_mb']})")
+        raise JobLimitExceeded(f"{kind} job {job['error']}", job)
+    job["status"] = "failed"
+    if isinstance(payload, Exception):
+        payload.job = job
+        raise payload
+    raise JobFailed(f"{kind} job failed: {job['error']}", job)
+
+
+def _exit_reason(exitcode, peaks: _Peaks, limits: dict) -> str:
+    if exitcode is not None and exitcode < 0:
+        sig = -exitcode
+        if sig == getattr(signal, "SIGXCPU", None) or (
+            sig == signal.SIGKILL and limits["cpu_seconds"]
+            and peaks.cpu_seconds >= limits["cpu_seconds"]
+        ):
+            return (f"CPU limit exceeded: {peaks.cpu_seconds:.0f}s of CPU time "
+                    f"(JOB_MAX_CPU_SECONDS={limits['cpu_seconds']:g})")
+        try:
+            name = signal.Signals(sig).name
+        except ValueError:
+            name = f"signal {sig}"
+        hint = " (the kernel OOM killer?)" if sig == signal.SIGKILL else ""
+        return f"worker process was killed by {name}{hint} at {peaks.rss_mb:.0f} MB RSS"
+    return f"worker process exited with code {exitcode} without a result"
+
+
+# =====================================================
+# WORKER PROCESS
+# =====================================================
+def _apply_limits(limits: dict):
+    """Thread caps and rlimits; runs before the job imports numpy."""
+    threads = limits["threads"]
+    if threads:
+        for var in _THREAD_ENV:
+            os.environ[var] = str(threads)
+        from app.core import config
+        config.EMBEDDING_THREADS = threads
+    if not _RESOURCE_AVAILABLE:
+        return
+    if limits["memory_mb"]:
+        data = int(limits["memory_mb"] * MB * _RLIMIT_DATA_HEADROOM)
+        resource.setrlimit(resource.RLIMIT_DATA, (data, data))
+    if limits["cpu_seconds"]:
+        soft = math.ceil(limits["cpu_seconds"])
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, soft + _CPU_GRACE_SECONDS))
+
+
+def _portable(error: BaseException):
+    """The exception itself if it survives pickling, else None."""
+    try:
+        pickle.loads(pickle.dumps(error))
+        return error
+    except Exception:
+        return None
+
+
+def _worker_main(conn, kind, target, dataset_id, kwargs, profile, limits, state):
+    _apply_limits(limits)
+    profile_info, state_out = {}, None
+    try:
+        _restore_state(dataset_id, state)
+        func = _resolve(target)
+        with _profiled(dataset_id, kind, profile) as profile_info:
+            result = func(**kwargs)
+        state_out = _collect_state(dataset_id)
+        message = ("completed", result, None)
+    except BaseException as e:
+        message = ("failed", _portable(e), traceback.format_exc())
+
+    extras = {
+        "usage": _own_usage(),
+        "timings": kwargs.get("timings"),
+        "profile": profile_info,
+        "state": state_out,
+    }
+    try:
+        conn.send(message + (extras,))
+    except Exception as e:  # e.g. an unpicklable result
+        conn.send(("failed", None, f"could not return the result: {e}", extras))
+    finally:
+        conn.close()
@@ -0,0 +1,314 @@
+import asyncio
+import os
+import httpx
+from app.core import config
+
+
+class LLMProviderError(RuntimeError):
+    """The LLM backend answered with an error or an unusable response."""
+
+
+# =====================================================
+# SHARED HTTP CLIENT (pooled, keep-alive)
+# =====================================================
+_http_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Returns the process-wide pooled AsyncClient, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=config.HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(config.LLM_TIMEOUT_SECONDS, connect=10.0),
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+
+
+# =====================================================
+# MICRO-BATCHING
+# =====================================================
+class MicroBatcher:
+    """
+    Collects prompts submitted concurrently and sends them upstream as one
+    call once `max_size` prompts are queued or `max_wait_ms` has elapsed.
+    """
+
+    def __init__(self, send_batch, max_size: int, max_wait_ms: float):
+        self._send_batch = send_batch
+        self.max_size = max(1, max_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._pending = []
+        self._timer = None
+        # The loop only keeps weak references to tasks; in-flight batches
+        # are held here until they finish
+        self._tasks = set()
+
+    async def submit(self, prompt: str) -> str:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((prompt, future))
+
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch):
+        prompts = [prompt for prompt, _ in batch]
+        try:
+            answers = await self._send_batch(prompts)
+            if len(answers) != len(batch):
+                # Answers can't be matched to prompts; fail the whole batch
+                # rather than leave futures pending forever
+                raise LLMProviderError(
+                    f"Batch backend returned {len(answers)} answers for {len(batch)} prompts"
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), answer in zip(batch, answers):
+            if not future.done():
+                future.set_result(answer)
+
+
+# =====================================================
+# PROVIDERS
+# =====================================================
+class LLMProvider:
+    """
+    Base class for chat backends.
+
+    Every call goes through a per-backend semaphore and an overall timeout.
+    Backends that accept several prompts per request set
+    `supports_batching = True` and implement `_complete_batch`.
+    """
+
+    name = "base"
+    default_model = None
+    default_temperature = 0.7
+    supports_batching = False
+
+    def __init__(
+        self,
+        model: str | None = None,
+        temperature: float | None = None,
+        timeout: float = config.LLM_TIMEOUT_SECONDS,
+        max_concurrency: int = config.LLM_MAX_CONCURRENCY,
+        batching: bool = config.LLM_BATCHING,
+    ):
+        self.model = model or self.default_model
+        self.temperature = (
+            self.default_temperature if temperature is None else temperature
+        )
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._batcher = None
+        if batching and self.supports_batching:
+            self._batcher = MicroBatcher(
+                self._limited_batch,
+                max_size=config.LLM_BATCH_MAX_SIZE,
+                max_wait_ms=config.LLM_BATCH_MAX_WAIT_MS,
+            )
+
+    async def generate(self, prompt: str) -> str:
+        if self._batcher is not None:
+            return await self._batcher.submit(prompt)
+
+        async with self._semaphore:
+            return await asyncio.wait_for(self._complete(prompt), self.timeout)
+
+    async def _limited_batch(self, prompts: list[str]) -> list[str]:
+        async with self._semaphore:
+            return await asyncio.wait_for(
+                self._complete_batch(prompts), self.timeout
+            )
+
+    async def _complete(self, prompt: str) -> str:
+        raise NotImplementedError
+
+    async def _complete_batch(self, prompts: list[str]) -> list[str]:
+        raise NotImplementedError
+
+
+class OllamaProvider(LLMProvider):
+    name = "ollama"
+    default_model = "mistral"
+
+    def __init__(self, base_url: str = config.OLLAMA_BASE_URL, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip("/")
+
+    async def _complete(self, prompt: str) -> str:
+        resp = await get_http_client().post(
+            f"{self.base_url}/api/chat",
+            json={
+                "model": self.model,
+                "messages": [{"role": "user", "content": prompt}],
+                "stream": False,
+                "options": {"temperature": self.temperature},
+            },
+        )
+        resp.raise_for_status()
+        return resp.json()["message"]["content"]
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+    default_model = "gemini-2.0-flash"
+
+    def __init__(
+        self,
+        base_url: str = config.GEMINI_BASE_URL,
+        api_key: str | None = None,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key or os.getenv("API_KEY")
+
+    async def _complete(self, prompt: str) -> str:
+        resp = await get_http_client().post(
+            f"{self.base_url}/models/{self.model}:generateContent",
+            headers={"x-goog-api-key": self.api_key or ""},
+            json={
+                "contents": [{"parts": [{"text": prompt}]}],
+                "generationConfig": {"temperature": self.temperature},
+            },
+        )
+        resp.raise_for_status()
+        return resp.json()["candidates"][0]["content"]["parts"][0]["text"]
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """Any backend speaking the OpenAI `/chat/completions` protocol."""
+
+    name = "openai"
+    default_model = "gpt-4o-mini"
+    default_temperature = 0
+
+    def __init__(
+        self,
+        base_url: str = config.OPENAI_BASE_URL,
+        api_key: str | None = None,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+
+    def _headers(self):
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    async def _complete(self, prompt: str) -> str:
+        resp = await get_http_client().post(
+            f"{self.base_url}/chat/completions",
+            headers=self._headers(),
+            json={
+                "model": self.model,
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": self.temperature,
+            },
+        )
+        if resp.status_code != 200:
+            raise LLMProviderError(f"{resp.status_code}: {resp.text}")
+        return resp.json()["choices"][0]["message"]["content"]
+
+    async def _complete_batch(self, prompts: list[str]) -> list[str]:
+        # The legacy `/completions` route accepts a list of prompts and
+        # returns one choice per prompt, tagged with its index.
+        resp = await get_http_client().post(
+            f"{self.base_url}/completions",
+            headers=self._headers(),
+            json={
+                "model": self.model,
+                "prompt": prompts,
+                "temperature": self.temperature,
+            },
+        )
+        if resp.status_code != 200:
+            raise LLMProviderError(f"{resp.status_code}: {resp.text}")
+
+        choices = sorted(resp.json()["choices"], key=lambda c: c["index"])
+        return [c["text"] for c in choices]
+
+
+class OpenRouterProvider(OpenAICompatibleProvider):
+    name = "openrouter"
+    default_model = "openai/gpt-4o-mini"
+
+    def __init__(self, base_url: str = config.OPENROUTER_BASE_URL, **kwargs):
+        kwargs.setdefault("api_key", os.getenv("OPEN_ROUTER"))
+        super().__init__(base_url=base_url, **kwargs)
+
+
+class StubProvider(OpenAICompatibleProvider):
+    """Talks to the deterministic local server in `llm_stub_server`."""
+
+    name = "stub"
+    default_model = "stub"
+    supports_batching = True
+
+    def __init__(self, base_url: str = config.LLM_STUB_URL, **kwargs):
+        kwargs.setdefault("api_key", "stub")
+        super().__init__(base_url=base_url, **kwargs)
+
+
+PROVIDERS = {
+    cls.name: cls
+    for cls in (
+        OllamaProvider,
+        GeminiProvider,
+        OpenAICompatibleProvider,
+        OpenRouterProvider,
+        StubProvider,
+    )
+}
+
+_providers = {}
+
+
+def get_llm_provider(name: str | None = None) -> LLMProvider:
+    """Returns the (cached) provider configured by LLM_PROVIDER."""
+    name = (name or config.LLM_PROVIDER).lower()
+    if name not in PROVIDERS:
+        raise ValueError(
+            f"Unknown LLM provider '{name}'. Choose one of: {', '.join(PROVIDERS)}"
+        )
+
+    if name not in _providers:
+        _providers[name] = PROVIDERS[name](
+            model=config.LLM_MODEL,
+            temperature=config.LLM_TEMPERATURE,
+        )
+    return _providers[name]
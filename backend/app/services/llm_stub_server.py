@@ -0,0 +1,98 @@
+"""
+Deterministic OpenAI-compatible LLM stub.
+
+Lets throughput / latency benchmarks run without network access or a model:
+
+    LLM_STUB_LATENCY_MS=50 uvicorn app.services.llm_stub_server:app --port 8001
+    LLM_PROVIDER=stub uvicorn app.main:app
+
+The answer depends only on the prompt, so repeated runs are comparable.
+"""
+import asyncio
+import hashlib
+import os
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+STUB_LATENCY_MS = float(os.getenv("LLM_STUB_LATENCY_MS", "0"))
+
+app = FastAPI(title="LLM stub")
+
+
+class ChatMessage(BaseModel):
+    role: str
+    content: str
+
+
+class ChatCompletionRequest(BaseModel):
+    model: str = "stub"
+    messages: list[ChatMessage]
+    temperature: float | None = None
+
+
+class CompletionRequest(BaseModel):
+    model: str = "stub"
+    prompt: str | list[str]
+    temperature: float | None = None
+
+
+def stub_answer(prompt: str) -> str:
+    digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:12]
+    return f"[stub:{digest}] Received {len(prompt.split())} words."
+
+
+def _usage(prompts, answers):
+    prompt_tokens = sum(len(p.split()) for p in prompts)
+    completion_tokens = sum(len(a.split()) for a in answers)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", "latency_ms": STUB_LATENCY_MS}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: ChatCompletionRequest):
+    if STUB_LATENCY_MS:
+        await asyncio.sleep(STUB_LATENCY_MS / 1000)
+
+    prompt = request.messages[-1].content if request.messages else ""
+    answer = stub_answer(prompt)
+
+    return {
+        "id": "stub-chat",
+        "object": "chat.completion",
+        "model": request.model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": answer},
+            "finish_reason": "stop",
+        }],
+        "usage": _usage([prompt], [answer]),
+    }
+
+
+@app.post("/v1/completions")
+async def completions(request: CompletionRequest):
+    # A batch pays the simulated latency once, like a real batched backend.
+    if STUB_LATENCY_MS:
+        await asyncio.sleep(STUB_LATENCY_MS / 1000)
+
+    prompts = [request.prompt] if isinstance(request.prompt, str) else request.prompt
+    answers = [stub_answer(p) for p in prompts]
+
+    return {
+        "id": "stub-completion",
+        "object": "text_completion",
+        "model": request.model,
+        "choices": [
+            {"index": i, "text": answer, "finish_reason": "stop"}
+            for i, answer in enumerate(answers)
+        ],
+        "usage": _usage(prompts, answers),
+    }
@@ -1,30 +1,39 @@
 import os
 import math
+import time
 import pandas as pd
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_community.document_loaders import CSVLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma 
 from dotenv import load_dotenv
-from app.core.config import CHROMA_PATH
 from app.services.target_matching import suggest_target_columns
 from app.services.target_detection import detect_target_column
 from app.services.preprocessing import preprocess_dataset
 from app.services.data_analysis import analyze_dataset, compute_boxplot_stats
 from app.services.model_selection import select_best_model
 from app.services.model_runner import train_and_evaluate_models
-from app.services.rag_service import index_dataset_for_rag
+from app.services.feature_importance import importance_level
+from app.services.redundancy import detect_redundancy, drop_duplicate_rows
+from app.services.feature_pruning import plan_pruning, apply_pruning
+from app.services.rag_service import index_dataset_for_rag, rag_progress
 from app.services.problem_detection import detect_problem_type
+from app.services.dataset_profile import (
+    build_dataset_profile,
+    profile_csv,
+    register_profile,
+    get_profile,
+)
+from app.services.sketches import resolve_stats_mode
+from app.services.dtype_optimizer import read_csv_optimized, NUMERIC_DTYPES, CATEGORICAL_DTYPES
+from app.services.dataset_cache import (
+    cache_dataset,
+    get_cached_frame,
+    get_cached_results,
+    invalidate_dataset,
+)
+from app.services.pipeline_dag import PipelineDAG, Stage, SKIP, file_fingerprint
+from app.core.config import DEDUPLICATE_ROWS, DROP_REDUNDANT_COLUMNS, FEATURE_PRUNING
 
 
 load_dotenv()
 
-import os
-import pandas as pd
-from dotenv import load_dotenv
-
-load_dotenv()
 def safe_float(v):
     if v is None:
         return None
@@ -33,283 +42,536 @@ def safe_float(v):
     return float(v)
 
 
-def process_and_analyze_dataset(file_path: str, 
-                                dataset_id: str,
-                                user_target_column: str | None = None):
-    try:
-        print("📊 Starting full ML pipeline for:", file_path)
+# =====================================================
+# PIPELINE STAGES
+# =====================================================
+# The upload pipeline is a DAG (see pipeline_dag.py): profiling, the
+# target-independent analysis and RAG indexing run concurrently with
+# target detection -> preprocessing -> training, so end-to-end latency is
+# the critical path rather than the sum of all stages.
+def _stage_load(file_path: str):
+    # Narrow dtypes (int8.., float32, category) instead of int64/object
+    df, load_report = read_csv_optimized(file_path)
+    if df.empty:
+        raise ValueError("CSV file is empty")
+    return df, load_report
+
+
+def _stage_profile(df: pd.DataFrame):
+    # Mergeable sketches so appended rows can refresh stats incrementally.
+    # In exact mode no statistic reads them: they are built from the file
+    # on the first append instead (see append_rows_to_dataset)
+    if resolve_stats_mode(len(df)) == "exact":
+        return None
+    return build_dataset_profile(df)
+
+
+def _stage_boxplot(df: pd.DataFrame, profile):
+    return compute_boxplot_stats(df, profile=profile)
+
 
-        # ---------------- LOAD DATA ----------------
-        df = pd.read_csv(file_path)
-        if df.empty:
-            raise ValueError("CSV file is empty")
-        
-        #----------------- BOXPLOT STATS ----------------
-        boxplot_stats = compute_boxplot_stats(df)
-
-        # ---------------- TARGET DETECTION ----------------
-        
-        # -------------------------------
-        # TARGET COLUMN RESOLUTION
-        # -------------------------------
-        columns = list(df.columns)
-
-        if user_target_column:
+def _stage_data_analysis(df: pd.DataFrame, profile):
+    return analyze_dataset(df, profile=profile)
+
+
+def _stage_target(df: pd.DataFrame, user_target_column: str | None):
+    """(target_column, target_source, suggestions); SKIP when the user must pick."""
+    # -------------------------------
+    # TARGET COLUMN RESOLUTION
+    # -------------------------------
+    columns = list(df.columns)
+
+    if user_target_column:
         # Exact (case-insensitive) match
-            exact_match = next(
-        (c for c in columns if c.lower() == user_target_column.lower()),None)
+        exact_match = next(
+            (c for c in columns if c.lower() == user_target_column.lower()), None
+        )
+        if exact_match:
+            return exact_match, "user_exact", []
 
-            if exact_match:
-                target_column = exact_match
-                target_source = "user_exact"
+        suggestions = suggest_target_columns(user_target_column, columns)
+        if suggestions:
+            return SKIP, "needs_user_input", suggestions
 
-            else:
-                suggestions = suggest_target_columns(
-                user_target_column,
-                columns
+        # No suggestions → fallback
+        return detect_target_column(df), "auto_fallback", []
+
+    return detect_target_column(df), "auto", []
+
+
+def _stage_problem_type(df: pd.DataFrame, target_column):
+    return detect_problem_type(df, target_column)
+
+
+def _stage_redundancy(df: pd.DataFrame, target_column):
+    # Duplicate rows / columns and target copies from per-column hashes
+    return detect_redundancy(df, target_column)
+
+
+def _stage_pruning(df: pd.DataFrame, target_column, redundancy: dict):
+    # Columns not worth encoding / fitting on (see feature_pruning.py)
+    return plan_pruning(
+        df, target_column, redundancy,
+        prune=FEATURE_PRUNING, drop_redundant=DROP_REDUNDANT_COLUMNS
+    )
+
+
+def _stage_preprocessing(df: pd.DataFrame, target_column, problem_type: str,
+                         duplicate_rows, pruning: dict, profile):
+    if DEDUPLICATE_ROWS:
+        df = drop_duplicate_rows(df, duplicate_rows)
+    df = apply_pruning(df, pruning)
+    # Supervised tasks fit the transformer per CV fold (no test leakage);
+    # approximate outlier bounds reuse the profile's quantile sketches
+    # (built over all rows, duplicates included: within the rank error)
+    return preprocess_dataset(df, target_column, fit=(problem_type == "unsupervised"),
+                              profile=profile)
+
+
+def _stage_training(preprocessed, problem_type: str, timings: dict | None = None):
+    # (per-model fit / CV timings are recorded by the runner)
+    X_processed, y, preprocessor, preprocessing_meta = preprocessed
+    if problem_type == "unsupervised":
+        model_results = train_and_evaluate_models(
+            X=X_processed,
+            task="unsupervised",
+            timings=timings
         )
 
-                # app/services/ml_service.py
+    else:
+        model_results = train_and_evaluate_models(
+            X=preprocessing_meta["features"],
+            y=y,
+            task=problem_type,
+            preprocessor=preprocessor,
+            timings=timings
+        )
 
-                if suggestions:
-                    return {
-        "analysis_status": "needs_user_input", 
-        "dataset_id": dataset_id,
-        "message": f"Target column '{user_target_column}' not found.",
-        "user_input": user_target_column,
-        "suggested_targets": suggestions,
-        "columns": columns,
-        # Add these to prevent frontend "undefined" errors
-        "analysis_result": {
-            "preprocessing_report": {"flow": []}, # Prevents .join() errors on flow
-            "insights": [],
-            "feature_analysis": []
+    if not model_results or "all_model_metrics" not in model_results:
+        raise RuntimeError("Model training did not produce results")
+    return model_results
+
+
+def _stage_selection(model_results: dict, problem_type: str):
+    best_model = select_best_model(
+        model_results["all_model_metrics"],
+        problem_type
+    )
+    if best_model is None:
+        best_model = {
+            "name": "N/A",
+            "algorithm": "Unsupervised",
+            "confidence": 0,
+            "reasoning": "No supervised target detected. Clustering models were applied.",
+            "tradeoffs": "No ground truth available for supervised evaluation."
         }
+    return best_model
+
+
+def _stage_rag(file_path: str, dataset_id: str, target_column, raw_analysis,
+               timings: dict | None = None):
+    # target_column is only a gate: a typo'd target (SKIP) returns the
+    # "did you mean" answer at once instead of waiting for the embedding.
+    # Only the first pass (summary + row sample) runs here; the rest is
+    # streamed in the background after the response (see main.py)
+    return index_dataset_for_rag(
+        file_path=file_path,
+        dataset_id=dataset_id,
+        timings=timings,
+        analysis=raw_analysis,
+        first_pass_only=True
+    )
+
+
+def _importance(col, target_column, importance, pruning):
+    if col == target_column:
+        return "target", None
+    if pruning["columns"].get(col, {}).get("action") == "drop":
+        return "pruned", None
+    scores = (importance or {}).get("scores", {})
+    return importance_level(scores, col), scores.get(col)
+
+
+def _redundancy_insights(redundancy: dict):
+    insights = []
+    rows = redundancy.get("rows") or 1
+
+    if redundancy.get("duplicate_rows"):
+        pct = round(redundancy["duplicate_rows"] / rows * 100, 2)
+        insights.append({
+            "title": "Duplicate Rows",
+            "description": (
+                f"{redundancy['duplicate_rows']} rows ({pct}%) are exact duplicates"
+                + (" and were removed before training." if DEDUPLICATE_ROWS
+                   else "; they inflate training time and cross-validation scores.")
+            ),
+            "importance": "high" if pct > 5 else "medium"
+        })
+
+    if redundancy.get("conflicting_rows"):
+        insights.append({
+            "title": "Conflicting Duplicates",
+            "description": f"{redundancy['conflicting_rows']} rows repeat the features of another row with a different target value.",
+            "importance": "medium"
+        })
+
+    for leak in redundancy.get("target_leakage", []):
+        insights.append({
+            "title": "Target Leakage",
+            "description": f"Column '{leak['column']}' is a copy of the target ({leak['kind']} match on {leak['agreement'] * 100:.1f}% of rows).",
+            "importance": "high"
+        })
+
+    for dup in redundancy.get("duplicate_columns", []):
+        insights.append({
+            "title": "Duplicate Column",
+            "description": f"Column '{dup['column']}' duplicates '{dup['duplicate_of']}' ({dup['kind']} match on {dup['agreement'] * 100:.1f}% of rows).",
+            "importance": "medium"
+        })
+
+    if redundancy.get("constant_columns"):
+        insights.append({
+            "title": "Constant Columns",
+            "description": f"Columns {', '.join(redundancy['constant_columns'])} hold a single value and carry no information.",
+            "importance": "medium"
+        })
+
+    for col in redundancy.get("near_constant_columns", []):
+        insights.append({
+            "title": "Near-Constant Column",
+            "description": f"Column '{col['column']}' has the same value in {col['top_share'] * 100:.1f}% of rows.",
+            "importance": "low"
+        })
+
+    if redundancy.get("identifier_columns"):
+        insights.append({
+            "title": "Identifier Columns",
+            "description": f"Columns {', '.join(redundancy['identifier_columns'])} are unique per row (IDs); one-hot encoding them only adds width.",
+            "importance": "medium"
+        })
+
+    return insights
+
+
+def _pruning_insights(pruning: dict):
+    columns = pruning["columns"]
+    dropped = [c for c, p in columns.items() if p["action"] == "drop"]
+    hashed = [c for c, p in columns.items() if p["action"] == "hash"]
+    if not columns:
+        return []
+    parts = []
+    if dropped:
+        parts.append(f"dropped {', '.join(dropped)}")
+    if hashed:
+        parts.append(f"hashed {', '.join(hashed)} into {pruning['hash_buckets']} buckets")
+    return [{
+        "title": "Features Pruned",
+        "description": (
+            f"Before training: {'; '.join(parts)} "
+            f"({pruning['features_before']} -> {pruning['features_after']} features)."
+        ),
+        "importance": "low"
+    }]
+
+
+def _stage_report(df: pd.DataFrame, raw_analysis: dict, target_column, problem_type: str,
+                  preprocessed, model_results: dict, redundancy: dict, pruning: dict):
+    """Preprocessing report, column transformations, insights, feature table."""
+    _, _, _, preprocessing_meta = preprocessed
+    feature_importance = model_results.get("feature_importance")
+    numeric_cols = preprocessing_meta["numeric_cols"]
+    categorical_cols = preprocessing_meta["categorical_cols"]
+
+    # ---------------- PREPROCESSING REPORT ----------------
+    preprocessing_flow = [
+    {"step": 1, "label": "Raw Dataset"},
+    {"step": 2, "label": "Missing Value Imputation"},
+    {"step": 3, "label": "Outlier Detection (No Row Removal)"},
+    {"step": 4, "label": "Categorical Encoding"},
+    {"step": 5, "label": "Numerical Scaling"},
+    {"step": 6, "label": "Model-Ready Dataset"}
+    ]
+
+    missing_summary = {
+        col: int(count)
+        for col, count in raw_analysis["missing_values"].items()
+        if count > 0
     }
 
-        # No suggestions → fallback
-                target_column = detect_target_column(df)
-                target_source = "auto_fallback"
-
-        else:
-            target_column = detect_target_column(df)
-            target_source = "auto"
-
-        analysis_result = {
-            "dataset_id": dataset_id,
-            "analysis_status": "completed",
-            "target_column": target_column,
-            "target_source": target_source,
-            "columns": columns,
+    preprocessing_steps = [
+        {
+            "step": "Numerical preprocessing",
+            "description": "Median imputation followed by standard scaling",
+            "affected_columns": df.select_dtypes(
+                include=NUMERIC_DTYPES
+            ).columns.tolist()
+        },
+        {
+            "step": "Categorical preprocessing",
+            "description": "Most-frequent imputation followed by one-hot encoding",
+            "affected_columns": df.select_dtypes(
+                include=CATEGORICAL_DTYPES
+            ).columns.tolist()
         }
-        analysis_result["columns"] = list(df.columns)
-        # ---------------- PROBLEM TYPE ----------------
-        problem_type = detect_problem_type(df, target_column)
-
-        # ---------------- PREPROCESSING ----------------
-        X_processed, y, preprocessor, preprocessing_meta = preprocess_dataset(df, target_column)
-
-        numeric_cols = preprocessing_meta["numeric_cols"]
-        categorical_cols = preprocessing_meta["categorical_cols"]
-        preprocessing_visuals = preprocessing_meta["visuals"]
-
-        # ---------------- PREPROCESSING REPORT ----------------
-        numeric_cols = preprocessing_meta["numeric_cols"]
-        categorical_cols = preprocessing_meta["categorical_cols"]
-
-        preprocessing_flow = [
-        {"step": 1, "label": "Raw Dataset"},
-        {"step": 2, "label": "Missing Value Imputation"},
-        {"step": 3, "label": "Outlier Detection (No Row Removal)"},
-        {"step": 4, "label": "Categorical Encoding"},
-        {"step": 5, "label": "Numerical Scaling"},
-        {"step": 6, "label": "Model-Ready Dataset"}
-        ]
-
-        missing_summary = {
-            col: int(df[col].isna().sum())
-            for col in df.columns
-            if df[col].isna().sum() > 0
+    ]
+    #-----------------COLUMN TRASNSFORMATION DETAILS ----------------
+    unique_counts = raw_analysis["unique_counts"]
+
+    column_transformations = []
+
+    for col in df.columns:
+        if col == target_column:
+            continue
+
+        col_info = {
+            "column": col,
+            "missing_handling": "None",
+            "scaling": "None",
+            "encoding": "None",
+            "outlier_handling": "Detected only (no removal)"
         }
 
-        preprocessing_steps = [
-            {
-                "step": "Numerical preprocessing",
-                "description": "Median imputation followed by standard scaling",
-                "affected_columns": df.select_dtypes(
-                    include=["int64", "float64"]
-                ).columns.tolist()
-            },
-            {
-                "step": "Categorical preprocessing",
-                "description": "Most-frequent imputation followed by one-hot encoding",
-                "affected_columns": df.select_dtypes(
-                    include=["object", "category", "bool"]
-                ).columns.tolist()
-            }
-        ]
-        #-----------------COLUMN TRASNSFORMATION DETAILS ----------------
+        if raw_analysis["missing_values"][col] > 0:
+            col_info["missing_handling"] = (
+                "Median Imputation" if col in numeric_cols
+                else "Most Frequent Imputation"
+            )
+
+        if col in numeric_cols:
+            if unique_counts[col] > 2:
+                col_info["scaling"] = "StandardScaler"
+            else:
+                col_info["scaling"] = "Skipped (binary feature)"
 
-        column_transformations = []
+        if col in categorical_cols:
+            col_info["encoding"] = "One-Hot Encoding"
 
-        for col in df.columns:
-            if col == target_column:
-                continue
+        pruned = pruning["columns"].get(col)
+        if pruned:
+            col_info["pruning"] = pruned
+            if pruned["action"] == "hash":
+                col_info["encoding"] = f"Hashed ({pruning['hash_buckets']} buckets) + One-Hot Encoding"
+
+        column_transformations.append(col_info)
 
-            col_info = {
-                "column": col,
-                "missing_handling": "None",
-                "scaling": "None",
-                "encoding": "None",
-                "outlier_handling": "Detected only (no removal)"
-            }
 
-            if df[col].isna().any():
-                col_info["missing_handling"] = (
-                    "Median Imputation" if col in numeric_cols
-                    else "Most Frequent Imputation"
-                )
-
-            if col in numeric_cols:
-                if df[col].nunique() > 2:
-                    col_info["scaling"] = "StandardScaler"
-                else:
-                    col_info["scaling"] = "Skipped (binary feature)"
-
-            if col in categorical_cols:
-                col_info["encoding"] = "One-Hot Encoding"
-
-            column_transformations.append(col_info)
-
-
-
-        # ---------------- DATA ANALYSIS ----------------
-        raw_analysis = analyze_dataset(df)
-        insights = []
-
-        #Missing data insight
-        for col, missing in raw_analysis["missing_values"].items():
-            pct = round((missing / raw_analysis["rows"]) * 100, 2)
-            if pct > 30:
-                insights.append({
-                    "title": "High Missing Values",
-                    "description": f"Column '{col}' has {pct}% missing values.",
-                    "importance": "high"
-                })
-
-        #Skewness insight
-        for col, stats in raw_analysis.get("numeric_distributions", {}).items():
-            if abs(stats["skewness"]) > 1:
-                insights.append({
-                    "title": "Skewed Distribution",
-                    "description": f"Feature '{col}' is highly skewed (skewness={stats['skewness']}).",
-                    "importance": "medium"
-                })
-
-        #Correlation insights
-        for corr in raw_analysis.get("strong_correlations", []):
+
+    insights = []
+
+    #Missing data insight
+    for col, missing in raw_analysis["missing_values"].items():
+        pct = round((missing / raw_analysis["rows"]) * 100, 2)
+        if pct > 30:
             insights.append({
-                "title": "Strong Feature Relationship",
-                "description": f"{corr['feature_1']} is strongly correlated with {corr['feature_2']} (corr={corr['correlation']}).",
+                "title": "High Missing Values",
+                "description": f"Column '{col}' has {pct}% missing values.",
                 "importance": "high"
             })
 
-        analysis = {
-            "statistical_summary": {
-                "total_rows": raw_analysis["rows"],
-                "total_columns": raw_analysis["columns"]
-            },
-            "problem_type": problem_type,
-            "feature_analysis": [
-                {
-                    "name": col,
-                    "type": raw_analysis["data_types"][col],
-                    "unique_values": df[col].nunique(),
-                    "missing_percentage": round(
-                        (raw_analysis["missing_values"][col] / raw_analysis["rows"]) * 100,
-                        2
-                    ),
-                    "importance": "high",
-                    "description": f"Feature representing {col}"
-                }
-                for col in df.columns
-            ],
-            "insights": insights
-        }
+    #Skewness insight
+    for col, stats in raw_analysis.get("numeric_distributions", {}).items():
+        if abs(stats["skewness"]) > 1:
+            insights.append({
+                "title": "Skewed Distribution",
+                "description": f"Feature '{col}' is highly skewed (skewness={stats['skewness']}).",
+                "importance": "medium"
+            })
 
-        
+    #Correlation insights
+    for corr in raw_analysis.get("strong_correlations", []):
+        insights.append({
+            "title": "Strong Feature Relationship",
+            "description": f"{corr['feature_1']} is strongly correlated with {corr['feature_2']} (corr={corr['correlation']}).",
+            "importance": "high"
+        })
+
+    insights.extend(_redundancy_insights(redundancy))
+    insights.extend(_pruning_insights(pruning))
+
+    return {
+        "statistical_summary": {
+            "total_rows": raw_analysis["rows"],
+            "total_columns": raw_analysis["columns"]
+        },
+        "problem_type": problem_type,
+        "feature_analysis": [
+            {
+                "name": col,
+                "type": raw_analysis["data_types"][col],
+                "unique_values": unique_counts[col],
+                "missing_percentage": round(
+                    (raw_analysis["missing_values"][col] / raw_analysis["rows"]) * 100,
+                    2
+                ),
+                "importance": level,
+                "importance_score": score,
+                "description": f"Feature representing {col}"
+            }
+            for col in df.columns
+            for level, score in [_importance(col, target_column, feature_importance, pruning)]
+        ],
+        "insights": insights,
+        "redundancy": redundancy,
+        "feature_pruning": pruning,
+        "column_transformations": column_transformations,
+        "preprocessing_flow": preprocessing_flow,
+        "missing_summary": missing_summary,
+        "preprocessing_visuals": preprocessing_meta["visuals"],
+        "preprocessing_steps": preprocessing_steps,
+    }
 
-        # ---------------- MODEL TRAINING ----------------
-        if problem_type == "unsupervised":
-            model_results = train_and_evaluate_models(
-                X=X_processed,
-                task="unsupervised"
-            )
 
-            best_model = select_best_model(
-                model_results["all_model_metrics"],
-                problem_type
-            )
+ANALYSIS_DAG = PipelineDAG([
+    Stage("load", _stage_load, ["file_path"], ["df", "load_report"]),
+    Stage("profile", _stage_profile, ["df"], ["profile"]),
+    Stage("boxplot", _stage_boxplot, ["df", "profile"], ["boxplot_stats"], cacheable=True),
+    Stage("data_analysis", _stage_data_analysis, ["df", "profile"], ["raw_analysis"], cacheable=True),
+    Stage("target_detection", _stage_target, ["df", "user_target_column"],
+          ["target_column", "target_source", "target_suggestions"], cacheable=True),
+    Stage("problem_type", _stage_problem_type, ["df", "target_column"], ["problem_type"], cacheable=True),
+    Stage("redundancy", _stage_redundancy, ["df", "target_column"],
+          ["redundancy", "duplicate_rows"]),
+    Stage("feature_pruning", _stage_pruning, ["df", "target_column", "redundancy"], ["pruning"],
+          cacheable=True),
+    Stage("preprocessing", _stage_preprocessing,
+          ["df", "target_column", "problem_type", "duplicate_rows", "pruning", "profile"],
+          ["preprocessed"]),
+    Stage("training", _stage_training, ["preprocessed", "problem_type"], ["model_results"],
+          cacheable=True, pass_timings=True),
+    Stage("selection", _stage_selection, ["model_results", "problem_type"], ["best_model"],
+          cacheable=True),
+    Stage("report", _stage_report,
+          ["df", "raw_analysis", "target_column", "problem_type", "preprocessed", "model_results",
+           "redundancy", "pruning"],
+          ["report"]),
+    Stage("rag_index", _stage_rag, ["file_path", "dataset_id", "target_column", "raw_analysis"],
+          ["rag_indexed"],
+          pass_timings=True),
+])
+
+# Outputs a re-target needs (everything except the RAG index); the
+# intermediates (preprocessed frame, duplicate rows, ...) are released
+# by the DAG as soon as their last consumer finishes
+RETARGET_OUTPUTS = ["df", "load_report", "profile", "boxplot_stats", "raw_analysis",
+                    "target_column", "target_source", "target_suggestions", "problem_type",
+                    "best_model", "model_results", "report"]
+ANALYSIS_OUTPUTS = RETARGET_OUTPUTS + ["rag_indexed"]
+
+
+def _needs_user_input(dataset_id: str, user_target_column: str, suggestions, columns):
+    return {
+        "analysis_status": "needs_user_input", 
+        "dataset_id": dataset_id,
+        "message": f"Target column '{user_target_column}' not found.",
+        "user_input": user_target_column,
+        "suggested_targets": suggestions,
+        "columns": columns,
+        # Add these to prevent frontend "undefined" errors
+        "analysis_result": {
+            "preprocessing_report": {"flow": []}, # Prevents .join() errors on flow
+            "insights": [],
+            "feature_analysis": []
+        }
+    }
 
-        else:
-            model_results = train_and_evaluate_models(
-                X=X_processed,
-                y=y,
-                task=problem_type
-            )
 
-            best_model = select_best_model(
-                model_results["all_model_metrics"],
-                problem_type
-            )
+def _rag_status(dataset_id: str, rag_indexed):
+    if rag_indexed is SKIP:
+        return "pending"
+    if not rag_indexed:
+        return "failed"
+    progress = rag_progress(dataset_id)
+    # Only the first pass ran: chat works, the rest is still to stream
+    return "ready" if progress and progress["phase"] == "complete" else "indexing"
+
+
+def _remember_base(dataset_id: str, outputs: dict, file_fp: str):
+    """Keeps the target-independent results for later re-targets / appends."""
+    if outputs["profile"] is not None:
+        register_profile(dataset_id, outputs["profile"])
+    cache_dataset(dataset_id, outputs["df"], {
+        "load_report": outputs["load_report"],
+        "boxplot_stats": outputs["boxplot_stats"],
+        "raw_analysis": outputs["raw_analysis"],
+        "file_fingerprint": file_fp,
+    })
+
+
+def _build_response(outputs: dict, run, timings: dict):
+    """FINAL RESPONSE"""
+    report = outputs["report"]
+    raw_analysis = outputs["raw_analysis"]
+    model_results = outputs["model_results"]
+    return {
+        "statistical_summary": report["statistical_summary"],
+        "problem_type": outputs["problem_type"],
+        "target_column": outputs["target_column"],
+        "target_source": outputs["target_source"],
+        "best_model": outputs["best_model"],
+        "model_metrics": model_results["all_model_metrics"],
+        "model_evaluation": model_results.get("evaluation", {}),
+        "feature_importance": model_results.get("feature_importance"),
+        "feature_analysis": report["feature_analysis"],
+        "boxplot_stats": outputs["boxplot_stats"],
+        "column_transformations": report["column_transformations"],
+        "preprocessing_flow": report["preprocessing_flow"],
+        "missing_summary": report["missing_summary"],
+        "preprocessing_visuals": report["preprocessing_visuals"],
+        "numeric_distributions": raw_analysis["numeric_distributions"],
+        "insights": report["insights"],
+        "redundancy": report["redundancy"],
+        "feature_pruning": report["feature_pruning"],
+        "preprocessing_steps": report["preprocessing_steps"],
+        "stats_mode": raw_analysis["stats_mode"],
+        "error_bounds": raw_analysis["error_bounds"],
+        "load_report": outputs["load_report"],
+        "model_status": "fresh",
+        "timings": timings,
+        "pipeline_stages": run.summary(),
+        "warnings": []
+    }
 
-        if not model_results or "all_model_metrics" not in model_results:
-            raise RuntimeError("Model training did not produce results")
 
-        
-        # ---------------- MODEL SELECTION ----------------
-        best_model = select_best_model(
-            model_results["all_model_metrics"],
-            problem_type
-        )
-        if best_model is None:
-            best_model = {
-                "name": "N/A",
-                "algorithm": "Unsupervised",
-                "confidence": 0,
-                "reasoning": "No supervised target detected. Clustering models were applied.",
-                "tradeoffs": "No ground truth available for supervised evaluation."
-            }
-        # ---------------- RAG INDEXING ----------------
-        os.makedirs(CHROMA_PATH, exist_ok=True)
-        index_dataset_for_rag(
-            file_path=file_path,
-            dataset_id=dataset_id
+def process_and_analyze_dataset(file_path: str, 
+                                dataset_id: str,
+                                user_target_column: str | None = None):
+    try:
+        print("📊 Starting full ML pipeline for:", file_path)
+        pipeline_start = time.perf_counter()
+        timings = {}
+
+        file_fp = file_fingerprint(file_path)
+        run = ANALYSIS_DAG.run(
+            {
+                "file_path": file_path,
+                "dataset_id": dataset_id,
+                "user_target_column": user_target_column,
+            },
+            targets=ANALYSIS_OUTPUTS,
+            fingerprints={"file_path": file_fp},
+            timings=timings
         )
+        outputs = run.outputs
+        _remember_base(dataset_id, outputs, file_fp)
+        rag_indexed = outputs["rag_indexed"]
+        rag_status = _rag_status(dataset_id, rag_indexed)
+
+        if outputs["target_column"] is SKIP:
+            result = _needs_user_input(
+                dataset_id, user_target_column,
+                outputs["target_suggestions"], list(outputs["df"].columns)
+            )
+            result["rag_status"] = rag_status
+            return result
 
-        # ---------------- FINAL RESPONSE ----------------
-        response = {
-            "statistical_summary": analysis["statistical_summary"],
-            "problem_type": problem_type,
-            "target_column": target_column,
-            "best_model": best_model,
-            "model_metrics": model_results["all_model_metrics"],
-            "feature_analysis": analysis["feature_analysis"],
-            "boxplot_stats": boxplot_stats,
-            "column_transformations": column_transformations,
-            "preprocessing_flow": preprocessing_flow,
-            "missing_summary": missing_summary,
-            "preprocessing_visuals": preprocessing_visuals,
-            "numeric_distributions": raw_analysis["numeric_distributions"],
-            "insights": analysis["insights"],
-            "preprocessing_steps": preprocessing_steps,
-            "warnings": []
-        }
+        timings["total"] = round(time.perf_counter() - pipeline_start, 4)
+        response = _build_response(outputs, run, timings)
 
         print("✅ ML pipeline completed successfully")
         return {
     "analysis_status": "completed",
     "dataset_id": dataset_id,
+    "rag_status": rag_status,
     "analysis_result": response
 }
 
@@ -317,3 +579,177 @@ def process_and_analyze_dataset(file_path: str,
         print("❌ ML PIPELINE ERROR:", str(e))
         raise
 
+
+def retarget_dataset(file_path: str, dataset_id: str, target_column: str):
+    """
+    Re-runs only the target-dependent stages (problem type, preprocessing,
+    training, selection) for a new target.
+
+    Load, profile, boxplot stats, distributions and correlations are
+    pre-filled from the dataset cache (the CSV is re-read only if its
+    frame was evicted); the RAG index is independent of the target and is
+    left alone.
+    """
+    print(f"🎯 Re-targeting {dataset_id} to '{target_column}'")
+    pipeline_start = time.perf_counter()
+    timings = {}
+
+    inputs = {"file_path": file_path, "dataset_id": dataset_id}
+    base = get_cached_results(dataset_id)
+    if base is not None:
+        file_fp = base["file_fingerprint"]
+        columns = base["raw_analysis"]["column_names"]
+        inputs.update(
+            load_report=base["load_report"],
+            boxplot_stats=base["boxplot_stats"],
+            raw_analysis=base["raw_analysis"],
+        )
+        df = get_cached_frame(dataset_id)
+        if df is not None:
+            inputs["df"] = df
+    else:
+        file_fp = file_fingerprint(file_path)
+        columns = list(pd.read_csv(file_path, nrows=0).columns)
+
+    profile = get_profile(dataset_id)
+    if profile is not None:
+        inputs["profile"] = profile
+
+    exact_match = next((c for c in columns if c.lower() == target_column.lower()), None)
+    if exact_match is None:
+        suggestions = suggest_target_columns(target_column, columns)
+        if suggestions:
+            return _needs_user_input(dataset_id, target_column, suggestions, columns)
+        raise ValueError(f"Target column '{target_column}' not found")
+    inputs["user_target_column"] = exact_match
+
+    run = ANALYSIS_DAG.run(
+        inputs,
+        targets=RETARGET_OUTPUTS,
+        fingerprints={"file_path": file_fp},
+        timings=timings
+    )
+    outputs = run.outputs
+    _remember_base(dataset_id, outputs, file_fp)
+
+    timings["total"] = round(time.perf_counter() - pipeline_start, 4)
+    response = _build_response(outputs, run, timings)
+    response["target_source"] = "user_retarget"
+    response["reused_cached_analysis"] = base is not None
+
+    print("✅ Re-target completed")
+    return {
+        "analysis_status": "completed",
+        "dataset_id": dataset_id,
+        "analysis_result": response
+    }
+
+
+# =====================================================
+# APPEND ROWS TO AN EXISTING DATASET
+# =====================================================
+def _append_to_csv(file_path: str, rows: pd.DataFrame):
+    # Make sure the new rows start on their own line
+    with open(file_path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) not in (b"\n", b"\r"):
+                f.write(b"\n")
+
+    rows.to_csv(file_path, mode="a", header=False, index=False)
+
+
+def append_csv_to_dataset(file_path: str, dataset_id: str, rows_file: str,
+                          analysis_result: dict):
+    """append_rows_to_dataset for an uploaded CSV of rows (the append job)."""
+    try:
+        new_rows = pd.read_csv(rows_file)
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+        raise ValueError(f"Could not parse the appended rows: {e}")
+    return append_rows_to_dataset(file_path, dataset_id, new_rows, analysis_result)
+
+
+def append_rows_to_dataset(file_path: str,
+                           dataset_id: str,
+                           new_rows: pd.DataFrame,
+                           analysis_result: dict):
+    """
+    Appends rows to an analysed dataset without re-running the pipeline.
+
+    Only the new rows are read, sketched and written out; profiling stats
+    are refreshed from the merged sketches and the trained models are
+    flagged stale instead of being retrained. A dataset analysed in exact
+    mode has no sketches yet: its first append streams the file through
+    profile_csv once.
+    """
+    if new_rows.empty:
+        raise ValueError("No rows to append")
+
+    profile = get_profile(dataset_id)
+    if profile is None:
+        # Analysed in exact mode: sketch the file as it stands, once
+        print(f"📊 Profiling {dataset_id} for its first append")
+        profile = profile_csv(file_path)
+        register_profile(dataset_id, profile)
+
+    missing_cols = [c for c in profile.columns if c not in new_rows.columns]
+    extra_cols = [c for c in new_rows.columns if c not in profile.columns]
+    if missing_cols or extra_cols:
+        raise ValueError(
+            f"Column mismatch (missing: {missing_cols}, unexpected: {extra_cols})"
+        )
+    new_rows = new_rows[profile.columns].copy()
+
+    # Values must fit the column kinds too: a string in a numeric column
+    # would turn it into an object column on the next reload
+    for col in profile.moments:
+        try:
+            new_rows[col] = pd.to_numeric(new_rows[col], errors="raise")
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Column '{col}' expects numeric values: {e}")
+
+    start_row = profile.rows
+    print(f"➕ Appending {len(new_rows)} rows to {dataset_id} (starting at row {start_row})")
+
+    # ---------------- INCREMENTAL PROFILE ----------------
+    # Before the file is touched, so a failed append never grows the CSV
+    profile.update(new_rows)
+
+    # ---------------- PERSIST ----------------
+    _append_to_csv(file_path, new_rows)
+
+    # Only the new rows go to the RAG indexer
+    rows_path = f"{os.path.splitext(file_path)[0]}_append_{start_row}.csv"
+    new_rows.to_csv(rows_path, index=False)
+
+    # Cached frame / analysis no longer match the file
+    invalidate_dataset(dataset_id)
+
+    if analysis_result:
+        analysis_result["statistical_summary"]["total_rows"] = profile.rows
+        analysis_result["boxplot_stats"] = profile.boxplot_stats()
+        analysis_result["numeric_distributions"] = profile.numeric_distributions()
+        analysis_result["missing_summary"] = profile.missing_summary()
+
+        unique_counts = profile.unique_counts()
+        for feature in analysis_result.get("feature_analysis", []):
+            feature["missing_percentage"] = round(
+                (profile.missing.get(feature["name"], 0) / profile.rows) * 100, 2
+            )
+            if feature["name"] in unique_counts:
+                feature["unique_values"] = unique_counts[feature["name"]]
+
+        rows_since_training = analysis_result.get("rows_since_training", 0) + len(new_rows)
+        analysis_result["rows_since_training"] = rows_since_training
+        analysis_result["model_status"] = "stale"
+        analysis_result["stats_mode"] = "approximate"
+        analysis_result["error_bounds"] = profile.error_bounds()
+
+    return {
+        "rows_added": len(new_rows),
+        "start_row": start_row,
+        "total_rows": profile.rows,
+        "rows_path": rows_path,
+        "analysis_result": analysis_result,
+    }
@@ -1,8 +1,6 @@
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.base import clone
 from sklearn.linear_model import LogisticRegression, LinearRegression, Ridge
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
-from sklearn.cluster import KMeans, DBSCAN
-from sklearn.mixture import GaussianMixture
 from sklearn.metrics import (
     accuracy_score,
     f1_score,
@@ -10,102 +8,287 @@ from sklearn.metrics import (
     recall_score,
     r2_score,
     mean_squared_error,
-    confusion_matrix,
-    silhouette_score
+    confusion_matrix
 )
+import time
+import warnings
 import numpy as np
+from app.services.transform_cache import FoldTransformCache
+from app.services.feature_importance import compute_feature_importance
+from app.services.clustering import evaluate_clustering
+from app.core.metrics import timed_stage
+from app.core.config import (
+    FOREST_EVALUATION,
+    FOREST_MIN_TREES,
+    FOREST_MAX_TREES,
+    FOREST_TREES_STEP,
+    FOREST_OOB_TOLERANCE,
+    FOREST_OOB_PATIENCE,
+    FEATURE_IMPORTANCE_BUDGET_FRACTION,
+    FEATURE_IMPORTANCE_MIN_SECONDS,
+)
+
+FOREST_MODELS = (RandomForestClassifier, RandomForestRegressor)
+
+
+def _cross_val_scores(models: dict, cache: FoldTransformCache, scorer,
+                      timings: dict | None = None):
+    """
+    cross_val_score equivalent for several models at once. Folds are
+    transformed lazily, one at a time: each is shared by every model and
+    dropped before the next, so only the holdout and a single CV split
+    are ever resident. Returns {name: scores}.
+    """
+    if not models:
+        return {}
+    scores = {name: [] for name in models}
+    for fold in cache.cv_folds:
+        with timed_stage("analysis", "fold_transform", timings):
+            X_train, X_test, y_train, y_test = cache.get(fold)
+        for name, model in models.items():
+            with timed_stage("analysis", f"cv:{name}", timings):
+                fold_model = clone(model).fit(X_train, y_train)
+                scores[name].append(scorer(y_test, fold_model.predict(X_test)))
+        del X_train, X_test, fold_model
+        cache.drop(fold)
+    return {name: np.array(fold_scores) for name, fold_scores in scores.items()}
+
+
+def _uses_oob(model) -> bool:
+    return FOREST_EVALUATION == "oob" and isinstance(model, FOREST_MODELS)
+
+
+def _f1_weighted(y_true, y_pred):
+    return f1_score(y_true, y_pred, average="weighted")
+
 
+# =====================================================
+# OUT-OF-BAG FOREST EVALUATION
+# =====================================================
+def _oob_predictions(model, y):
+    """(y, predictions) for the rows that were out-of-bag at least once."""
+    if hasattr(model, "oob_decision_function_"):
+        votes = model.oob_decision_function_
+        valid = np.isfinite(votes).all(axis=1) & (votes.sum(axis=1) > 0)
+        predictions = model.classes_[np.argmax(votes[valid], axis=1)]
+    else:
+        valid = np.isfinite(model.oob_prediction_)
+        predictions = model.oob_prediction_[valid]
+    return np.asarray(y)[valid], predictions
+
+
+def grow_forest(model, X_train, y_train, scorer, min_trees: int = FOREST_MIN_TREES,
+                max_trees: int = FOREST_MAX_TREES, step: int = FOREST_TREES_STEP,
+                tolerance: float = FOREST_OOB_TOLERANCE, patience: int = FOREST_OOB_PATIENCE):
+    """
+    Fits `model` (a random forest) with warm_start, adding `step` trees
+    at a time from `min_trees`, and stops once `patience` consecutive
+    increments improve the out-of-bag score by less than `tolerance`
+    (or at `max_trees`). Returns [(n_trees, oob score), ...].
+    """
+    model.set_params(warm_start=True, oob_score=True, bootstrap=True)
+    curve, best, stale = [], -np.inf, 0
+    n_trees = min(min_trees, max_trees)
+    while True:
+        model.set_params(n_estimators=n_trees)
+        with warnings.catch_warnings():
+            # "Some inputs do not have OOB scores" while the forest is small
+            warnings.simplefilter("ignore", UserWarning)
+            model.fit(X_train, y_train)
+        score = float(scorer(*_oob_predictions(model, y_train)))
+        curve.append((n_trees, score))
+
+        stale = stale + 1 if score - best < tolerance else 0
+        best = max(best, score)
+        if stale >= patience or n_trees >= max_trees:
+            break
+        n_trees = min(n_trees + step, max_trees)
 
-def train_and_evaluate_models(X, y=None, task="classification"):
+    model.set_params(warm_start=False)
+    return curve
+
+
+def _oob_score(model, y_train, scorer) -> float:
+    """
+    OOB metric over every training row that was out-of-bag at least once.
+    It comes from a single fit, so unlike CV there is no fold-to-fold
+    spread: forests scored this way report cv_std = None.
+    """
+    return float(scorer(*_oob_predictions(model, y_train)))
+
+
+def _fit_and_score(name, model, X_train, y_train, cv_scores, scorer, timings):
+    """
+    Fits `model` on the holdout training rows and returns
+    (cv_mean, cv_std, extra result fields). Forests in FOREST_EVALUATION=oob
+    mode are grown until the OOB score plateaus and scored out-of-bag
+    (cv_std None); every other model takes its scores from `cv_scores`
+    (see _cross_val_scores).
+    """
+    if _uses_oob(model):
+        with timed_stage("analysis", f"fit:{name}", timings):
+            curve = grow_forest(model, X_train, y_train, scorer)
+        with timed_stage("analysis", f"oob:{name}", timings):
+            score = _oob_score(model, y_train, scorer)
+        return score, None, {
+            "validation": "oob",
+            "n_estimators": model.n_estimators,
+            "oob_curve": [{"trees": trees, "score": score} for trees, score in curve],
+        }
+
+    with timed_stage("analysis", f"fit:{name}", timings):
+        model.fit(X_train, y_train)
+    scores = cv_scores[name]
+    return float(np.mean(scores)), float(np.std(scores)), {"validation": "cv"}
+
+
+def train_and_evaluate_models(X, y=None, task="classification", preprocessor=None,
+                              timings: dict | None = None):
+    """
+    Trains and scores the candidate models for `task`.
+
+    With a `preprocessor`, X is the raw feature DataFrame and the
+    transformer is fitted per split (holdout + each CV fold) on training
+    rows only; each transformed split is shared by every candidate. The
+    holdout stays cached throughout, CV folds are transformed one at a
+    time. Without one, X is taken as already model-ready.
+
+    Per-stage seconds (fold transforms, each model's fit and CV, feature
+    importance) are added to `timings` when given.
+    """
+    start = time.perf_counter()
     results = []
+    evaluation = {}
+    feature_importance = None
 
     # ---------------- SUPERVISED ----------------
     if task in ["classification", "regression"]:
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
+        cache = FoldTransformCache(
+            X, y, preprocessor,
+            classification=(task == "classification"),
+            cv=5, test_size=0.2, random_state=42
         )
+        # Only the holdout up front; CV folds are transformed lazily
+        with timed_stage("analysis", "fold_transform", timings):
+            X_train, X_test, y_train, y_test = cache.get("holdout")
 
-    # ---------------- CLASSIFICATION ----------------
-    if task == "classification":
-        models = {
-            "Logistic Regression": LogisticRegression(max_iter=1000),
-            "Random Forest": RandomForestClassifier(n_estimators=100, random_state=42),
-        }
+    try:
+        # ---------------- CLASSIFICATION ----------------
+        if task == "classification":
+            models = {
+                "Logistic Regression": LogisticRegression(max_iter=1000),
+                "Random Forest": RandomForestClassifier(n_estimators=100, random_state=42),
+            }
+            scorer = _f1_weighted
+            cv_scores = _cross_val_scores(
+                {name: model for name, model in models.items() if not _uses_oob(model)},
+                cache, scorer, timings
+            )
 
-        for name, model in models.items():
-            model.fit(X_train, y_train)
+            for name, model in models.items():
+                cv_mean, cv_std, extra = _fit_and_score(
+                    name, model, X_train, y_train, cv_scores, scorer, timings
+                )
 
-            y_train_pred = model.predict(X_train)
-            y_test_pred = model.predict(X_test)
+                y_train_pred = model.predict(X_train)
+                y_test_pred = model.predict(X_test)
 
-            train_acc = accuracy_score(y_train, y_train_pred)
-            test_acc = accuracy_score(y_test, y_test_pred)
-            precision = precision_score(y_test, y_test_pred, average="weighted")
-            f1 = f1_score(y_test, y_test_pred, average="weighted")
-            recall = recall_score(y_test, y_test_pred, average="weighted")
-            cm = confusion_matrix(y_test, y_test_pred)
+                train_acc = accuracy_score(y_train, y_train_pred)
+                test_acc = accuracy_score(y_test, y_test_pred)
+                precision = precision_score(y_test, y_test_pred, average="weighted")
+                f1 = f1_score(y_test, y_test_pred, average="weighted")
+                recall = recall_score(y_test, y_test_pred, average="weighted")
+                cm = confusion_matrix(y_test, y_test_pred)
 
-            cv_scores = cross_val_score(
-                model, X, y, cv=5, scoring="f1_weighted"
-            )
+                results.append({
+                    "model": name,
+                    "accuracy": float(test_acc),
+                    "f1_score": float(f1),
+                    "precision": float(precision),
+                    "recall": float(recall),
+                    "train_score": float(train_acc),
+                    "cv_mean": cv_mean,
+                    "cv_std": cv_std,
+                    "confusion_matrix": cm.tolist(),
+                    **extra
+                })
 
-            results.append({
-                "model": name,
-                "accuracy": float(test_acc),
-                "f1_score": float(f1),
-                "precision": float(precision),
-                "recall": float(recall),
-                "train_score": float(train_acc),
-                "cv_mean": float(np.mean(cv_scores)),
-                "cv_std": float(np.std(cv_scores)),
-                "confusion_matrix": cm.tolist()
-            })
-
-    # ---------------- REGRESSION ----------------
-    elif task == "regression":
-        models = {
-            "Linear Regression": LinearRegression(),
-            "Ridge Regression": Ridge(),
-            "Random Forest": RandomForestRegressor(n_estimators=100, random_state=42),
-        }
+        # ---------------- REGRESSION ----------------
+        elif task == "regression":
+            models = {
+                "Linear Regression": LinearRegression(),
+                "Ridge Regression": Ridge(),
+                "Random Forest": RandomForestRegressor(n_estimators=100, random_state=42),
+            }
+            scorer = r2_score
+            cv_scores = _cross_val_scores(
+                {name: model for name, model in models.items() if not _uses_oob(model)},
+                cache, scorer, timings
+            )
 
-        for name, model in models.items():
-            model.fit(X_train, y_train)
+            for name, model in models.items():
+                cv_mean, cv_std, extra = _fit_and_score(
+                    name, model, X_train, y_train, cv_scores, scorer, timings
+                )
 
-            y_train_pred = model.predict(X_train)
-            y_test_pred = model.predict(X_test)
+                y_train_pred = model.predict(X_train)
+                y_test_pred = model.predict(X_test)
 
-            rmse = rmse = np.sqrt(mean_squared_error(y_test, y_test_pred))
-            r2 = r2_score(y_test, y_test_pred)
+                rmse = rmse = np.sqrt(mean_squared_error(y_test, y_test_pred))
+                r2 = r2_score(y_test, y_test_pred)
 
-            cv_scores = cross_val_score(
-                model, X, y, cv=5, scoring="r2"
-            )
+                results.append({
+                    "model": name,
+                    "rmse": float(rmse),
+                    "r2": float(r2),
+                    "train_score": float(model.score(X_train, y_train)),
+                    "cv_mean": cv_mean,
+                    "cv_std": cv_std,
+                    **extra
+                })
 
-            results.append({
-                "model": name,
-                "rmse": float(rmse),
-                "r2": float(r2),
-                "train_score": float(model.score(X_train, y_train)),
-                "cv_mean": float(np.mean(cv_scores)),
-                "cv_std": float(np.std(cv_scores))
-            })
+        # ---------------- UNSUPERVISED ----------------
+        else:
+            if preprocessor is not None:
+                X = preprocessor.fit_transform(X)
 
-    # ---------------- UNSUPERVISED ----------------
-    else:
-        models = {
-            "KMeans": KMeans(n_clusters=3, random_state=42),
-            "Gaussian Mixture": GaussianMixture(n_components=3),
-        }
+            # k sweep + sampled silhouette (see clustering.py)
+            with timed_stage("analysis", "clustering", timings):
+                results = evaluate_clustering(X)
 
-        for name, model in models.items():
-            labels = model.fit_predict(X)
-            score = silhouette_score(X, labels)
+        if task in ["classification", "regression"]:
+            evaluation = {
+                "per_fold_preprocessing": preprocessor is not None,
+                "transformer_fits": cache.fits,
+                "splits": len(cache.splits),
+                "forest_evaluation": FOREST_EVALUATION,
+            }
 
-            results.append({
-                "model": name,
-                "silhouette_score": float(score)
-            })
+            # ---------------- FEATURE IMPORTANCE ----------------
+            # From the holdout models already fitted above; permutation
+            # importance (best CV model) is capped at a fraction of the
+            # time spent so far
+            fraction = FEATURE_IMPORTANCE_BUDGET_FRACTION
+            budget = max(
+                FEATURE_IMPORTANCE_MIN_SECONDS,
+                fraction / (1 - fraction) * (time.perf_counter() - start)
+            )
+            best = max(results, key=lambda r: r["cv_mean"])["model"]
+            with timed_stage("analysis", "feature_importance", timings):
+                try:
+                    feature_importance = compute_feature_importance(
+                        models, best, X_test, y_test, cache.transformers.get("holdout"),
+                        scorer, budget, feature_names=getattr(X, "columns", None)
+                    )
+                except Exception as e:
+                    print("⚠️ Feature importance failed:", str(e))
 
-    return {"all_model_metrics": results}
+    finally:
+        if task in ["classification", "regression"]:
+            cache.close()
 
+    return {
+        "all_model_metrics": results,
+        "evaluation": evaluation,
+        "feature_importance": feature_importance,
+    }
@@ -11,11 +11,15 @@ def select_best_model(model_metrics, task):
 
     scored_models = []
 
+    # Forests scored out-of-bag have no fold spread (cv_std None); when
+    # candidates mix OOB and CV, compare them on the mean alone
+    use_std = all(m.get("cv_std") is not None for m in model_metrics)
+
     for m in model_metrics:
         # ---------------- COMMON SIGNALS ----------------
         train_score = m.get("train_score", 0)
         cv_mean = m.get("cv_mean", 0)
-        cv_std = m.get("cv_std", 0)
+        cv_std = m["cv_std"] if use_std else 0
 
         overfit_gap = abs(train_score - cv_mean)
 
@@ -57,15 +61,25 @@ def select_best_model(model_metrics, task):
         confidence = int(min(90, best["final_score"] * 100))
 
     # ---------------- REASONING ----------------
+    validation = best.get("validation")
+    if validation == "oob":
+        stability = "a strong out-of-bag score (validation: oob)"
+    else:
+        stability = "stable cross-validation results"
     reasoning = (
         f"Selected because it achieved the best balance between performance "
         f"and generalization. The model shows a low overfitting gap "
-        f"({round(best['overfit_gap'], 3)}) and stable cross-validation "
-        f"results."
+        f"({round(best['overfit_gap'], 3)}) and {stability}."
     )
+    if not use_std and any(m.get("validation") == "oob" for m in model_metrics):
+        reasoning += (
+            " Out-of-bag forests have no fold spread, so candidates were "
+            "compared on mean scores only."
+        )
 
     return {
         "name": best["model"],
+        "validation": validation,
         "algorithm": "Linear / Tree / Ensemble / Clustering",
         "confidence": confidence,
         "reasoning": reasoning,
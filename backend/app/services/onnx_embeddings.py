@@ -0,0 +1,152 @@
+import os
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from app.core.config import (
+    EMBEDDING_MODEL,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_THREADS,
+    EMBEDDING_MAX_LENGTH,
+    EMBEDDING_ONNX_PATH,
+    EMBEDDING_ONNX_QUANTIZE,
+    EMBEDDING_CACHE_DIR,
+)
+
+# Pre-quantized export published next to onnx/model.onnx, used when the
+# `onnx` package needed by quantize_dynamic is not installed
+HUB_QUANTIZED_FILE = "onnx/model_quint8_avx2.onnx"
+
+
+# =====================================================
+# MODEL FILES
+# =====================================================
+def _quantize(fp32_path: str, model_name: str, model_dir: str) -> str:
+    """Dynamic int8 weights (activations quantized at run time), cached."""
+    cache_dir = model_dir or os.path.join(EMBEDDING_CACHE_DIR, model_name.replace("/", "--"))
+    quantized_path = os.path.join(cache_dir, "model_int8.onnx")
+    if os.path.exists(quantized_path):
+        return quantized_path
+
+    try:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+    except ImportError:
+        if model_dir:
+            raise RuntimeError(
+                "EMBEDDING_ONNX_QUANTIZE needs the `onnx` package, "
+                f"or a pre-quantized model at {quantized_path}"
+            )
+        from huggingface_hub import hf_hub_download
+        print(f"⚠️ onnx not installed, using the published {HUB_QUANTIZED_FILE}")
+        return hf_hub_download(model_name, HUB_QUANTIZED_FILE)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = quantized_path + ".tmp"
+    quantize_dynamic(fp32_path, tmp, weight_type=QuantType.QInt8)
+    os.replace(tmp, quantized_path)
+    print(f"✅ Quantized embedding model written to {quantized_path}")
+    return quantized_path
+
+
+def resolve_model_files(model_name: str = EMBEDDING_MODEL, model_dir: str = EMBEDDING_ONNX_PATH,
+                        quantize: bool = EMBEDDING_ONNX_QUANTIZE):
+    """(model .onnx path, tokenizer.json path), local directory or Hub."""
+    if model_dir:
+        tokenizer_path = os.path.join(model_dir, "tokenizer.json")
+        fp32_path = next(
+            (p for p in (os.path.join(model_dir, "model.onnx"),
+                         os.path.join(model_dir, "onnx", "model.onnx")) if os.path.exists(p)),
+            os.path.join(model_dir, "model.onnx")
+        )
+    else:
+        from huggingface_hub import hf_hub_download
+        tokenizer_path = hf_hub_download(model_name, "tokenizer.json")
+        fp32_path = hf_hub_download(model_name, "onnx/model.onnx")
+
+    model_path = _quantize(fp32_path, model_name, model_dir) if quantize else fp32_path
+    return model_path, tokenizer_path
+
+
+# =====================================================
+# EMBEDDINGS
+# =====================================================
+class OnnxEmbeddings(Embeddings):
+    """
+    Sentence-transformers MiniLM on ONNX Runtime (CPU), a drop-in for
+    HuggingFaceEmbeddings: same tokenizer, mean pooling over the attention
+    mask and L2 normalisation as the model's sentence-transformers modules.
+
+    Texts are sorted by token count before batching so each batch is
+    padded only to its own longest text.
+    """
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, model_dir: str = EMBEDDING_ONNX_PATH,
+                 quantize: bool = EMBEDDING_ONNX_QUANTIZE, threads: int = EMBEDDING_THREADS,
+                 batch_size: int = EMBEDDING_BATCH_SIZE, max_length: int = EMBEDDING_MAX_LENGTH,
+                 normalize: bool = True):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_path, tokenizer_path = resolve_model_files(model_name, model_dir, quantize)
+        self.model_path = model_path
+        self.batch_size = batch_size
+        self.normalize = normalize
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.no_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.inter_op_num_threads = 1
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        outputs = [o.name for o in self.session.get_outputs()]
+        self.output_name = "last_hidden_state" if "last_hidden_state" in outputs else outputs[0]
+
+    def _run(self, encodings) -> np.ndarray:
+        width = max(len(e.ids) for e in encodings)
+        ids = np.zeros((len(encodings), width), dtype="int64")
+        mask = np.zeros_like(ids)
+        type_ids = np.zeros_like(ids)
+        for row, e in enumerate(encodings):
+            n = len(e.ids)
+            ids[row, :n] = e.ids
+            mask[row, :n] = e.attention_mask
+            type_ids[row, :n] = e.type_ids
+
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = type_ids
+        hidden = self.session.run([self.output_name], feeds)[0]
+
+        # Mean pooling over real (non-padding) tokens
+        weights = mask[:, :, None].astype("float32")
+        pooled = (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+        if self.normalize:
+            pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        return pooled
+
+    def embed_array(self, texts) -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, 0), dtype="float32")
+        encodings = self.tokenizer.encode_batch(texts)
+        order = np.argsort([len(e.ids) for e in encodings], kind="stable")
+
+        result = None
+        for start in range(0, len(texts), self.batch_size):
+            rows = order[start:start + self.batch_size]
+            pooled = self._run([encodings[i] for i in rows])
+            if result is None:
+                result = np.empty((len(texts), pooled.shape[1]), dtype="float32")
+            result[rows] = pooled
+        return result
+
+    def embed_documents(self, texts):
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text):
+        return self.embed_array([text])[0].tolist()
@@ -0,0 +1,290 @@
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from app.core.config import PIPELINE_MAX_WORKERS, PIPELINE_CACHE_MAX_ENTRIES
+from app.core.metrics import timed_stage
+from app.core.profiling import scoped_thread_name
+
+
+class _Skip:
+    """Output of a stage that decided downstream work must not run."""
+
+    def __repr__(self):
+        return "SKIP"
+
+
+# A stage returning SKIP for an output makes every stage that consumes it
+# (transitively) skip as well; independent branches still run.
+SKIP = _Skip()
+
+
+# =====================================================
+# FINGERPRINTS
+# =====================================================
+def _digest(*parts) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(str(part).encode())
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def fingerprint_value(value) -> str:
+    """Fingerprint of a plain external input (str, number, None, tuple)."""
+    if value is None or isinstance(value, (str, int, float, bool, tuple)):
+        return _digest(type(value).__name__, repr(value))
+    raise TypeError(
+        f"Cannot fingerprint {type(value).__name__}; pass its fingerprint explicitly"
+    )
+
+
+def file_fingerprint(path: str, chunk_bytes: int = 1 << 20) -> str:
+    """Content hash, so re-uploading the same file reuses cached stages."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_bytes), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# =====================================================
+# STAGE OUTPUT CACHE
+# =====================================================
+class StageCache:
+    """Thread-safe LRU of stage outputs keyed by the stage fingerprint."""
+
+    def __init__(self, max_entries: int = PIPELINE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            outputs = self._entries.get(key)
+            if outputs is None:
+                return None
+            self._entries.move_to_end(key)
+        # Copies: cached results end up in (mutable) API responses
+        return copy.deepcopy(outputs)
+
+    def put(self, key: str, outputs: tuple):
+        if self.max_entries <= 0:
+            return
+        outputs = copy.deepcopy(outputs)
+        with self._lock:
+            self._entries[key] = outputs
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+STAGE_CACHE = StageCache()
+
+
+# =====================================================
+# STAGES + EXECUTOR
+# =====================================================
+class Stage:
+    """
+    A named pipeline step: `func(**inputs)` returns one value per name in
+    `outputs` (a tuple when there are several).
+
+    Only `cacheable` stages (deterministic, small outputs) are stored in
+    the stage cache; every stage still gets a lineage fingerprint so its
+    consumers can be cached. `pass_timings` hands the run's timings dict
+    to stages that record their own sub-stages.
+    """
+
+    def __init__(self, name: str, func, inputs=(), outputs=(), cacheable: bool = False,
+                 pass_timings: bool = False, version: int = 1):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.cacheable = cacheable
+        self.pass_timings = pass_timings
+        self.version = version
+
+    def __repr__(self):
+        return f"Stage({self.name!r})"
+
+
+class DAGRun:
+    def __init__(self, outputs: dict, executed, cached, skipped):
+        self.outputs = outputs
+        self.executed = executed
+        self.cached = cached
+        self.skipped = skipped
+
+    def summary(self):
+        return {"executed": self.executed, "cached": self.cached, "skipped": self.skipped}
+
+
+class PipelineDAG:
+    def __init__(self, stages):
+        self.stages = list(stages)
+        self.producers = {}
+        for stage in self.stages:
+            for output in stage.outputs:
+                if output in self.producers:
+                    raise ValueError(
+                        f"'{output}' is produced by both {self.producers[output].name} and {stage.name}"
+                    )
+                self.producers[output] = stage
+        self.order = self._topological_order()
+        self.external_inputs = sorted({
+            name for stage in self.stages for name in stage.inputs
+            if name not in self.producers
+        })
+
+    def _topological_order(self):
+        order, state = [], {}
+
+        def visit(stage, path):
+            if state.get(stage.name) == "done":
+                return
+            if state.get(stage.name) == "visiting":
+                raise ValueError(f"Cycle in pipeline: {' -> '.join(path + [stage.name])}")
+            state[stage.name] = "visiting"
+            for name in stage.inputs:
+                if name in self.producers:
+                    visit(self.producers[name], path + [stage.name])
+            state[stage.name] = "done"
+            order.append(stage)
+
+        for stage in self.stages:
+            visit(stage, [])
+        return order
+
+    def _fingerprints(self, values: dict, given: dict):
+        """Lineage fingerprints: external inputs are hashed, everything else
+        is derived from the producing stage and its input fingerprints."""
+        fps = {}
+        for name in self.external_inputs:
+            if name in given:
+                fps[name] = given[name]
+            elif name in values:
+                fps[name] = fingerprint_value(values[name])
+            else:
+                raise ValueError(f"Missing pipeline input '{name}'")
+
+        stage_fps = {}
+        for stage in self.order:
+            stage_fp = _digest(stage.name, stage.version, *(fps[name] for name in stage.inputs))
+            stage_fps[stage.name] = stage_fp
+            for output in stage.outputs:
+                fps[output] = _digest(stage_fp, output)
+        return stage_fps
+
+    def _plan(self, values: dict, targets, stage_fps, cache):
+        """Stages to execute, walking back from `targets`. Outputs already
+        in `values` or found in the cache cut the walk short."""
+        needed = set(targets)
+        to_run, cached = [], []
+        for stage in reversed(self.order):
+            if not any(o in needed and o not in values for o in stage.outputs):
+                continue
+            hit = cache.get(stage_fps[stage.name]) if stage.cacheable else None
+            if hit is not None:
+                values.update(zip(stage.outputs, hit))
+                cached.append(stage.name)
+                continue
+            to_run.append(stage)
+            needed.update(stage.inputs)
+        return list(reversed(to_run)), list(reversed(cached))
+
+    def _execute(self, stage, kwargs, timings, pipeline):
+        if stage.pass_timings:
+            kwargs["timings"] = timings
+        with timed_stage(pipeline, stage.name, timings):
+            result = stage.func(**kwargs)
+        return result if len(stage.outputs) > 1 else (result,)
+
+    def run(self, inputs: dict, targets=None, fingerprints: dict | None = None,
+            timings: dict | None = None, pipeline: str = "analysis",
+            max_workers: int = PIPELINE_MAX_WORKERS, cache: StageCache | None = STAGE_CACHE):
+        """
+        Runs the stages needed for `targets` (default: every output),
+        starting each as soon as its inputs exist, on a thread pool.
+
+        `inputs` may also pre-fill intermediate outputs, in which case
+        their producers do not run. Intermediate outputs that are neither
+        targets nor inputs are released as soon as their last consumer
+        finishes, so e.g. a preprocessed frame does not outlive training.
+        On a stage error no further stages are started, running ones are
+        awaited and the error is raised.
+        """
+        values = dict(inputs)
+        targets = list(targets) if targets is not None else list(self.producers)
+        cache = cache or StageCache(max_entries=0)
+
+        stage_fps = self._fingerprints(values, fingerprints or {})
+        pending, cached = self._plan(values, targets, stage_fps, cache)
+        executed, skipped = [], []
+        error = None
+
+        keep = set(targets) | set(inputs)
+        consumers = {}
+        for stage in pending:
+            for name in stage.inputs:
+                consumers[name] = consumers.get(name, 0) + 1
+
+        def release(stage):
+            for name in stage.inputs:
+                consumers[name] -= 1
+            for name in stage.inputs + stage.outputs:
+                if not consumers.get(name) and name not in keep:
+                    values.pop(name, None)
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=scoped_thread_name("pipeline")) as pool:
+            running = {}
+            while pending or running:
+                # Submit (or skip) everything whose inputs are available
+                progressed = True
+                while progressed and error is None:
+                    progressed = False
+                    for stage in list(pending):
+                        if not all(name in values for name in stage.inputs):
+                            continue
+                        pending.remove(stage)
+                        progressed = True
+                        if any(values[name] is SKIP for name in stage.inputs):
+                            values.update((output, SKIP) for output in stage.outputs)
+                            skipped.append(stage.name)
+                            release(stage)
+                            continue
+                        kwargs = {name: values[name] for name in stage.inputs}
+                        future = pool.submit(self._execute, stage, kwargs, timings, pipeline)
+                        running[future] = stage
+
+                if not running:
+                    if pending and error is None:
+                        raise RuntimeError(
+                            f"Unsatisfiable stages: {', '.join(s.name for s in pending)}"
+                        )
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        error = error or e
+                        continue
+                    values.update(zip(stage.outputs, result))
+                    executed.append(stage.name)
+                    if stage.cacheable and not any(r is SKIP for r in result):
+                        cache.put(stage_fps[stage.name], result)
+                    release(stage)
+
+        if error is not None:
+            raise error
+
+        return DAGRun(values, executed, cached, skipped)
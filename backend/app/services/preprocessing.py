@@ -2,44 +2,82 @@ import pandas as pd
 import numpy as np
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.preprocessing import OneHotEncoder, StandardScaler, FunctionTransformer
 from sklearn.impute import SimpleImputer
 import inspect
+from app.services.sketches import KLLSketch, resolve_stats_mode
+from app.services.dtype_optimizer import NUMERIC_DTYPES, CATEGORICAL_DTYPES
 
 
-def detect_outliers_iqr(series: pd.Series):
-    """Detect outliers using IQR (safe & explainable)."""
-    q1 = series.quantile(0.25)
-    q3 = series.quantile(0.75)
+def detect_outliers_iqr(series: pd.Series, mode: str | None = None, sketch: KLLSketch | None = None):
+    """
+    Detect outliers using IQR (safe & explainable).
+
+    In approximate mode the quartiles come from `sketch`, the column's
+    KLL sketch the dataset profile has already built, so no sort of the
+    column is needed; without one they are exact. The count itself is a
+    linear scan either way.
+    """
+    approximate = sketch is not None and resolve_stats_mode(len(series), mode) == "approximate"
+
+    if approximate:
+        q1, q3 = sketch.quantile([0.25, 0.75])
+    else:
+        q1 = series.quantile(0.25)
+        q3 = series.quantile(0.75)
     iqr = q3 - q1
 
     lower = q1 - 1.5 * iqr
     upper = q3 + 1.5 * iqr
 
-    return {
+    report = {
         "lower_bound": float(lower),
         "upper_bound": float(upper),
         "outlier_count": int(((series < lower) | (series > upper)).sum())
     }
+    if approximate:
+        report["quantile_rank_error"] = round(sketch.rank_error, 4)
+    return report
 
 
-def preprocess_dataset(df: pd.DataFrame, target: str | None = None):
+def as_model_matrix(array) -> np.ndarray:
+    """float32, C-contiguous: half the memory of float64, row slices stay contiguous."""
+    if isinstance(array, (pd.DataFrame, pd.Series)):
+        # (nullable Int64 / Float64 columns hold pd.NA)
+        array = array.to_numpy(dtype=np.float32, na_value=np.nan)
+    return np.ascontiguousarray(array, dtype=np.float32)
+
+
+def feature_frame(df: pd.DataFrame, columns) -> pd.DataFrame:
+    """`df[columns]` without copying the column data (drop / [] copy it)."""
+    return pd.DataFrame({c: df[c] for c in columns}, copy=False)
+
+
+def preprocess_dataset(df: pd.DataFrame, target: str | None = None, fit: bool = True,
+                       profile=None):
     """
     Explainable AutoML preprocessing with outlier diagnostics.
+
+    With fit=False the ColumnTransformer is returned unfitted and
+    X_processed is None, so supervised evaluation can fit it per fold
+    on training rows only (see transform_cache.FoldTransformCache).
+    `profile` (the dataset's DatasetProfile) supplies the quantile
+    sketches for approximate outlier bounds.
     """
 
     # -------------------------------
     # 1. Separate features & target
     # -------------------------------
+    # (views: the transformer below never writes into its input)
     if target and target in df.columns:
-        X = df.drop(columns=[target])
+        X = feature_frame(df, [c for c in df.columns if c != target])
         y = df[target]
     else:
-        X = df.copy()
+        X = feature_frame(df, df.columns)
         y = None
 
-    numeric_cols = X.select_dtypes(include=["int64", "float64"]).columns.tolist()
-    categorical_cols = X.select_dtypes(include=["object", "category", "bool"]).columns.tolist()
+    numeric_cols = X.select_dtypes(include=NUMERIC_DTYPES).columns.tolist()
+    categorical_cols = X.select_dtypes(include=CATEGORICAL_DTYPES).columns.tolist()
 
     if not numeric_cols and not categorical_cols:
         raise ValueError("No valid columns found for preprocessing")
@@ -49,23 +87,28 @@ def preprocess_dataset(df: pd.DataFrame, target: str | None = None):
     # -------------------------------
     outlier_report_before = {}
     for col in numeric_cols:
-        stats = detect_outliers_iqr(X[col].dropna())
+        sketch = profile.quantiles.get(col) if profile is not None else None
+        stats = detect_outliers_iqr(X[col].dropna(), sketch=sketch)
         outlier_report_before[col] = stats
 
     # -------------------------------
     # 3. Build preprocessing pipelines
     # -------------------------------
+    # Numeric columns are cast to float32 once and then imputed and scaled
+    # in place; one-hot columns are float32 too, so the stacked matrix is
+    # never materialised as float64
     transformers = []
 
     if numeric_cols:
         numeric_pipeline = Pipeline(steps=[
-            ("imputer", SimpleImputer(strategy="median")),
-            ("scaler", StandardScaler())
+            ("float32", FunctionTransformer(as_model_matrix, feature_names_out="one-to-one")),
+            ("imputer", SimpleImputer(strategy="median", copy=False)),
+            ("scaler", StandardScaler(copy=False))
         ])
         transformers.append(("num", numeric_pipeline, numeric_cols))
 
     if categorical_cols:
-        encoder_kwargs = {"handle_unknown": "ignore"}
+        encoder_kwargs = {"handle_unknown": "ignore", "dtype": np.float32}
         sig = inspect.signature(OneHotEncoder)
         if "sparse_output" in sig.parameters:
             encoder_kwargs["sparse_output"] = False
@@ -83,7 +126,7 @@ def preprocess_dataset(df: pd.DataFrame, target: str | None = None):
     # -------------------------------
     # 4. Transform
     # -------------------------------
-    X_processed = preprocessor.fit_transform(X)
+    X_processed = as_model_matrix(preprocessor.fit_transform(X)) if fit else None
 
     # -------------------------------
     # 5. Outlier summary (AFTER)
@@ -124,6 +167,7 @@ def preprocess_dataset(df: pd.DataFrame, target: str | None = None):
     }
 
     preprocessing_meta = {
+    "features": X,
     "numeric_cols": numeric_cols,
     "categorical_cols": categorical_cols,
     "visuals": preprocessing_visuals
@@ -1,3 +1,6 @@
+import pandas as pd
+
+
 def detect_problem_type(df, target_column):
     """
     Determines whether the ML task is:
@@ -38,7 +41,8 @@ def detect_problem_type(df, target_column):
     # --------------------------------------------------
     # 3. Non-numeric targets → CLASSIFICATION
     # --------------------------------------------------
-    if target.dtype in ["object", "bool", "category"]:
+    # (covers object, bool, category and Arrow-backed string dtypes)
+    if not pd.api.types.is_numeric_dtype(target) or pd.api.types.is_bool_dtype(target):
         return "classification"
 
     # --------------------------------------------------
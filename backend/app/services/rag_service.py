@@ -1,34 +1,420 @@
+import csv
+import functools
+import json
 import os
-from langchain_community.document_loaders import CSVLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
-from app.core.config import CHROMA_PATH
-from langchain_ollama import OllamaEmbeddings
-
-def index_dataset_for_rag(file_path: str, dataset_id: str):
-    """Handles the embedding and persistent storage of the dataset."""
-    try:
-        # 1. Load and Split
-        loader = CSVLoader(file_path)
-        docs = loader.load()
-        splitter = RecursiveCharacterTextSplitter(chunk_size=900, chunk_overlap=50)
-        chunks = splitter.split_documents(docs)
-
-        # 2. Initialize Embeddings
-        #**************** hugging face embedding *****************************
-        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        
-
-        #embeddings = OllamaEmbeddings(model="mahonzhan/all-MiniLM-L6-v2")
-        # 3. Persist in ChromaDB
-        vector_db = Chroma.from_documents(
-            documents=chunks, 
-            embedding=embeddings, 
-            persist_directory=CHROMA_PATH,
-            collection_name=dataset_id
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from app.core.config import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_MODEL,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_THREADS,
+    RAG_FIRST_PASS_CHUNKS,
+    RAG_COMMIT_CHUNKS,
+    RAG_PROGRESS_DIR,
+)
+from app.core.metrics import timed_stage
+from app.services.vector_store import add_documents, collection_count, delete_collection
+
+try:
+    import fcntl
+except ImportError:  # not on Windows
+    fcntl = None
+
+# LangChain / sentence-transformers / Chroma are imported inside the
+# functions below: together they take seconds to import, and the API
+# process must answer health checks before any of them are needed.
+
+
+def _splitter():
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    return RecursiveCharacterTextSplitter(chunk_size=900, chunk_overlap=50)
+
+
+def _read_rows(file_path: str):
+    """
+    (position, header, values) of every CSV row, numbered like
+    csv.DictReader (blank lines skipped); only parsed, so rows that are
+    not needed cost next to nothing.
+    """
+    with open(file_path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        position = 0
+        for values in reader:
+            if values:
+                yield position, header, values
+                position += 1
+
+
+def _row_chunks(file_path: str, position: int, header, values, splitter):
+    # The document langchain's CSVLoader builds for this row (a
+    # csv.DictReader row: short rows padded with None, surplus values
+    # under the None key), split
+    from langchain_core.documents import Document
+
+    row = dict(zip(header, values))
+    if len(values) > len(header):
+        row[None] = values[len(header):]
+    for key in header[len(values):]:
+        row[key] = None
+    content = "\n".join(
+        f"{k.strip() if k is not None else k}: "
+        f"{v.strip() if isinstance(v, str) else ','.join(map(str.strip, v)) if isinstance(v, list) else v}"
+        for k, v in row.items()
+    )
+    doc = Document(page_content=content, metadata={"source": str(file_path), "row": position})
+    return splitter.split_documents([doc])
+
+
+def iter_row_chunks(file_path: str, start: int = 0, stop: int | None = None, skip=()):
+    """
+    Lazily yields (row position, chunks) for rows start .. stop - 1 of
+    the CSV, leaving out the positions in `skip`. Rows outside that range
+    are only parsed, never turned into documents or split.
+    """
+    splitter = _splitter()
+    for position, header, values in _read_rows(file_path):
+        if stop is not None and position >= stop:
+            break
+        if position >= start and position not in skip:
+            yield position, _row_chunks(file_path, position, header, values, splitter)
+
+
+def load_csv_chunks(file_path: str):
+    """Every chunk of the CSV (what CSVLoader + the splitter produce)."""
+    return [chunk for _, chunks in iter_row_chunks(file_path) for chunk in chunks]
+
+
+def _number(value) -> str:
+    if value is None:
+        return "n/a"
+    return f"{value:,.0f}" if abs(value) >= 1e4 else f"{value:.4g}"
+
+
+def summary_chunks(file_path: str, dataset_id: str, analysis: dict | None = None):
+    """
+    A plain-text description of the dataset (size, and per column its
+    type, range or most common values, distinct and missing counts), so
+    general questions find an answer before the rows are indexed.
+
+    Built from `analysis` (analyze_dataset() output, exact or sketched);
+    without it from the dataset's DatasetProfile, or the CSV streamed
+    through profile_csv.
+    """
+    from langchain_core.documents import Document
+
+    analysis = analysis or _profile_analysis(file_path, dataset_id)
+    distributions = analysis["numeric_distributions"]
+    top_values = analysis["categorical_distributions"]
+    unique = analysis["unique_counts"]
+    missing = analysis["missing_values"]
+
+    columns = [str(col) for col in analysis["column_names"]]
+    lines = [f"Dataset summary: {analysis['rows']} rows, {len(columns)} columns ({', '.join(columns)})."]
+    for col in analysis["column_names"]:
+        parts = []
+        if col in distributions:
+            d = distributions[col]
+            parts.append(
+                f"numeric, min {_number(d['min'])}, median {_number(d['median'])}, "
+                f"mean {_number(d['mean'])}, max {_number(d['max'])}"
+            )
+        elif col in top_values:
+            common = ", ".join(f"{value} ({count})" for value, count in top_values[col].items())
+            parts.append(f"categorical, most common: {common}")
+        if col in unique:
+            parts.append(f"about {unique[col]} distinct values")
+        if missing.get(col):
+            parts.append(f"{missing[col]} missing")
+        lines.append(f"Column {col}: {'; '.join(parts)}.")
+
+    metadata = {"source": file_path, "section": "summary"}
+    return [Document(page_content=text, metadata=dict(metadata))
+            for text in _splitter().split_text("\n".join(lines))]
+
+
+def _profile_analysis(file_path: str, dataset_id: str) -> dict:
+    from app.services.dataset_profile import get_profile, profile_csv
+
+    profile = get_profile(dataset_id) or profile_csv(file_path)
+    return profile.analysis_view(k=5)
+
+
+def sample_positions(n_rows: int, size: int = RAG_FIRST_PASS_CHUNKS):
+    """`size` row positions spread evenly over the file (start, middle and end rows alike)."""
+    if n_rows <= size:
+        return list(range(n_rows))
+    step = n_rows / size
+    return [int(i * step) for i in range(size)]
+
+
+EMBEDDING_BACKENDS = ("torch", "onnx")
+
+
+@functools.lru_cache(maxsize=1)
+def get_embeddings():
+    """The embedding model (EMBEDDING_BACKEND) is loaded once per process and shared."""
+    if EMBEDDING_BACKEND not in EMBEDDING_BACKENDS:
+        raise ValueError(
+            f"Unknown embedding backend '{EMBEDDING_BACKEND}'. "
+            f"Choose one of: {', '.join(EMBEDDING_BACKENDS)}"
         )
+
+    if EMBEDDING_BACKEND == "onnx":
+        from app.services.onnx_embeddings import OnnxEmbeddings
+        return OnnxEmbeddings()
+
+    #**************** hugging face embedding *****************************
+    from langchain_huggingface import HuggingFaceEmbeddings
+    if EMBEDDING_THREADS:
+        import torch
+        torch.set_num_threads(EMBEDDING_THREADS)
+    return HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL,
+        encode_kwargs={"batch_size": EMBEDDING_BATCH_SIZE}
+    )
+    #return OllamaEmbeddings(model="mahonzhan/all-MiniLM-L6-v2")
+
+
+def embed_and_store(chunks, dataset_id: str, timings: dict | None = None,
+                    expected_count: int | None = None):
+    """
+    Embeds `chunks` and writes them to the dataset's vector collection
+    (timed separately). `expected_count` is the size the collection is
+    heading for when it is written in batches.
+    """
+    embeddings = get_embeddings()
+
+    with timed_stage("rag", "embedding", timings):
+        vectors = embeddings.embed_documents([chunk.page_content for chunk in chunks])
+
+    with timed_stage("rag", "vector_write", timings):
+        add_documents(dataset_id, chunks, vectors, expected_count)
+
+
+# =====================================================
+# PROGRESS
+# =====================================================
+# One JSON file per dataset, replaced atomically after every committed
+# batch: readable from the API process while a job worker indexes
+# (JOB_ISOLATION=process), and the resume point of an interrupted index.
+# Updates are read-modify-write under an flock on a side file, so an
+# index and an append in different worker processes cannot lose each
+# other's counts.
+_progress_lock = threading.Lock()
+
+
+def _progress_path(dataset_id: str) -> str:
+    return os.path.join(RAG_PROGRESS_DIR, f"{dataset_id}.json")
+
+
+def _file_stamp(path: str) -> str:
+    # The app only ever appends to a dataset file, which changes its size
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _load_progress(dataset_id: str):
+    try:
+        with open(_progress_path(dataset_id)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+@contextmanager
+def _progress_locked(dataset_id: str):
+    """Exclusive access to the dataset's progress, across threads and processes."""
+    with _progress_lock:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(RAG_PROGRESS_DIR, exist_ok=True)
+        with open(_progress_path(dataset_id) + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _save_progress(dataset_id: str, progress: dict):
+    """Replaces the progress file atomically (call under _progress_locked)."""
+    total = progress["total_chunks"]
+    progress["percent"] = round(100 * progress["indexed_chunks"] / total, 1) if total else 100.0
+    progress["updated_at"] = time.time()
+    os.makedirs(RAG_PROGRESS_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f"{dataset_id}.", suffix=".tmp", dir=RAG_PROGRESS_DIR)
+    with os.fdopen(fd, "w") as f:
+        json.dump(progress, f)
+    os.replace(tmp, _progress_path(dataset_id))
+
+
+def _advance(dataset_id: str, indexed: int = 0, total: int = 0, **fields):
+    """Adds to the counters (an index and an append may run side by side)."""
+    with _progress_locked(dataset_id):
+        progress = _load_progress(dataset_id)
+        if progress is None:
+            return None
+        progress["indexed_chunks"] += indexed
+        progress["total_chunks"] += total
+        progress.update(fields)
+        _save_progress(dataset_id, progress)
+        return progress
+
+
+def delete_progress(dataset_id: str):
+    """Forgets the dataset's progress (called whenever its collection is deleted)."""
+    with _progress_locked(dataset_id):
+        for path in (_progress_path(dataset_id), _progress_path(dataset_id) + ".lock"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def rag_progress(dataset_id: str):
+    """{phase, indexed_chunks, total_chunks, percent} of the dataset's index, or None."""
+    progress = _load_progress(dataset_id)
+    if progress is None:
+        return None
+    return {key: progress[key] for key in ("phase", "indexed_chunks", "total_chunks", "percent")}
+
+
+def _resumable(progress, dataset_id: str, stamp: str) -> bool:
+    # Same file, and the collection still holds exactly what was committed
+    # (not evicted, no half-written batch)
+    return (
+        progress is not None
+        and "base_rows" in progress
+        and progress.get("file_stamp") == stamp
+        and collection_count(dataset_id) == progress["indexed_chunks"]
+    )
+
+
+# =====================================================
+# INDEXING
+# =====================================================
+def index_dataset_for_rag(file_path: str, dataset_id: str, timings: dict | None = None,
+                          analysis: dict | None = None, first_pass_only: bool = False):
+    """
+    Handles the embedding and persistent storage of the dataset, in
+    passes: the summary and a row sample first, then the remaining rows
+    in committed batches, recording progress after each.
+
+    The first pass only parses the CSV to pick out the sampled rows, so
+    its cost hardly grows with the file; the stream builds and splits
+    documents lazily from the last committed row. first_pass_only stops
+    after the first pass (the analysis pipeline, so chat works without
+    waiting for every chunk); a later call resumes from the last
+    committed batch. `analysis` (analyze_dataset() output) saves
+    re-reading the CSV for the summary.
+    """
+    try:
+        stamp = _file_stamp(file_path)
+        progress = _load_progress(dataset_id)
+        if not _resumable(progress, dataset_id, stamp):
+            if collection_count(dataset_id):
+                delete_collection(dataset_id)
+            progress = _first_pass(file_path, dataset_id, timings, analysis, stamp)
+
+        if first_pass_only or progress["phase"] == "complete":
+            return True
+
+        # 3. The remaining rows, committed batch by batch. total_chunks
+        #    counted one chunk per row; rows split in several add the rest
+        rows = iter_row_chunks(file_path, start=progress["streamed_rows"],
+                               stop=progress["base_rows"], skip=set(progress["sample"]))
+        batch, batch_rows, last = [], 0, None
+        for position, chunks in rows:
+            batch.extend(chunks)
+            batch_rows += 1
+            last = position
+            if len(batch) >= RAG_COMMIT_CHUNKS:
+                embed_and_store(batch, dataset_id, timings, expected_count=progress["total_chunks"])
+                _advance(dataset_id, indexed=len(batch), total=len(batch) - batch_rows,
+                         streamed_rows=last + 1)
+                batch, batch_rows = [], 0
+        if batch:
+            embed_and_store(batch, dataset_id, timings, expected_count=progress["total_chunks"])
+            _advance(dataset_id, indexed=len(batch), total=len(batch) - batch_rows,
+                     streamed_rows=last + 1)
+        _advance(dataset_id, phase="complete")
         return True
     except Exception as e:
         print(f"RAG Indexing Error: {e}")
-        return False
\ No newline at end of file
+        return False
+
+
+def _first_pass(file_path: str, dataset_id: str, timings, analysis, stamp: str) -> dict:
+    """Embeds the summary and an evenly spaced row sample; returns the new progress."""
+    # 1. Summary (from the analysis or profile, streamed from the CSV
+    #    without either)
+    with timed_stage("rag", "summary", timings):
+        analysis = analysis or _profile_analysis(file_path, dataset_id)
+        summary = summary_chunks(file_path, dataset_id, analysis)
+
+    # 2. Sample: one parse of the file, documents only for sampled rows
+    with timed_stage("rag", "chunking", timings):
+        wanted = set(sample_positions(analysis["rows"]))
+        sampled, base_rows, splitter = [], 0, _splitter()
+        for position, header, values in _read_rows(file_path):
+            base_rows = position + 1
+            if position in wanted:
+                sampled.extend(_row_chunks(file_path, position, header, values, splitter))
+        sample = sorted(position for position in wanted if position < base_rows)
+
+    first = summary + sampled
+    total = len(summary) + base_rows + len(sampled) - len(sample)
+    embed_and_store(first, dataset_id, timings, expected_count=total)
+    progress = {
+        "file_stamp": stamp,
+        "phase": "streaming" if len(sample) < base_rows else "complete",
+        "indexed_chunks": len(first),
+        "total_chunks": total,
+        "sample": sample,
+        # Rows of the file as first indexed: appended rows are embedded
+        # by append_rows_to_rag, never by the stream
+        "base_rows": base_rows,
+        "streamed_rows": 0,
+    }
+    with _progress_locked(dataset_id):
+        _save_progress(dataset_id, progress)
+    print(f"🔎 First RAG pass for {dataset_id}: {len(first)} of "
+          f"{progress['total_chunks']} chunks ({progress['percent']}%)")
+    return progress
+
+
+def append_rows_to_rag(rows_path: str, dataset_id: str, source_path: str, start_row: int,
+                       timings: dict | None = None):
+    """
+    Embeds only the rows in `rows_path` into the existing collection.
+
+    Row metadata is rewritten so appended documents look exactly like the
+    ones a full re-index of `source_path` would have produced.
+    """
+    try:
+        with timed_stage("rag", "chunking", timings):
+            chunks = load_csv_chunks(rows_path)
+            for chunk in chunks:
+                chunk.metadata["source"] = source_path
+                chunk.metadata["row"] = start_row + chunk.metadata.get("row", 0)
+
+        if chunks:
+            progress = _advance(dataset_id, total=len(chunks))
+            expected = progress["total_chunks"] if progress else None
+            for start in range(0, len(chunks), RAG_COMMIT_CHUNKS):
+                batch = chunks[start:start + RAG_COMMIT_CHUNKS]
+                embed_and_store(batch, dataset_id, timings, expected_count=expected)
+                _advance(dataset_id, indexed=len(batch))
+        # The collection now matches the grown file
+        _advance(dataset_id, file_stamp=_file_stamp(source_path))
+        return True
+    except Exception as e:
+        print(f"RAG Append Error: {e}")
+        return False
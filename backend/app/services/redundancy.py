@@ -0,0 +1,222 @@
+import hashlib
+import time
+import numpy as np
+import pandas as pd
+from app.services.dtype_optimizer import CATEGORICAL_DTYPES
+from app.core.config import (
+    REDUNDANCY_NEAR_DUPLICATE_SHARE,
+    REDUNDANCY_NEAR_CONSTANT_SHARE,
+    REDUNDANCY_SIGNATURE_ROWS,
+    REDUNDANCY_MAX_VERIFY_PAIRS,
+)
+
+# Multiplier (FNV-1a 64-bit prime) folding column hashes into row hashes
+_ROW_HASH_PRIME = np.uint64(0x100000001B3)
+
+
+# =====================================================
+# HASHING
+# =====================================================
+def column_hashes(series: pd.Series) -> np.ndarray:
+    """
+    uint64 hash of every value. Numbers are hashed as float64 so an int
+    column and its float copy match; missing values hash alike.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        series = series.astype("float64")
+    return pd.util.hash_pandas_object(series, index=False).to_numpy()
+
+
+def _digest(array: np.ndarray) -> str:
+    return hashlib.blake2b(np.ascontiguousarray(array).tobytes(), digest_size=16).hexdigest()
+
+
+def _fold(row_hashes, hashes):
+    if row_hashes is None:
+        return hashes.copy()
+    row_hashes *= _ROW_HASH_PRIME
+    row_hashes ^= hashes
+    return row_hashes
+
+
+# =====================================================
+# DETECTION
+# =====================================================
+def detect_redundancy(df: pd.DataFrame, target_column: str | None = None,
+                      near_duplicate_share: float = REDUNDANCY_NEAR_DUPLICATE_SHARE,
+                      near_constant_share: float = REDUNDANCY_NEAR_CONSTANT_SHARE,
+                      signature_rows: int = REDUNDANCY_SIGNATURE_ROWS):
+    """
+    Duplicate rows, redundant columns and target leakage in one pass over
+    the columns.
+
+    Each column is hashed once (pd.util.hash_pandas_object) and that array
+    yields: a value fingerprint (exact copies), a fingerprint of its
+    factorized codes (relabelled copies, e.g. yes/no vs 1/0), the top
+    value share (near-constant) and a signature of fixed sampled rows
+    (near-duplicate candidates). The hashes are folded into row hashes with
+    and without the target, so duplicate rows and feature-identical rows
+    with a different target cost two hash-table passes. Only the few
+    near-duplicate candidate pairs are re-hashed to verify agreement.
+
+    Returns (report, duplicate row positions).
+    """
+    start = time.perf_counter()
+    n_rows = len(df)
+    if n_rows == 0:
+        return {"rows": 0}, np.empty(0, dtype="int64")
+    target = target_column if target_column in df.columns else None
+    sample = np.sort(np.random.default_rng(42).choice(
+        n_rows, size=min(signature_rows, n_rows), replace=False
+    ))
+
+    info = {}
+    feature_rows = None
+    for col in df.columns:
+        hashes = column_hashes(df[col])
+        codes, uniques = pd.factorize(hashes)
+        counts = np.bincount(codes)
+        info[col] = {
+            "values": _digest(hashes),
+            "codes": _digest(codes),
+            "n_unique": int(len(uniques)),
+            "top_share": float(counts.max() / n_rows),
+            "signature": hashes[sample],
+        }
+        if col != target:
+            feature_rows = _fold(feature_rows, hashes)
+        else:
+            target_hashes = hashes
+
+    # ---------------- ROWS ----------------
+    if feature_rows is None:  # only the target column
+        feature_rows = np.zeros(n_rows, dtype="uint64")
+    duplicated = pd.Series(feature_rows).duplicated().to_numpy()
+    if target is not None:
+        full_rows = _fold(feature_rows.copy(), target_hashes)
+        feature_duplicated = duplicated
+        duplicated = pd.Series(full_rows).duplicated().to_numpy()
+        conflicting_rows = int(feature_duplicated.sum() - duplicated.sum())
+    else:
+        conflicting_rows = 0
+    duplicate_rows = np.flatnonzero(duplicated)
+
+    # ---------------- COLUMNS ----------------
+    constant = [c for c, i in info.items() if i["n_unique"] <= 1 and c != target]
+    near_constant = [
+        {"column": c, "top_share": round(i["top_share"], 4)}
+        for c, i in info.items()
+        if i["n_unique"] > 1 and i["top_share"] >= near_constant_share and c != target
+    ]
+    # (Nearly) unique-per-row text columns only inflate the one-hot width
+    distinct_rows = n_rows - duplicate_rows.size
+    categorical = set(df.select_dtypes(include=CATEGORICAL_DTYPES).columns)
+    identifiers = [
+        c for c, i in info.items()
+        if i["n_unique"] >= 0.95 * distinct_rows and c in categorical and c != target
+    ]
+
+    duplicates = []   # (column, duplicate_of, kind, agreement)
+    first_by_values, first_by_codes = {}, {}
+    for col, i in info.items():
+        if i["n_unique"] <= 1:
+            continue
+        if i["values"] in first_by_values:
+            duplicates.append((col, first_by_values[i["values"]], "exact", 1.0))
+            continue
+        first_by_values[i["values"]] = col
+        # Mostly-unique columns all have codes ~0..n-1: a bijection between
+        # them says nothing
+        if i["n_unique"] <= n_rows // 2:
+            if i["codes"] in first_by_codes:
+                duplicates.append((col, first_by_codes[i["codes"]], "relabeled", 1.0))
+                continue
+            first_by_codes[i["codes"]] = col
+
+    duplicates.extend(_near_duplicates(df, info, duplicates, near_duplicate_share,
+                                       near_constant_share, target))
+
+    leakage, column_duplicates = [], []
+    for col, other, kind, agreement in duplicates:
+        entry = {"column": col, "duplicate_of": other, "kind": kind,
+                 "agreement": round(agreement, 4)}
+        if target in (col, other):
+            leaked = other if col == target else col
+            leakage.append({"column": leaked, "kind": kind, "agreement": entry["agreement"]})
+        else:
+            column_duplicates.append(entry)
+
+    droppable = {c: "constant" for c in constant}
+    droppable.update({c: "identifier" for c in identifiers})
+    droppable.update({
+        d["column"]: f"{d['kind']} duplicate of {d['duplicate_of']}"
+        for d in column_duplicates if d["kind"] != "near"
+    })
+    droppable.update({l["column"]: f"{l['kind']} copy of the target" for l in leakage})
+
+    report = {
+        "rows": n_rows,
+        "duplicate_rows": int(duplicate_rows.size),
+        "duplicate_row_share": round(duplicate_rows.size / n_rows, 4),
+        "conflicting_rows": conflicting_rows,
+        "constant_columns": constant,
+        "near_constant_columns": near_constant,
+        "identifier_columns": identifiers,
+        "duplicate_columns": column_duplicates,
+        "target_leakage": leakage,
+        "droppable_columns": droppable,
+        "unique_counts": {c: i["n_unique"] for c, i in info.items()},
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    return report, duplicate_rows
+
+
+def _near_duplicates(df, info, found, share, near_constant_share, target):
+    """
+    Column pairs agreeing on at least `share` of the rows. Candidates come
+    from the sampled-row signatures; each is verified on every row.
+    Near-constant columns agree with each other trivially and are skipped.
+    """
+    seen = {frozenset((c, o)) for c, o, _, _ in found}
+    columns = [
+        c for c, i in info.items()
+        if 1 < i["n_unique"] and i["top_share"] < near_constant_share
+        and c not in {col for col, _, _, _ in found}
+    ]
+    # Target first so leakage pairs read (target, feature)
+    if target in columns:
+        columns.remove(target)
+        columns.insert(0, target)
+    if len(columns) < 2:
+        return []
+
+    signatures = np.stack([info[c]["signature"] for c in columns])
+    # Sampling noise: a pair at exactly `share` can show a little less
+    margin = 3 * np.sqrt(share * (1 - share) / signatures.shape[1]) + 1 / signatures.shape[1]
+    candidates = []
+    for a in range(len(columns) - 1):
+        agreement = (signatures[a + 1:] == signatures[a]).mean(axis=1)
+        for offset in np.flatnonzero(agreement >= share - margin):
+            b = a + 1 + offset
+            if frozenset((columns[a], columns[b])) not in seen:
+                candidates.append((agreement[offset], columns[a], columns[b]))
+
+    results = []
+    for _, a, b in sorted(candidates, reverse=True)[:REDUNDANCY_MAX_VERIFY_PAIRS]:
+        agreement = float((column_hashes(df[a]) == column_hashes(df[b])).mean())
+        if agreement >= share:
+            first, second = (a, b) if a == target else (b, a) if b == target else (a, b)
+            results.append((second, first, "near", agreement))
+    return results
+
+
+# =====================================================
+# APPLY (before preprocessing)
+# =====================================================
+def drop_duplicate_rows(df: pd.DataFrame, duplicate_rows) -> pd.DataFrame:
+    """Copy of `df` without the rows at `duplicate_rows` (later copies)."""
+    if duplicate_rows is None or not len(duplicate_rows):
+        return df
+    keep = np.ones(len(df), dtype=bool)
+    keep[duplicate_rows] = False
+    return df.iloc[keep]
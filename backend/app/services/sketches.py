@@ -0,0 +1,309 @@
+import math
+import numpy as np
+import pandas as pd
+from app.core.config import STATS_MODE, STATS_APPROX_MIN_ROWS
+
+
+# =====================================================
+# MOMENTS (Welford / Chan parallel update)
+# =====================================================
+class MomentSketch:
+    """
+    Streaming count / mean / variance / skewness / min / max.
+
+    Updates use the Welford recurrences and `merge` uses the pairwise
+    formulas of Chan et al., so sketches built on separate chunks or
+    workers combine into exactly the statistics of the concatenated data.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype="float64")
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+
+        # Summarise the chunk with vectorised numpy, then merge it in
+        chunk = MomentSketch()
+        chunk.n = int(values.size)
+        chunk.mean = float(values.mean())
+        delta = values - chunk.mean
+        sq = delta * delta
+        chunk.m2 = float(sq.sum())
+        chunk.m3 = float(np.dot(sq, delta))
+        chunk.min = float(values.min())
+        chunk.max = float(values.max())
+        return self.merge(chunk)
+
+    def merge(self, other: "MomentSketch"):
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.n, self.mean, self.m2, self.m3 = other.n, other.mean, other.m2, other.m3
+            self.min, self.max = other.min, other.max
+            return self
+
+        n_a, n_b = self.n, other.n
+        n = n_a + n_b
+        delta = other.mean - self.mean
+
+        m3 = (
+            self.m3 + other.m3
+            + delta ** 3 * n_a * n_b * (n_a - n_b) / n ** 2
+            + 3 * delta * (n_a * other.m2 - n_b * self.m2) / n
+        )
+        m2 = self.m2 + other.m2 + delta ** 2 * n_a * n_b / n
+
+        self.mean += delta * n_b / n
+        self.m2, self.m3, self.n = m2, m3, n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        # Sample variance (ddof=1), matching pandas
+        return self.m2 / (self.n - 1) if self.n > 1 else math.nan
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance) if self.n > 1 else math.nan
+
+    @property
+    def skewness(self):
+        # Adjusted Fisher-Pearson coefficient, matching pandas Series.skew
+        n = self.n
+        if n < 3 or self.m2 == 0:
+            return math.nan
+        g1 = math.sqrt(n) * self.m3 / self.m2 ** 1.5
+        return g1 * math.sqrt(n * (n - 1)) / (n - 2)
+
+
+# =====================================================
+# QUANTILES (KLL sketch)
+# =====================================================
+class KLLSketch:
+    """
+    KLL quantile sketch (Karnin, Lang & Liberty, 2016).
+
+    Keeps a hierarchy of compactors; an item on level h stands for 2**h
+    input values. Memory is O(k) regardless of stream length, and two
+    sketches merge by concatenating their levels and re-compacting.
+    """
+
+    def __init__(self, k: int = 200, seed: int = 42):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0, dtype="float64")]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values):
+        values = np.asarray(values, dtype="float64")
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+        self.n += int(values.size)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch"):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype="float64"))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            items = self.levels[h]
+            if items.size > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype="float64"))
+
+                items = np.sort(items)
+                # An odd leftover stays behind so total weight is preserved
+                keep = items[-1:] if items.size % 2 else items[:0]
+                pairs = items[: items.size - keep.size]
+                promoted = pairs[int(self._rng.integers(2))::2]
+
+                self.levels[h] = keep
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+    def _weighted_items(self):
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(items.size, 2 ** h, dtype="float64")
+            for h, items in enumerate(self.levels)
+        ])
+        order = np.argsort(values, kind="mergesort")
+        return values[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        """Approximate quantile(s), q in [0, 1]."""
+        if self.n == 0:
+            return math.nan
+        values, cum = self._weighted_items()
+        targets = np.atleast_1d(np.asarray(q, dtype="float64")) * cum[-1]
+        idx = np.minimum(np.searchsorted(cum, targets, side="left"), values.size - 1)
+        result = values[idx]
+        return float(result[0]) if np.ndim(q) == 0 else result
+
+    def rank(self, value) -> float:
+        """Approximate fraction of values strictly below `value`."""
+        if self.n == 0:
+            return math.nan
+        values, cum = self._weighted_items()
+        pos = np.searchsorted(values, value, side="left")
+        return float(cum[pos - 1] / cum[-1]) if pos > 0 else 0.0
+
+    @property
+    def rank_error(self) -> float:
+        # Empirical normalised rank error (99% confidence), as published
+        # for the Apache DataSketches KLL implementation.
+        return 2.296 / self.k ** 0.9723
+
+
+# =====================================================
+# CARDINALITY (HyperLogLog)
+# =====================================================
+def hash_values(values) -> np.ndarray:
+    """64-bit hashes of the non-null values, vectorised through pandas."""
+    series = pd.Series(values)
+    series = series[series.notna()]
+    return pd.util.hash_pandas_object(series, index=False).to_numpy(dtype="uint64")
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counter (Flajolet et al., 2007) with 2**p
+    registers. Merging is an element-wise max of the registers.
+    """
+
+    def __init__(self, p: int = 14):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype="uint8")
+
+    def update(self, values):
+        hashes = hash_values(values)
+        if hashes.size == 0:
+            return self
+
+        idx = (hashes >> np.uint64(64 - self.p)).astype("int64")
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+
+        # Position of the leftmost 1-bit in the remaining (64 - p) bits.
+        # frexp is exact here because rest < 2**53.
+        _, bit_length = np.frexp(rest.astype("float64"))
+        rho = (64 - self.p) - bit_length + 1
+
+        np.maximum.at(self.registers, idx, rho.astype("uint8"))
+        return self
+
+    def merge(self, other: "HyperLogLog"):
+        if other.p != self.p:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype("int64")))
+
+        # Small-range correction (linear counting)
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    @property
+    def relative_error(self) -> float:
+        # Three standard errors (1.04 / sqrt(m) each), ~99.7% of estimates
+        return 3 * 1.04 / math.sqrt(self.m)
+
+
+# =====================================================
+# HEAVY HITTERS (Space-Saving)
+# =====================================================
+class SpaceSaving:
+    """
+    Space-Saving top-k counter (Metwally et al., 2005) in its mergeable
+    form (Agarwal et al., 2012). Stored counts overestimate the true
+    counts by at most n / capacity.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.n = 0
+        self.counts = {}
+
+    def _floor(self) -> int:
+        # Upper bound on the count of any item that is not stored
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def update(self, values):
+        counts = pd.Series(values).value_counts(dropna=True)
+        counts = counts[counts > 0]  # unused categories of a `category` column
+        if counts.empty:
+            return self
+
+        # Exact counts for the chunk, truncated to capacity, then merged
+        chunk = SpaceSaving(self.capacity)
+        chunk.n = int(counts.sum())
+        chunk.counts = {k: int(v) for k, v in counts.head(self.capacity).items()}
+        return self.merge(chunk)
+
+    def merge(self, other: "SpaceSaving"):
+        floor_a, floor_b = self._floor(), other._floor()
+        merged = {
+            key: self.counts.get(key, floor_a) + other.counts.get(key, floor_b)
+            for key in self.counts.keys() | other.counts.keys()
+        }
+        top = sorted(merged.items(), key=lambda kv: kv[1], reverse=True)
+        self.counts = dict(top[: self.capacity])
+        self.n += other.n
+        return self
+
+    def top(self, k: int = 3):
+        return sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[:k]
+
+    @property
+    def max_count_error(self) -> int:
+        return int(math.ceil(self.n / self.capacity))
+
+
+# =====================================================
+# MODE SELECTION
+# =====================================================
+def resolve_stats_mode(n_rows: int, mode: str | None = None) -> str:
+    """
+    Returns "exact" or "approximate" for a given row count.
+
+    `mode` defaults to STATS_MODE; "auto" switches to sketches once the
+    data has at least STATS_APPROX_MIN_ROWS rows.
+    """
+    mode = (mode or STATS_MODE).lower()
+    if mode == "auto":
+        return "approximate" if n_rows >= STATS_APPROX_MIN_ROWS else "exact"
+    if mode not in ("exact", "approximate"):
+        raise ValueError(f"Unknown stats mode '{mode}'")
+    return mode
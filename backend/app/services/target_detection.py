@@ -5,7 +5,6 @@ import numpy as np
 try:
     from sklearn.feature_selection import mutual_info_classif, mutual_info_regression
     from sklearn.preprocessing import LabelEncoder
-    from sklearn.impute import SimpleImputer
     _SKLEARN_AVAILABLE = True
 except Exception:
     _SKLEARN_AVAILABLE = False
@@ -79,6 +78,44 @@ def semantic_score(col_name: str) -> int:
     return score
 
 
+# =====================================================
+# COLUMN ROLES
+# =====================================================
+ID_NAME_PATTERN = re.compile(r"(^|[_\s.-])(id|uuid|guid|key)$|^(id|uuid|guid)([_\s.-]|$)", re.I)
+CAMEL_ID_PATTERN = re.compile(r"[a-z0-9](ID|Id)$")  # CustomerID, orderId
+
+
+def column_role(s: pd.Series, name: str = "", n_unique: int | None = None):
+    """
+    "constant", "identifier" (unique per row: keys, row numbers, IDs) or
+    "free_text" (long, mostly distinct strings) for columns that carry no
+    reusable signal, neither as a target nor as a feature; None otherwise.
+    Continuous numeric columns are all-unique too and are not identifiers.
+    """
+    n = len(s)
+    if n_unique is None:
+        n_unique = s.nunique(dropna=False)
+    if n_unique <= 1:
+        return "constant"
+    ratio = n_unique / max(1, n)
+
+    if pd.api.types.is_numeric_dtype(s):
+        # Row numbers / surrogate keys: unique, increasing integers
+        if pd.api.types.is_integer_dtype(s) and n_unique == n and s.is_monotonic_increasing:
+            return "identifier"
+    elif ratio > 0.5:
+        sample = s.dropna().head(1000).astype(str)
+        if sample.str.len().mean() > 30 and sample.str.contains(" ").mean() > 0.5:
+            return "free_text"
+        if ratio >= 0.95:
+            return "identifier"
+
+    name = str(name)
+    if ratio >= 0.9 and (ID_NAME_PATTERN.search(name) or CAMEL_ID_PATTERN.search(name)):
+        return "identifier"
+    return None
+
+
 # =====================================================
 # STATISTICAL SCORE
 # =====================================================
@@ -90,6 +127,8 @@ def statistical_score(df: pd.DataFrame, col: str) -> float:
     # Eliminate ID-like columns
     if s.nunique(dropna=False) == n:
         return -1000
+    if column_role(s, col) in ("identifier", "free_text"):
+        return -1000
 
     # Missing values (targets usually dense)
     if s.isnull().mean() < 0.1:
@@ -141,24 +180,21 @@ def detect_target_column(df: pd.DataFrame):
     scores = {}
 
     # ---------------- Prepare MI feature matrix ----------------
+    # One float32 matrix filled column by column: numeric columns with
+    # their median, others as sorted label codes (as LabelEncoder)
     if _SKLEARN_AVAILABLE and df.shape[1] > 1:
-        X_enc = pd.DataFrame()
-        for c in df.columns:
+        X_num = np.empty((n_rows, df.shape[1]), dtype=np.float32)
+        for i, c in enumerate(df.columns):
             s = df[c]
             if pd.api.types.is_numeric_dtype(s):
-                X_enc[c] = s.fillna(s.median() if s.dropna().size else 0)
+                # (may be a view of the frame: fill the copy in X_num)
+                values = s.to_numpy(dtype="float64", na_value=np.nan)
+                X_num[:, i] = values
+                missing = np.isnan(values)
+                if missing.any():
+                    X_num[missing, i] = np.median(values[~missing]) if not missing.all() else 0
             else:
-                try:
-                    X_enc[c] = LabelEncoder().fit_transform(
-                        s.fillna("<NA>").astype(str)
-                    )
-                except Exception:
-                    X_enc[c] = pd.factorize(s.fillna("<NA>").astype(str))[0]
-
-        try:
-            X_num = SimpleImputer(strategy="median").fit_transform(X_enc)
-        except Exception:
-            X_num = X_enc.fillna(-999).values
+                X_num[:, i] = pd.factorize(s.astype(object).fillna("<NA>").astype(str), sort=True)[0]
     else:
         X_num = None
 
@@ -205,7 +241,7 @@ def detect_target_column(df: pd.DataFrame):
                         )
                     else:
                         y_enc = LabelEncoder().fit_transform(
-                            y_col.fillna("<NA>").astype(str)
+                            y_col.astype(object).fillna("<NA>").astype(str)
                         )
                         mi = mutual_info_classif(X_other, y_enc)
 
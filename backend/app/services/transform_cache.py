@@ -0,0 +1,117 @@
+import os
+import shutil
+import tempfile
+import joblib
+import numpy as np
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split, check_cv
+from app.services.preprocessing import as_model_matrix
+from app.core.config import TRANSFORM_CACHE_DIR, TRANSFORM_CACHE_MMAP_BYTES
+
+
+class FoldTransformCache:
+    """
+    Fits the preprocessing ColumnTransformer once per split and shares the
+    transformed arrays between every candidate model.
+
+    Splits are the 80/20 holdout used for the test metrics ("holdout") and
+    the folds of `cv` over the full data (0 .. n_splits - 1), matching what
+    `cross_val_score(model, X, y, cv=cv)` would use. The transformer is only
+    ever fitted on training rows, so no test statistics leak into imputation,
+    scaling or the one-hot vocabulary.
+
+    With `preprocessor=None`, X is taken as already model-ready and only
+    sliced. Every stored matrix is float32 and C-contiguous. Arrays larger than TRANSFORM_CACHE_MMAP_BYTES are dumped to disk and
+    re-opened memory-mapped, so N_models x N_folds reads cost no extra RAM.
+    Splits are transformed on first `get`; `drop` releases one once every
+    model has used it.
+    """
+
+    def __init__(self, X, y, preprocessor, classification: bool,
+                 cv: int = 5, test_size: float = 0.2, random_state: int = 42,
+                 mmap_bytes: int = TRANSFORM_CACHE_MMAP_BYTES):
+        self.X = X
+        self.y = np.asarray(y)
+        self.preprocessor = preprocessor
+        self.mmap_bytes = mmap_bytes
+        self._entries = {}
+        self._dir = None
+        self.fits = 0
+        self.transformers = {}  # fitted transformer per split
+
+        indices = np.arange(len(X))
+        train_idx, test_idx = train_test_split(
+            indices, test_size=test_size, random_state=random_state
+        )
+        self.splits = {"holdout": (train_idx, test_idx)}
+
+        splitter = check_cv(cv, self.y, classifier=classification)
+        for fold, (tr, te) in enumerate(splitter.split(indices, self.y)):
+            self.splits[fold] = (tr, te)
+
+    @property
+    def cv_folds(self):
+        return [key for key in self.splits if key != "holdout"]
+
+    def get(self, key):
+        """Returns (X_train, X_test, y_train, y_test) for a split."""
+        if key not in self._entries:
+            train_idx, test_idx = self.splits[key]
+
+            if self.preprocessor is None:
+                # Already model-ready: just slice
+                X_train, X_test = self._rows(train_idx), self._rows(test_idx)
+            else:
+                transformer = clone(self.preprocessor)
+                X_train = transformer.fit_transform(self._rows(train_idx))
+                X_test = transformer.transform(self._rows(test_idx))
+                self.transformers[key] = transformer
+                self.fits += 1
+
+            self._entries[key] = (
+                self._store(X_train, f"{key}_train"),
+                self._store(X_test, f"{key}_test"),
+            )
+
+        X_train, X_test = self._entries[key]
+        train_idx, test_idx = self.splits[key]
+        return X_train, X_test, self.y[train_idx], self.y[test_idx]
+
+    def drop(self, key):
+        """Releases a split's matrices, fitted transformer and mmap files."""
+        self._entries.pop(key, None)
+        self.transformers.pop(key, None)
+        if self._dir is not None:
+            for part in ("train", "test"):
+                path = os.path.join(self._dir, f"{key}_{part}.joblib")
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _rows(self, idx):
+        return self.X.iloc[idx] if hasattr(self.X, "iloc") else self.X[idx]
+
+    def _store(self, array, name):
+        array = as_model_matrix(array)
+        if array.nbytes < self.mmap_bytes:
+            return array
+
+        if self._dir is None:
+            os.makedirs(TRANSFORM_CACHE_DIR, exist_ok=True)
+            self._dir = tempfile.mkdtemp(prefix="folds_", dir=TRANSFORM_CACHE_DIR)
+
+        path = os.path.join(self._dir, f"{name}.joblib")
+        joblib.dump(array, path)
+        return joblib.load(path, mmap_mode="r")
+
+    def close(self):
+        self._entries.clear()
+        self.transformers.clear()
+        if self._dir is not None:
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
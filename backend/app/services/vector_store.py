@@ -0,0 +1,850 @@
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+import numpy as np
+from app.core.config import (
+    CHROMA_PATH,
+    VECTOR_BACKEND,
+    VECTOR_DTYPE,
+    VECTOR_STORE_PATH,
+    VECTOR_TTL_SECONDS,
+    VECTOR_ORPHAN_GRACE_SECONDS,
+    VECTOR_MAX_COLLECTIONS,
+    VECTOR_METRIC,
+    HNSW_M,
+    HNSW_EF_CONSTRUCTION,
+    HNSW_EF_SEARCH,
+    FAISS_INDEX,
+    FAISS_NLIST,
+    FAISS_NPROBE,
+)
+
+try:
+    import faiss
+    _FAISS_AVAILABLE = True
+except Exception:
+    _FAISS_AVAILABLE = False
+
+VECTOR_BACKENDS = ("chroma", "local", "faiss")
+VECTOR_DTYPES = ("float32", "float16", "int8")
+VECTOR_METRICS = ("cosine", "l2", "ip")
+FAISS_INDEXES = ("flat", "ivf")
+
+
+# =====================================================
+# INDEX CONFIGURATION
+# =====================================================
+def index_config(**overrides) -> dict:
+    """
+    ANN settings from config.py, applied when a collection is created.
+    The metric, HNSW M / ef_construction and the FAISS index type are
+    fixed from then on; search-time knobs (ef_search, nprobe) follow the
+    current configuration. `overrides` is for benchmarks.
+    """
+    config = {
+        "metric": VECTOR_METRIC,
+        "hnsw_m": HNSW_M,
+        "hnsw_ef_construction": HNSW_EF_CONSTRUCTION,
+        "hnsw_ef_search": HNSW_EF_SEARCH,
+        "faiss_index": FAISS_INDEX,
+        "faiss_nlist": FAISS_NLIST,
+        "faiss_nprobe": FAISS_NPROBE,
+    }
+    config.update(overrides)
+    if config["metric"] not in VECTOR_METRICS:
+        raise ValueError(
+            f"Unknown vector metric '{config['metric']}'. Choose one of: {', '.join(VECTOR_METRICS)}"
+        )
+    if config["faiss_index"] not in FAISS_INDEXES:
+        raise ValueError(
+            f"Unknown FAISS index '{config['faiss_index']}'. Choose one of: {', '.join(FAISS_INDEXES)}"
+        )
+    return config
+
+
+_metric_warnings = set()
+
+
+def _warn_metric(collection: str, actual: str, configured: str):
+    # Existing collections keep the metric they were created with
+    if actual != configured and collection not in _metric_warnings:
+        _metric_warnings.add(collection)
+        print(f"⚠️ Collection {collection} uses '{actual}' distance, "
+              f"VECTOR_METRIC is '{configured}' (applies to new collections only)")
+
+
+# =====================================================
+# QUANTIZATION
+# =====================================================
+def quantize(vectors: np.ndarray, dtype: str):
+    """
+    (codes, scales) for float32 / float16 / int8 storage.
+
+    int8 is symmetric per vector: codes = round(v / scale), with
+    scale = max|v| / 127, so each row keeps its own dynamic range.
+    """
+    vectors = np.asarray(vectors, dtype="float32")
+    if dtype == "float32":
+        return vectors, None
+    if dtype == "float16":
+        return vectors.astype("float16"), None
+    if dtype == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype("int8")
+        return codes, scales.astype("float32")
+    raise ValueError(f"Unknown vector dtype '{dtype}'. Choose one of: {', '.join(VECTOR_DTYPES)}")
+
+
+def dequantize(codes: np.ndarray, scales: np.ndarray | None = None) -> np.ndarray:
+    vectors = np.asarray(codes, dtype="float32")
+    return vectors * scales[:, None] if scales is not None else vectors
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _distance(metric: str, dots: np.ndarray, query: np.ndarray, sq_norms, start: int, end: int):
+    """Chroma's distance convention: 1 - cosine, 1 - dot product, squared l2."""
+    if metric == "l2":
+        return sq_norms[start:end] - 2.0 * dots + float(query @ query)
+    return 1.0 - dots
+
+
+def _document(text: str, metadata: dict):
+    from langchain_core.documents import Document
+    return Document(page_content=text, metadata=metadata)
+
+
+def _dir_bytes(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(path) for name in files
+    )
+
+
+# =====================================================
+# LOCAL (QUANTIZED) STORE
+# =====================================================
+class LocalVectorStore:
+    """
+    Flat exact-search store, one directory per collection:
+
+        meta.json     metric, dtype, dim, count, created_at
+        vectors.bin   vectors as float32 / float16 / int8 codes
+                      (unit-normalised for the cosine metric)
+        scales.bin    per-vector scales (int8 only)
+        sq_norms.bin  squared norms of the stored vectors (l2 only)
+        docs.jsonl    one {"text", "metadata"} line per vector
+        offsets.bin   byte offset of each docs.jsonl line
+        access.json   last search / write time (read by eviction)
+
+    The .bin files are headerless row arrays that only grow: a write
+    appends its rows to each of them and commits by replacing meta.json,
+    so a batch costs O(batch) however large the collection is, and readers
+    (which map exactly meta["count"] rows) never see a write in progress.
+    Collections stored as .npy files by earlier versions are read as they
+    are and converted on their next write.
+
+    Search memory-maps the codes and scans them in blocks, so resident
+    memory is the (2-4x smaller) code size rather than float32 vectors.
+    """
+
+    name = "local"
+    block_rows = 16384
+
+    def __init__(self, root: str = VECTOR_STORE_PATH, dtype: str = VECTOR_DTYPE,
+                 config: dict | None = None):
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(
+                f"Unknown vector dtype '{dtype}'. Choose one of: {', '.join(VECTOR_DTYPES)}"
+            )
+        self.root = root
+        self.dtype = dtype
+        self.config = config or index_config()
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _lock(self, collection: str):
+        with self._guard:
+            return self._locks.setdefault(collection, threading.Lock())
+
+    def _path(self, collection: str, name: str = "") -> str:
+        return os.path.join(self.root, collection, name)
+
+    def _meta(self, collection: str):
+        try:
+            with open(self._path(collection, "meta.json")) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        # Collections written before the metric was configurable
+        meta.setdefault("metric", "cosine")
+        return meta
+
+    def _new_meta(self, dim: int, n: int) -> dict:
+        return {
+            "metric": self.config["metric"],
+            "dtype": self.dtype,
+            "dim": dim,
+            "count": 0,
+            "created_at": time.time(),
+            "layout": "append",
+        }
+
+    # ---------------- ROW FILES ----------------
+    def _arrays(self, meta: dict) -> dict:
+        """Row arrays of the collection: name -> (dtype, shape of one row)."""
+        arrays = {"vectors": (meta["dtype"], (meta["dim"],)), "offsets": ("int64", ())}
+        if meta["dtype"] == "int8":
+            arrays["scales"] = ("float32", ())
+        if meta["metric"] == "l2":
+            arrays["sq_norms"] = ("float32", ())
+        return arrays
+
+    def _legacy_rows(self, collection: str, meta: dict, name: str):
+        return np.load(self._path(collection, f"{name}.npy"), mmap_mode="r")[:meta["count"]]
+
+    def _rows(self, collection: str, meta: dict, name: str):
+        """The committed rows of one array, memory-mapped."""
+        if meta.get("layout") != "append":
+            return self._legacy_rows(collection, meta, name)
+        dtype, shape = self._arrays(meta)[name]
+        if not meta["count"]:
+            return np.empty((0,) + shape, dtype=dtype)
+        return np.memmap(self._path(collection, f"{name}.bin"), dtype=dtype, mode="r",
+                         shape=(meta["count"],) + shape)
+
+    def _append_rows(self, collection: str, meta: dict, name: str, array):
+        dtype, shape = self._arrays(meta)[name]
+        row_bytes = np.dtype(dtype).itemsize * int(np.prod(shape, dtype="int64"))
+        with open(self._path(collection, f"{name}.bin"), "ab") as f:
+            # Drop the rows of a write that failed before its commit
+            f.truncate(meta["count"] * row_bytes)
+            f.write(np.ascontiguousarray(array, dtype=dtype).tobytes())
+
+    def _upgrade(self, collection: str, meta: dict):
+        """Rewrites a collection of .npy files as .bin row files (once, on its next write)."""
+        for name in self._arrays(meta):
+            rows = self._legacy_rows(collection, meta, name)
+            with open(self._path(collection, f"{name}.bin"), "wb") as f:
+                f.write(np.ascontiguousarray(rows).tobytes())
+        meta["layout"] = "append"
+
+    def _write_vectors(self, collection: str, meta: dict, vectors: np.ndarray):
+        codes, scales = quantize(vectors, meta["dtype"])
+        if meta["metric"] == "l2":
+            sq_norms = (dequantize(codes, scales) ** 2).sum(axis=1)
+            self._append_rows(collection, meta, "sq_norms", sq_norms)
+        if scales is not None:
+            self._append_rows(collection, meta, "scales", scales)
+        self._append_rows(collection, meta, "vectors", codes)
+
+    def _search_vectors(self, collection: str, meta: dict, query: np.ndarray, k: int):
+        """(row ids, distances) of the k nearest rows, nearest first."""
+        # Only the rows meta["count"] commits: later ones may belong to a
+        # write still in progress
+        codes = self._rows(collection, meta, "vectors")
+        scales = self._rows(collection, meta, "scales") if meta["dtype"] == "int8" else None
+        sq_norms = self._rows(collection, meta, "sq_norms") if meta["metric"] == "l2" else None
+
+        best_ids = np.empty(0, dtype="int64")
+        best = np.empty(0, dtype="float32")
+        for start in range(0, codes.shape[0], self.block_rows):
+            end = start + self.block_rows
+            dots = np.asarray(codes[start:end], dtype="float32") @ query
+            if scales is not None:
+                dots *= scales[start:end]
+            distances = _distance(meta["metric"], dots, query, sq_norms, start, end)
+            best_ids = np.concatenate([best_ids, np.arange(start, start + dots.size)])
+            best = np.concatenate([best, distances])
+            if best.size > k:
+                keep = np.argpartition(best, k - 1)[:k]
+                best_ids, best = best_ids[keep], best[keep]
+
+        order = np.argsort(best)
+        return best_ids[order], best[order]
+
+    def _read_documents(self, collection: str, meta: dict, ids, distances):
+        offsets = self._rows(collection, meta, "offsets")
+        results = []
+        with open(self._path(collection, "docs.jsonl"), "rb") as f:
+            for row, distance in zip(ids, distances):
+                f.seek(int(offsets[row]))
+                record = json.loads(f.readline())
+                results.append(_document(
+                    record["text"], {**record["metadata"], "distance": float(distance)}
+                ))
+        return results
+
+    def add(self, collection: str, texts, metadatas, vectors, expected_count: int | None = None):
+        """
+        Appends documents. `expected_count` is the size the collection is
+        expected to reach (e.g. while a dataset is indexed in batches);
+        the FAISS store sizes its IVF cells from it.
+        """
+        vectors = np.asarray(vectors, dtype="float32")
+        with self._lock(collection):
+            os.makedirs(self._path(collection), exist_ok=True)
+            meta = self._meta(collection) or self._new_meta(int(vectors.shape[1]), len(vectors))
+            if vectors.shape[1] != meta["dim"]:
+                raise ValueError(f"Expected {meta['dim']}-d vectors, got {vectors.shape[1]}-d")
+            _warn_metric(collection, meta["metric"], self.config["metric"])
+            if meta["metric"] == "cosine":
+                vectors = _normalize(vectors)
+            legacy = meta.get("layout") != "append"
+            if legacy:
+                self._upgrade(collection, meta)
+
+            new_offsets = []
+            with open(self._path(collection, "docs.jsonl"), "ab") as f:
+                position = f.tell()
+                for text, metadata in zip(texts, metadatas):
+                    line = json.dumps({"text": text, "metadata": metadata}).encode() + b"\n"
+                    new_offsets.append(position)
+                    f.write(line)
+                    position += len(line)
+
+            self._write_vectors(collection, meta, vectors)
+            self._append_rows(collection, meta, "offsets", np.asarray(new_offsets, dtype="int64"))
+
+            meta["count"] += len(new_offsets)
+            if expected_count:
+                meta["expected_count"] = max(expected_count, meta.get("expected_count", 0))
+            with open(self._path(collection, ".meta.tmp"), "w") as f:
+                json.dump(meta, f)
+            os.replace(self._path(collection, ".meta.tmp"), self._path(collection, "meta.json"))
+
+            if legacy:
+                for name in self._arrays(meta):
+                    path = self._path(collection, f"{name}.npy")
+                    if os.path.exists(path):
+                        os.remove(path)
+
+    def search(self, collection: str, query_vector, k: int):
+        meta = self._meta(collection)
+        if not meta or not meta["count"]:
+            return []
+
+        query = np.asarray(query_vector, dtype="float32")
+        if meta["metric"] == "cosine":
+            query = _normalize(query)
+        ids, distances = self._search_vectors(collection, meta, query, min(k, meta["count"]))
+        return self._read_documents(collection, meta, ids, distances)
+
+    def count(self, collection: str) -> int:
+        meta = self._meta(collection)
+        return meta["count"] if meta else 0
+
+    def delete(self, collection: str):
+        with self._lock(collection):
+            shutil.rmtree(self._path(collection), ignore_errors=True)
+
+    def touch(self, collection: str, when: float):
+        if self._meta(collection) is None:
+            return
+        try:
+            fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=self._path(collection))
+            with os.fdopen(fd, "w") as f:
+                json.dump({"last_access": when}, f)
+            os.replace(tmp, self._path(collection, "access.json"))
+        except OSError:
+            # Deleted meanwhile
+            pass
+
+    def _last_access(self, collection: str, meta: dict) -> float:
+        try:
+            with open(self._path(collection, "access.json")) as f:
+                return json.load(f)["last_access"]
+        except (OSError, ValueError, KeyError):
+            return meta["created_at"]
+
+    def list(self):
+        if not os.path.isdir(self.root):
+            return []
+        collections = []
+        for name in sorted(os.listdir(self.root)):
+            meta = self._meta(name)
+            if meta is None:
+                continue
+            collections.append({
+                "name": name,
+                "created_at": meta["created_at"],
+                "last_access": self._last_access(name, meta),
+                "count": meta["count"],
+                "metric": meta["metric"],
+                "dtype": meta["dtype"],
+                "index": meta.get("index", "flat"),
+                "bytes": _dir_bytes(self._path(name)),
+            })
+        return collections
+
+    def compact(self):
+        """Removes directories without meta.json (interrupted first writes)."""
+        removed = []
+        if os.path.isdir(self.root):
+            for name in os.listdir(self.root):
+                path = self._path(name)
+                if os.path.isdir(path) and self._meta(name) is None and not self._lock(name).locked():
+                    shutil.rmtree(path, ignore_errors=True)
+                    removed.append(name)
+        return {"removed_directories": removed}
+
+
+# =====================================================
+# FAISS STORE (optional dependency)
+# =====================================================
+# FAISS guideline: k-means wants ~39 training points per cell, and gains
+# nothing from more than 256
+_IVF_MIN_POINTS_PER_CELL = 39
+_IVF_MAX_POINTS_PER_CELL = 256
+
+
+class FaissVectorStore(LocalVectorStore):
+    """
+    LocalVectorStore layout (float32 vectors.bin as the source of truth),
+    searched through a FAISS index kept in memory and brought up to date
+    with the rows committed since the last search:
+
+        flat  exact search (IndexFlatIP / IndexFlatL2)
+        ivf   inverted lists: k-means into `nlist` cells, `nprobe` cells
+              scanned per query. Sub-linear search for very large
+              datasets at some recall cost. nlist follows the size the
+              collection is expected to reach (add(expected_count=...),
+              e.g. the RAG progress total), and the cells are trained
+              once 39 * nlist vectors exist, on a sample spread over all
+              of them; until then search is exact. The trained index is
+              saved to index.faiss so other processes and restarts reuse
+              it; later rows are added to it, not retrained.
+
+    Writes only append to vectors.bin, so streaming a dataset in batches
+    never rewrites the index.
+    """
+
+    name = "faiss"
+
+    def __init__(self, root: str = VECTOR_STORE_PATH, config: dict | None = None):
+        if not _FAISS_AVAILABLE:
+            raise RuntimeError("VECTOR_BACKEND=faiss requires the faiss-cpu package")
+        super().__init__(root, "float32", config)
+        self._indexes = {}
+        self._index_lock = threading.Lock()
+
+    def _new_meta(self, dim: int, n: int) -> dict:
+        meta = super()._new_meta(dim, n)
+        meta["index"] = self.config["faiss_index"]
+        return meta
+
+    def _arrays(self, meta: dict) -> dict:
+        # Distances come from the index: no scales / squared norms
+        return {"vectors": ("float32", (meta["dim"],)), "offsets": ("int64", ())}
+
+    def _legacy_rows(self, collection: str, meta: dict, name: str):
+        # Earlier versions kept the vectors only inside index.faiss
+        if name != "vectors":
+            return super()._legacy_rows(collection, meta, name)
+        index = faiss.read_index(self._path(collection, "index.faiss"))
+        if meta["index"] == "ivf":
+            faiss.extract_index_ivf(index).make_direct_map()
+        return index.reconstruct_n(0, meta["count"])
+
+    def _faiss_metric(self, metric: str):
+        return faiss.METRIC_L2 if metric == "l2" else faiss.METRIC_INNER_PRODUCT
+
+    def _nlist(self, meta: dict) -> int:
+        # Rule of thumb nlist ~ 4 * sqrt(n), n being the final size
+        expected = max(meta["count"], meta.get("expected_count", 0))
+        return max(1, self.config["faiss_nlist"] or int(4 * np.sqrt(expected)))
+
+    def _flat_index(self, meta: dict):
+        return (
+            faiss.IndexFlatL2(meta["dim"]) if meta["metric"] == "l2"
+            else faiss.IndexFlatIP(meta["dim"])
+        )
+
+    def _train_ivf(self, collection: str, meta: dict, vectors):
+        nlist = self._nlist(meta)
+        sample_size = min(len(vectors), nlist * _IVF_MAX_POINTS_PER_CELL)
+        sample = np.asarray(
+            vectors[np.linspace(0, len(vectors) - 1, sample_size).astype("int64")], dtype="float32"
+        )
+        index = faiss.IndexIVFFlat(self._flat_index(meta), meta["dim"], nlist,
+                                   self._faiss_metric(meta["metric"]))
+        index.train(sample)
+        print(f"🧭 Trained {nlist} IVF cells for {collection} on {sample_size} of "
+              f"{len(vectors)} vectors")
+        return index
+
+    def _add_rows(self, index, vectors):
+        for start in range(index.ntotal, len(vectors), self.block_rows * 4):
+            index.add(np.ascontiguousarray(vectors[start:start + self.block_rows * 4], dtype="float32"))
+
+    def load_index(self, collection: str):
+        """
+        The collection's index with every committed row: built (or read
+        from index.faiss) on first use, trained once an IVF collection is
+        large enough, then extended with the rows added since. Call under
+        _index_lock.
+        """
+        meta = self._meta(collection)
+        path = self._path(collection, "index.faiss")
+
+        cached = self._indexes.get(collection)
+        # created_at tells a collection rebuilt under the same name apart
+        index = cached[1] if cached and cached[0] == meta["created_at"] else None
+        if index is None and os.path.exists(path):
+            saved = faiss.read_index(path)
+            if saved.ntotal <= meta["count"]:
+                index = saved
+        ivf_due = (
+            meta.get("index") == "ivf"
+            and meta["count"] >= _IVF_MIN_POINTS_PER_CELL * self._nlist(meta)
+            and not isinstance(index, faiss.IndexIVF)
+        )
+        if ivf_due or index is None or index.ntotal < meta["count"]:
+            vectors = self._rows(collection, meta, "vectors")
+            if ivf_due:
+                index = self._train_ivf(collection, meta, vectors)
+            elif index is None:
+                index = self._flat_index(meta)
+            self._add_rows(index, vectors)
+        if ivf_due:
+            tmp = self._path(collection, ".index.faiss.tmp")
+            faiss.write_index(index, tmp)
+            os.replace(tmp, path)
+        self._indexes[collection] = (meta["created_at"], index)
+        return index
+
+    def _write_vectors(self, collection: str, meta: dict, vectors: np.ndarray):
+        self._append_rows(collection, meta, "vectors", vectors)
+
+    def delete(self, collection: str):
+        super().delete(collection)
+        with self._index_lock:
+            self._indexes.pop(collection, None)
+
+    def _search_vectors(self, collection: str, meta: dict, query: np.ndarray, k: int):
+        with self._index_lock:
+            index = self.load_index(collection)
+            if isinstance(index, faiss.IndexIVF):
+                index.nprobe = self.config["faiss_nprobe"]
+            scores, ids = index.search(np.ascontiguousarray(query[None, :], dtype="float32"), k)
+        # IVF returns -1 when the probed cells hold < k rows; the index may
+        # already hold rows committed after `meta` was read
+        found = (ids[0] >= 0) & (ids[0] < meta["count"])
+        ids, scores = ids[0][found], scores[0][found]
+        # Same distance convention as Chroma: squared l2, 1 - dot product
+        return ids, scores if meta["metric"] == "l2" else 1.0 - scores
+
+
+# =====================================================
+# CHROMA STORE
+# =====================================================
+class ChromaVectorStore:
+    """
+    Persistent Chroma collections (one per dataset), HNSW configured from
+    index_config() at creation. Collections created with other settings
+    keep their metric (warned about); ef_search is updated in place.
+    """
+
+    name = "chroma"
+
+    def __init__(self, path: str = CHROMA_PATH, config: dict | None = None):
+        self.path = path
+        self.config = config or index_config()
+        self._client = None
+        self._guard = threading.Lock()
+        self._checked = set()
+
+    @property
+    def client(self):
+        with self._guard:
+            if self._client is None:
+                import chromadb
+                os.makedirs(self.path, exist_ok=True)
+                self._client = chromadb.PersistentClient(path=self.path)
+            return self._client
+
+    def _hnsw_configuration(self) -> dict:
+        return {"hnsw": {
+            "space": self.config["metric"],
+            "max_neighbors": self.config["hnsw_m"],
+            "ef_construction": self.config["hnsw_ef_construction"],
+            "ef_search": self.config["hnsw_ef_search"],
+        }}
+
+    def _collection(self, collection: str, create: bool = False):
+        if create:
+            col = self.client.get_or_create_collection(
+                name=collection,
+                embedding_function=None,
+                configuration=self._hnsw_configuration(),
+                metadata={"created_at": time.time()}
+            )
+        else:
+            try:
+                col = self.client.get_collection(name=collection, embedding_function=None)
+            except Exception:
+                return None
+        if collection not in self._checked:
+            self._check_configuration(col)
+        return col
+
+    def _check_configuration(self, col):
+        hnsw = (col.configuration_json or {}).get("hnsw") or {}
+        _warn_metric(col.name, hnsw.get("space", "l2"), self.config["metric"])
+        if hnsw.get("ef_search") != self.config["hnsw_ef_search"]:
+            col.modify(configuration={"hnsw": {"ef_search": self.config["hnsw_ef_search"]}})
+        self._checked.add(col.name)
+
+    def add(self, collection: str, texts, metadatas, vectors, expected_count: int | None = None):
+        # expected_count: HNSW grows incrementally, nothing to size up front
+        col = self._collection(collection, create=True)
+        texts, metadatas = list(texts), list(metadatas)
+        batch_size = self.client.get_max_batch_size()
+        for start in range(0, len(texts), batch_size):
+            end = start + batch_size
+            col.upsert(
+                ids=[str(uuid.uuid4()) for _ in texts[start:end]],
+                embeddings=[list(map(float, v)) for v in vectors[start:end]],
+                documents=texts[start:end],
+                metadatas=metadatas[start:end],
+            )
+
+    def search(self, collection: str, query_vector, k: int):
+        col = self._collection(collection)
+        if col is None:
+            return []
+        result = col.query(
+            query_embeddings=[list(map(float, query_vector))],
+            n_results=k,
+            include=["documents", "metadatas", "distances"],
+        )
+        return [
+            _document(text, {**(metadata or {}), "distance": float(distance)})
+            for text, metadata, distance in zip(
+                result["documents"][0], result["metadatas"][0], result["distances"][0]
+            )
+        ]
+
+    def count(self, collection: str) -> int:
+        col = self._collection(collection)
+        return col.count() if col is not None else 0
+
+    def delete(self, collection: str):
+        self._checked.discard(collection)
+        try:
+            self.client.delete_collection(name=collection)
+        except Exception as e:
+            print(f"⚠️ Could not delete collection {collection}: {e}")
+
+    def touch(self, collection: str, when: float):
+        col = self._collection(collection)
+        if col is None:
+            return
+        # hnsw:* keys are fixed at creation and rejected by modify()
+        metadata = {k: v for k, v in (col.metadata or {}).items() if not k.startswith("hnsw:")}
+        col.modify(metadata={**metadata, "last_access": when})
+
+    def list(self):
+        collections = []
+        for col in self.client.list_collections():
+            metadata = col.metadata or {}
+            if "created_at" not in metadata:
+                # Created before lifecycle tracking: start the clock now
+                metadata = {**metadata, "created_at": time.time()}
+                # hnsw:* keys are fixed at creation and rejected by modify()
+                col.modify(metadata={k: v for k, v in metadata.items() if not k.startswith("hnsw:")})
+            hnsw = (col.configuration_json or {}).get("hnsw") or {}
+            collections.append({
+                "name": col.name,
+                "created_at": metadata["created_at"],
+                "last_access": metadata.get("last_access", metadata["created_at"]),
+                "count": col.count(),
+                "metric": hnsw.get("space", "l2"),
+                "dtype": "float32",
+                "index": "hnsw",
+                "hnsw": {key: hnsw.get(key) for key in ("max_neighbors", "ef_construction", "ef_search")},
+            })
+        return collections
+
+    def compact(self):
+        """
+        Deleting a collection leaves its HNSW segment directory and free
+        SQLite pages behind: remove directories no segment refers to, then
+        VACUUM the database.
+        """
+        db_path = os.path.join(self.path, "chroma.sqlite3")
+        if not os.path.exists(db_path):
+            return {"removed_directories": [], "bytes_before": 0, "bytes_after": 0}
+
+        self.client  # make sure the schema exists
+        bytes_before = _dir_bytes(self.path)
+        removed, vacuumed = [], False
+        con = sqlite3.connect(db_path, timeout=30)
+        try:
+            segment_ids = {row[0] for row in con.execute("SELECT id FROM segments")}
+            for name in os.listdir(self.path):
+                path = os.path.join(self.path, name)
+                if os.path.isdir(path) and name not in segment_ids:
+                    shutil.rmtree(path, ignore_errors=True)
+                    removed.append(name)
+            try:
+                con.execute("VACUUM")
+                vacuumed = True
+            except sqlite3.OperationalError as e:
+                # Busy writer; the next maintenance run will retry
+                print(f"⚠️ Chroma VACUUM skipped: {e}")
+        finally:
+            con.close()
+
+        return {
+            "removed_directories": removed,
+            "vacuumed": vacuumed,
+            "bytes_before": bytes_before,
+            "bytes_after": _dir_bytes(self.path),
+        }
+
+
+# =====================================================
+# BACKEND SELECTION
+# =====================================================
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_vector_store(backend: str | None = None):
+    backend = (backend or VECTOR_BACKEND).lower()
+    config = index_config()
+    # Keyed by paths and settings too, so tests / benchmarks can point at
+    # a temp dir or change the configuration
+    key = (backend, CHROMA_PATH, VECTOR_STORE_PATH, VECTOR_DTYPE, tuple(sorted(config.items())))
+    with _stores_lock:
+        if key not in _stores:
+            if backend in ("chroma", "faiss") and VECTOR_DTYPE != "float32":
+                print(f"⚠️ VECTOR_DTYPE={VECTOR_DTYPE} ignored: the {backend} backend stores float32")
+            if backend == "chroma":
+                _stores[key] = ChromaVectorStore(CHROMA_PATH, config)
+            elif backend == "local":
+                _stores[key] = LocalVectorStore(VECTOR_STORE_PATH, VECTOR_DTYPE, config)
+            elif backend == "faiss":
+                _stores[key] = FaissVectorStore(VECTOR_STORE_PATH, config)
+            else:
+                raise ValueError(
+                    f"Unknown vector backend '{backend}'. Choose one of: {', '.join(VECTOR_BACKENDS)}"
+                )
+        return _stores[key]
+
+
+# =====================================================
+# COLLECTION API (used by rag_service / chat)
+# =====================================================
+# Last access is stored with the collection (so every worker process and
+# a restarted API see the same clock); this process only skips rewriting
+# it more often than once per _TOUCH_RESOLUTION seconds.
+_TOUCH_RESOLUTION = 60.0
+_touched = {}
+
+
+def touch(dataset_id: str):
+    now = time.time()
+    if now - _touched.get(dataset_id, 0.0) < _TOUCH_RESOLUTION:
+        return
+    _touched[dataset_id] = now
+    get_vector_store().touch(dataset_id, now)
+
+
+def add_documents(dataset_id: str, chunks, vectors, expected_count: int | None = None):
+    get_vector_store().add(
+        dataset_id,
+        [chunk.page_content for chunk in chunks],
+        [chunk.metadata for chunk in chunks],
+        vectors,
+        expected_count=expected_count,
+    )
+    touch(dataset_id)
+
+
+def similarity_search(dataset_id: str, query_vector, k: int = 3):
+    touch(dataset_id)
+    return get_vector_store().search(dataset_id, query_vector, k)
+
+
+def collection_count(dataset_id: str) -> int:
+    return get_vector_store().count(dataset_id)
+
+
+def delete_collection(dataset_id: str):
+    # Imported here: rag_service imports this module
+    from app.services.rag_service import delete_progress
+
+    get_vector_store().delete(dataset_id)
+    _touched.pop(dataset_id, None)
+    # Otherwise an evicted dataset keeps reporting its old index progress
+    delete_progress(dataset_id)
+
+
+def list_collections():
+    return get_vector_store().list()
+
+
+# =====================================================
+# LIFECYCLE
+# =====================================================
+def evict_collections(active_ids=None, now: float | None = None,
+                      ttl_seconds: float = VECTOR_TTL_SECONDS,
+                      orphan_grace_seconds: float = VECTOR_ORPHAN_GRACE_SECONDS,
+                      max_collections: int = VECTOR_MAX_COLLECTIONS):
+    """
+    Deletes collections that are orphaned (dataset not in `active_ids`,
+    e.g. failed or forgotten uploads), idle longer than the TTL, or the
+    least recently used beyond `max_collections`.
+
+    Returns [{"name", "reason"}] for every deleted collection.
+    """
+    now = now or time.time()
+    evicted, kept = [], []
+
+    for info in list_collections():
+        if active_ids is not None and info["name"] not in active_ids \
+                and now - info["created_at"] > orphan_grace_seconds:
+            evicted.append({"name": info["name"], "reason": "orphan"})
+        elif ttl_seconds and now - info["last_access"] > ttl_seconds:
+            evicted.append({"name": info["name"], "reason": "ttl"})
+        else:
+            kept.append(info)
+
+    if max_collections and len(kept) > max_collections:
+        kept.sort(key=lambda info: info["last_access"])
+        for info in kept[:len(kept) - max_collections]:
+            evicted.append({"name": info["name"], "reason": "lru"})
+
+    for item in evicted:
+        delete_collection(item["name"])
+        print(f"🧹 Evicted vector collection {item['name']} ({item['reason']})")
+    return evicted
+
+
+def compact():
+    return get_vector_store().compact()
+
+
+def run_maintenance(active_ids=None):
+    """Eviction followed by compaction (reclaims what eviction freed)."""
+    start = time.perf_counter()
+    evicted = evict_collections(active_ids)
+    compaction = compact()
+    return {
+        "backend": get_vector_store().name,
+        "evicted": evicted,
+        "compaction": compaction,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
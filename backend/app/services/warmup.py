@@ -0,0 +1,94 @@
+import importlib
+import threading
+import time
+from app.core.config import WARMUP_ON_STARTUP, WARMUP_EMBEDDINGS
+
+# Imported in this order; each entry pulls in its heavy dependencies
+WARMUP_MODULES = (
+    "app.services.ml_service",        # pandas, sklearn, model runner
+    "app.services.rag_service",
+    "langchain_community.document_loaders",
+    "langchain_text_splitters",
+    "app.services.vector_store",
+    "chromadb",
+)
+
+_lock = threading.Lock()
+_state = {
+    "status": "pending",     # pending | warming | ready | failed
+    "components": {},        # name -> {"status", "seconds", "error"?}
+    "started_at": None,
+    "seconds": None,
+}
+
+
+def _load_embeddings():
+    from app.services.rag_service import get_embeddings
+    get_embeddings()
+
+
+def _components():
+    steps = [(name, lambda name=name: importlib.import_module(name)) for name in WARMUP_MODULES]
+    if WARMUP_EMBEDDINGS:
+        steps.append(("embeddings", _load_embeddings))
+    return steps
+
+
+def _set(component: str, **fields):
+    with _lock:
+        _state["components"].setdefault(component, {}).update(fields)
+
+
+def warmup():
+    """
+    Imports the heavy modules and loads the embedding model.
+
+    A failing component is recorded and the rest still load; the first
+    request that needs it will raise the real error.
+    """
+    with _lock:
+        _state["status"] = "warming"
+        _state["started_at"] = time.time()
+        for name, _ in _components():
+            _state["components"][name] = {"status": "pending"}
+
+    start = time.perf_counter()
+    failed = False
+    for name, load in _components():
+        _set(name, status="loading")
+        component_start = time.perf_counter()
+        try:
+            load()
+            _set(name, status="ready", seconds=round(time.perf_counter() - component_start, 3))
+        except Exception as e:
+            failed = True
+            print(f"⚠️ Warmup of {name} failed: {e}")
+            _set(name, status="failed", error=str(e))
+
+    with _lock:
+        _state["status"] = "failed" if failed else "ready"
+        _state["seconds"] = round(time.perf_counter() - start, 3)
+    print(f"🔥 Warmup {_state['status']} in {_state['seconds']}s")
+
+
+def start_warmup():
+    """Runs `warmup` in a daemon thread (no-op if already started)."""
+    with _lock:
+        if _state["status"] != "pending":
+            return
+        _state["status"] = "warming"
+    threading.Thread(target=warmup, name="warmup", daemon=True).start()
+
+
+def readiness():
+    with _lock:
+        # Without startup warmup everything loads on first use instead
+        status = _state["status"]
+        if status == "pending" and not WARMUP_ON_STARTUP:
+            status = "lazy"
+        return {
+            "status": status,
+            "ready": status in ("ready", "lazy"),
+            "seconds": _state["seconds"],
+            "components": {name: dict(info) for name, info in _state["components"].items()},
+        }
@@ -0,0 +1,120 @@
+"""
+Recall@k / latency trade-off of the ANN index settings.
+
+    cd backend
+    python -m benchmarks.ann_index --vectors 50000 --queries 200
+    python -m benchmarks.ann_index --m 8 16 32 --ef-search 10 50 100 200
+    python -m benchmarks.ann_index --noise 3 --clusters 2000   # harder neighbourhoods
+
+Sweeps Chroma HNSW (M x ef_search, ef_construction fixed per run), the
+exact local flat store and, when faiss-cpu is installed, FAISS flat and
+IVF (nprobe sweep). Ground truth is an exact float32 top-k over the same
+synthetic clustered unit vectors (so cosine, ip and l2 agree).
+Settings go through index_config(), i.e. exactly what the API applies.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from chromadb.api.client import SharedSystemClient
+from app.services.vector_store import (
+    index_config,
+    ChromaVectorStore,
+    LocalVectorStore,
+    FaissVectorStore,
+    _FAISS_AVAILABLE,
+)
+from benchmarks.vector_quantization import _Chunk, make_embeddings, exact_top_k, evaluate
+
+
+def build(store, chunks, vectors):
+    start = time.perf_counter()
+    store.add("bench", [c.page_content for c in chunks], [c.metadata for c in chunks], vectors)
+    return round(time.perf_counter() - start, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=500)
+    # Higher noise blurs the clusters: harder neighbourhoods, lower recall
+    parser.add_argument("--noise", type=float, default=1.5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--m", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--ef-construction", type=int, default=100)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[10, 50, 100, 200])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--nlist", type=int, default=0)
+    args = parser.parse_args()
+
+    vectors = make_embeddings(args.vectors + args.queries, args.dim, args.clusters, noise=args.noise)
+    vectors, queries = vectors[:args.vectors], vectors[args.vectors:]
+    truth = exact_top_k(vectors, queries, args.k)
+    chunks = [_Chunk(i) for i in range(args.vectors)]
+
+    report = {"vectors": args.vectors, "dim": args.dim, "noise": args.noise, "k": args.k, "results": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        # ---------------- exact baseline ----------------
+        store = LocalVectorStore(os.path.join(tmp, "flat"), "float32", index_config())
+        seconds = build(store, chunks, vectors)
+        report["results"].append({
+            "backend": "local", "index": "flat", "build_seconds": seconds,
+            **evaluate(store, "bench", queries, truth, args.k),
+        })
+
+        # ---------------- Chroma HNSW ----------------
+        for m in args.m:
+            path = os.path.join(tmp, f"chroma-m{m}")
+            config = index_config(hnsw_m=m, hnsw_ef_construction=args.ef_construction)
+            seconds = build(ChromaVectorStore(path, config), chunks, vectors)
+            for ef_search in args.ef_search:
+                # A loaded HNSW segment keeps the ef_search it was opened
+                # with: drop Chroma's cached clients so the fresh store
+                # applies the new value before the index is reloaded
+                SharedSystemClient.clear_system_cache()
+                store = ChromaVectorStore(path, {**config, "hnsw_ef_search": ef_search})
+                report["results"].append({
+                    "backend": "chroma", "index": "hnsw", "M": m,
+                    "ef_construction": args.ef_construction, "ef_search": ef_search,
+                    "build_seconds": seconds,
+                    **evaluate(store, "bench", queries, truth, args.k),
+                })
+
+        # ---------------- FAISS ----------------
+        if _FAISS_AVAILABLE:
+            store = FaissVectorStore(os.path.join(tmp, "faiss-flat"), index_config(faiss_index="flat"))
+            seconds = build(store, chunks, vectors)
+            report["results"].append({
+                "backend": "faiss", "index": "flat", "build_seconds": seconds,
+                **evaluate(store, "bench", queries, truth, args.k),
+            })
+
+            path = os.path.join(tmp, "faiss-ivf")
+            config = index_config(faiss_index="ivf", faiss_nlist=args.nlist)
+            store = FaissVectorStore(path, config)
+            start = time.perf_counter()
+            store.add("bench", [c.page_content for c in chunks], [c.metadata for c in chunks], vectors)
+            # IVF cells are trained on first use (saved to index.faiss)
+            with store._index_lock:
+                index = store.load_index("bench")
+            seconds = round(time.perf_counter() - start, 3)
+            nlist = getattr(index, "nlist", None)
+            for nprobe in args.nprobe:
+                store = FaissVectorStore(path, {**config, "faiss_nprobe": nprobe})
+                report["results"].append({
+                    "backend": "faiss", "index": "ivf", "nlist": nlist,
+                    "nprobe": nprobe, "build_seconds": seconds,
+                    **evaluate(store, "bench", queries, truth, args.k),
+                })
+        else:
+            report["faiss"] = "skipped: faiss-cpu is not installed"
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Embedding throughput per backend and agreement with the PyTorch vectors.
+
+    cd backend
+    python -m benchmarks.embeddings --docs 2000
+    python -m benchmarks.embeddings --backends onnx onnx-int8 --threads 1 2 4 --batch-size 16 64
+
+Documents are the real RAG chunks (CSVLoader + splitter) of a synthetic
+dataset. Each variant reports load time and docs/sec; agreement is the
+row-wise cosine similarity with the reference vectors (torch when it is
+installed, otherwise onnx fp32), which should stay above ~0.99 for int8.
+Variants whose dependencies or model files are missing are skipped.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import numpy as np
+from benchmarks.synthetic import DatasetSpec, write_dataset
+
+
+def make_documents(n_docs: int):
+    from app.services.rag_service import load_csv_chunks
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "docs.csv")
+        write_dataset(DatasetSpec(rows=n_docs, task="classification"), path)
+        return [chunk.page_content for chunk in load_csv_chunks(path)][:n_docs]
+
+
+def load_backend(backend: str, threads: int, batch_size: int):
+    if backend == "torch":
+        import torch
+        from langchain_huggingface import HuggingFaceEmbeddings
+        from app.core.config import EMBEDDING_MODEL
+        if threads:
+            torch.set_num_threads(threads)
+        return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL,
+                                     encode_kwargs={"batch_size": batch_size})
+
+    from app.services.onnx_embeddings import OnnxEmbeddings
+    return OnnxEmbeddings(quantize=backend == "onnx-int8", threads=threads, batch_size=batch_size)
+
+
+def agreement(vectors: np.ndarray, reference: np.ndarray):
+    a = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    b = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    cosine = (a * b).sum(axis=1)
+    return {
+        "cosine_mean": round(float(cosine.mean()), 5),
+        "cosine_min": round(float(cosine.min()), 5),
+        "cosine_p01": round(float(np.percentile(cosine, 1)), 5),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"],
+                        choices=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--threads", type=int, nargs="+", default=[0])
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[32])
+    args = parser.parse_args()
+
+    docs = make_documents(args.docs)
+    report = {"docs": len(docs), "results": [], "skipped": {}}
+    vectors_by_backend = {}
+
+    for backend in args.backends:
+        for threads in args.threads:
+            for batch_size in args.batch_size:
+                start = time.perf_counter()
+                try:
+                    embeddings = load_backend(backend, threads, batch_size)
+                except Exception as e:
+                    report["skipped"][backend] = f"{type(e).__name__}: {e}"
+                    break
+                load_seconds = time.perf_counter() - start
+
+                embeddings.embed_documents(docs[:batch_size])  # warm-up
+                start = time.perf_counter()
+                vectors = np.asarray(embeddings.embed_documents(docs), dtype="float32")
+                seconds = time.perf_counter() - start
+
+                vectors_by_backend.setdefault(backend, vectors)
+                report["results"].append({
+                    "backend": backend,
+                    "threads": threads or "default",
+                    "batch_size": batch_size,
+                    "load_seconds": round(load_seconds, 2),
+                    "seconds": round(seconds, 3),
+                    "docs_per_second": round(len(docs) / seconds, 1),
+                })
+            if backend in report["skipped"]:
+                break
+
+    reference = next((b for b in ("torch", "onnx") if b in vectors_by_backend), None)
+    if reference:
+        report["agreement_reference"] = reference
+        report["agreement"] = {
+            backend: agreement(vectors, vectors_by_backend[reference])
+            for backend, vectors in vectors_by_backend.items() if backend != reference
+        }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
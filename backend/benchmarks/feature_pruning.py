@@ -0,0 +1,100 @@
+"""
+Training time and metrics with and without feature pruning.
+
+    cd backend
+    python -m benchmarks.feature_pruning --rows 4000
+    python -m benchmarks.feature_pruning --rows 4000 --task regression
+
+The synthetic dataset gets the columns pruning is meant for: a string ID,
+a row number, free-text notes, a high-cardinality categorical, a constant,
+an exact and a relabelled duplicate and a group of near-collinear numeric
+copies. Each variant reports the one-hot width, the training wall time
+(fold transforms + fits + CV/OOB) and every model's metrics; the deltas
+show what pruning costs in accuracy for the time it saves. The unpruned
+baseline one-hot encodes every ID and note, so its width (and memory)
+grows with the row count: keep --rows small.
+"""
+import argparse
+import json
+import time
+import numpy as np
+from sklearn.base import clone
+from benchmarks.synthetic import DatasetSpec, make_dataset, TARGET_COLUMN
+from app.services.redundancy import detect_redundancy
+from app.services.feature_pruning import plan_pruning, apply_pruning
+from app.services.preprocessing import preprocess_dataset
+from app.services.model_runner import train_and_evaluate_models
+
+METRICS = ("accuracy", "f1_score", "rmse", "r2", "cv_mean")
+
+
+def make_wasteful(rows: int, task: str, seed: int = 0):
+    df = make_dataset(DatasetSpec(rows=rows, task=task, seed=seed))
+    rng = np.random.default_rng(seed)
+    words = np.array(["late", "delivery", "customer", "called", "refund", "happy", "item", "broken"])
+    df["customer_id"] = [f"C{i:08d}" for i in rng.permutation(rows)]
+    df["row_number"] = np.arange(rows)
+    df["notes"] = [" ".join(rng.choice(words, size=8)) + f" #{i}" for i in range(rows)]
+    df["zip_code"] = rng.integers(10000, 12000, size=rows).astype(str)
+    df["source"] = "web"
+    df["num_0_copy"] = df["num_0"]
+    df["cat_0_code"] = df["cat_0"].str.replace("level_", "L", regex=False)
+    for i in range(3):
+        df[f"num_1_scaled_{i}"] = df["num_1"] * (i + 2) + rng.normal(0, 0.01, size=rows)
+    return df
+
+
+def run_variant(df, task: str, prune: bool):
+    start = time.perf_counter()
+    redundancy, _ = detect_redundancy(df, TARGET_COLUMN)
+    pruning = plan_pruning(df, TARGET_COLUMN, redundancy, prune=prune)
+    pruned = apply_pruning(df, pruning)
+    _, y, preprocessor, meta = preprocess_dataset(pruned, TARGET_COLUMN, fit=False)
+    prepare_seconds = time.perf_counter() - start
+
+    width = clone(preprocessor).fit_transform(meta["features"].head(5000)).shape[1]
+
+    timings = {}
+    start = time.perf_counter()
+    results = train_and_evaluate_models(
+        meta["features"], y, task=task, preprocessor=preprocessor, timings=timings
+    )
+    return {
+        "features": pruning["features_after"],
+        "one_hot_width": int(width),
+        "prepare_seconds": round(prepare_seconds, 3),
+        "train_seconds": round(time.perf_counter() - start, 3),
+        "pruned": {c: p["reason"] for c, p in pruning["columns"].items()},
+        "models": {
+            m["model"]: {k: round(m[k], 4) for k in METRICS if k in m}
+            for m in results["all_model_metrics"]
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=4_000)
+    parser.add_argument("--task", default="classification", choices=["classification", "regression"])
+    args = parser.parse_args()
+
+    df = make_wasteful(args.rows, args.task)
+    baseline = run_variant(df, args.task, prune=False)
+    pruned = run_variant(df, args.task, prune=True)
+
+    print(json.dumps({
+        "rows": args.rows,
+        "task": args.task,
+        "baseline": {k: v for k, v in baseline.items() if k != "pruned"},
+        "pruned": pruned,
+        "train_speedup": round(baseline["train_seconds"] / pruned["train_seconds"], 2),
+        "metric_deltas": {
+            model: {k: round(pruned["models"][model][k] - v, 4) for k, v in metrics.items()}
+            for model, metrics in baseline["models"].items()
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+LLM throughput / latency benchmark against the local stub backend.
+
+    cd backend
+    python -m benchmarks.llm_throughput --requests 200 --concurrency 32 --latency-ms 50
+
+Runs the stub server in-process, so no network or model is required.
+Prints one JSON line per mode (unbatched, batched).
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import threading
+import time
+
+
+def _start_stub_server(port: int):
+    import uvicorn
+    from app.services.llm_stub_server import app
+
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def _run(provider, n_requests: int, concurrency: int):
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with gate:
+            start = time.perf_counter()
+            await provider.generate(f"benchmark prompt number {i}")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n_requests)))
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": n_requests,
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 4),
+        "throughput_rps": round(n_requests / wall, 2),
+        "latency_p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "latency_p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    # The stub reads its latency at import time
+    os.environ["LLM_STUB_LATENCY_MS"] = str(args.latency_ms)
+    server = _start_stub_server(args.port)
+
+    from app.services.llm_service import StubProvider, close_http_client
+
+    async def bench():
+        base_url = f"http://127.0.0.1:{args.port}/v1"
+        for batching in (False, True):
+            provider = StubProvider(
+                base_url=base_url,
+                max_concurrency=args.concurrency,
+                batching=batching,
+            )
+            result = await _run(provider, args.requests, args.concurrency)
+            print(json.dumps({"mode": "batched" if batching else "unbatched", **result}))
+        await close_http_client()
+
+    try:
+        asyncio.run(bench())
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
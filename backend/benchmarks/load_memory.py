@@ -0,0 +1,97 @@
+"""
+Peak RSS and frame size of a plain `pd.read_csv` vs `read_csv_optimized`.
+
+    cd backend
+    python -m benchmarks.load_memory --rows 2000000
+
+Generation and each loader run in fresh interpreters so the peak RSS
+figures (`ru_maxrss`, which survives exec) do not contaminate each other.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+
+def make_csv(path: str, rows: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    pd.DataFrame({
+        "customer_id": np.arange(rows),
+        "age": rng.integers(18, 90, size=rows),
+        "visits": rng.integers(0, 500, size=rows),
+        "balance": rng.normal(1_000, 250, size=rows).round(2),
+        "city": rng.choice([f"city_{i}" for i in range(300)], size=rows),
+        "segment": rng.choice(["retail", "smb", "enterprise"], size=rows),
+        "plan": rng.choice(["free", "basic", "pro", "team"], size=rows),
+        "churned": rng.choice(["yes", "no"], size=rows),
+    }).to_csv(path, index=False)
+
+
+def _worker(mode: str, path: str):
+    if mode == "generate":
+        make_csv(path, int(os.environ["BENCH_ROWS"]))
+        return
+
+    from app.services.dtype_optimizer import read_csv_optimized
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == "plain":
+        df = pd.read_csv(path)
+    else:
+        df, _ = read_csv_optimized(path)
+    seconds = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(json.dumps({
+        "mode": mode,
+        "seconds": round(seconds, 3),
+        "frame_mb": round(df.memory_usage(deep=True).sum() / 2**20, 1),
+        # ru_maxrss is KiB on Linux; load_rss excludes interpreter + imports
+        "peak_rss_mb": round(peak / 1024, 1),
+        "load_rss_mb": round((peak - baseline) / 1024, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--worker", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker(*args.worker)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.csv")
+        env = {**os.environ, "BENCH_ROWS": str(args.rows)}
+
+        results = {}
+        for mode in ("generate", "plain", "optimized"):
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.load_memory", "--worker", mode, path],
+                capture_output=True, text=True, check=True, env=env
+            ).stdout
+            if mode != "generate":
+                results[mode] = json.loads(out.strip().splitlines()[-1])
+
+    plain, optimized = results["plain"], results["optimized"]
+    print(json.dumps({
+        "rows": args.rows,
+        "plain": plain,
+        "optimized": optimized,
+        "frame_reduction": round(plain["frame_mb"] / optimized["frame_mb"], 2),
+        "peak_rss_reduction": round(plain["peak_rss_mb"] / optimized["peak_rss_mb"], 2),
+        "load_rss_reduction": round(plain["load_rss_mb"] / optimized["load_rss_mb"], 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Peak-RSS regression guard for the analysis pipeline on a large CSV.
+
+    cd backend
+    python -m benchmarks.pipeline_memory                            # 500 MB
+    python -m benchmarks.pipeline_memory --size-mb 250              # quick check
+    python -m benchmarks.pipeline_memory --size-mb 50 --train --max-ratio 100
+
+Appends seeded synthetic chunks (see `benchmarks.synthetic`) until the
+CSV reaches --size-mb, then, in a fresh interpreter, runs the data path
+of the analysis DAG on it (load, profile, analysis, redundancy, pruning,
+preprocessing) and fits the per-split transformers the training stage
+uses (holdout + 5 CV folds, see transform_cache.py).
+
+Reports the peak RSS above the interpreter + imports baseline and its
+ratio to the CSV size, and exits with status 1 when the ratio exceeds
+--max-ratio. Measured on the synthetic schema (1 CPU, 6 GB RAM): 5.6
+at 250 MB (peak 1.7 GB, 36 s) and 5.7-6.0 over five runs at 500 MB
+(peak 3.0-3.2 GB, 74 s), against ~12.6 with float64 matrices and
+copied frames; the default --max-ratio leaves ~8% over the worst run.
+Larger files need about 6x their size in free memory (~12 GB at 2 GB).
+Small files need a looser --max-ratio, as the fixed costs weigh more.
+--train runs the full re-target instead (models included): fully grown
+forests cost far more than the data, so keep --size-mb small with it.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.synthetic import DatasetSpec, TARGET_COLUMN, make_dataset
+
+CHUNK_ROWS = 200_000
+
+
+def generate(path: str, size_mb: float):
+    target_bytes = size_mb * 2**20
+    chunk = 0
+    while not os.path.exists(path) or os.path.getsize(path) < target_bytes:
+        rows = CHUNK_ROWS
+        if os.path.exists(path) and chunk:
+            # Last chunk: only as many rows as still fit
+            bytes_per_row = os.path.getsize(path) / (chunk * CHUNK_ROWS)
+            rows = max(1, min(rows, int((target_bytes - os.path.getsize(path)) / bytes_per_row) + 1))
+        df = make_dataset(DatasetSpec(rows=rows, seed=chunk))
+        df.to_csv(path, mode="a", header=(chunk == 0), index=False)
+        chunk += 1
+
+
+def _rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def _peak_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _worker(path: str, train: bool):
+    import app.services.ml_service as ml_service
+    from app.services.pipeline_dag import file_fingerprint
+    from app.services.transform_cache import FoldTransformCache
+
+    baseline = _peak_mb()
+    data_outputs = ["df", "load_report", "profile", "boxplot_stats", "raw_analysis",
+                    "target_column", "problem_type", "preprocessed"]
+    timings, peaks = {}, {}
+    start = time.perf_counter()
+    run = ml_service.ANALYSIS_DAG.run(
+        {"file_path": path, "dataset_id": "memory-guard", "user_target_column": TARGET_COLUMN},
+        targets=ml_service.RETARGET_OUTPUTS if train else data_outputs,
+        fingerprints={"file_path": file_fingerprint(path)},
+        timings=timings,
+        cache=None,
+    )
+    peaks["dag"] = _peak_mb()
+
+    outputs = run.outputs
+    if not train:
+        _, y, preprocessor, meta = outputs.pop("preprocessed")
+        with FoldTransformCache(meta["features"], y, preprocessor,
+                                classification=outputs["problem_type"] == "classification") as cache:
+            # Same residency as train_and_evaluate_models: the holdout
+            # plus one CV fold at a time
+            matrix = cache.get("holdout")[0]
+            for fold in cache.cv_folds:
+                cache.get(fold)
+                cache.drop(fold)
+            peaks["fold_transform"] = _peak_mb()
+            matrix_info = {"dtype": str(matrix.dtype), "c_contiguous": bool(matrix.flags.c_contiguous),
+                           "shape": list(matrix.shape)}
+            del matrix
+
+    result = {
+        "mode": "train" if train else "data",
+        "rows": len(outputs["df"]),
+        "seconds": round(time.perf_counter() - start, 1),
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_mb": round(_peak_mb(), 1),
+        "peak_rss_mb_after": {k: round(v, 1) for k, v in peaks.items()},
+        "end_rss_mb": round(_rss_mb(), 1),
+        "stages": {k: v for k, v in timings.items() if ":" not in k},
+    }
+    if not train:
+        result["holdout_train_matrix"] = matrix_info
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=500)
+    parser.add_argument("--max-ratio", type=float, default=6.5,
+                        help="fail when (peak - baseline RSS) / CSV size exceeds this")
+    parser.add_argument("--train", action="store_true", help="also fit and score the models")
+    parser.add_argument("--csv", help="reuse (or create) the generated CSV at this path")
+    parser.add_argument("--worker", metavar="PATH", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker(args.worker, args.train)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.csv or os.path.join(tmp, "memory_guard.csv")
+        if not os.path.exists(path):
+            generate(path, args.size_mb)
+        csv_mb = os.path.getsize(path) / 2**20
+
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.pipeline_memory", "--worker", path]
+            + (["--train"] if args.train else []),
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+
+    ratio = (result["peak_rss_mb"] - result["baseline_rss_mb"]) / csv_mb
+    passed = ratio <= args.max_ratio
+    print(json.dumps({
+        "csv_mb": round(csv_mb, 1),
+        **result,
+        "peak_over_csv": round(ratio, 2),
+        "max_ratio": args.max_ratio,
+        "passed": passed,
+    }, indent=2))
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Cost of the request profiler on the analysis pipeline.
+
+    cd backend
+    python -m benchmarks.profiler_overhead --rows 20000 --repeats 3
+
+Runs the re-target stages (training included, no RAG) on a synthetic
+CSV with the stage cache disabled, once without a profiler and once under
+a SamplingProfiler per interval, and reports the median wall time and
+the overhead of each. "off" is the path every request takes unless it
+asked for a profile or PROFILE_SLOW_SECONDS is set: no thread, no timer.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from benchmarks.synthetic import DatasetSpec, TARGET_COLUMN, make_dataset
+from app.core.profiling import SamplingProfiler
+import app.services.ml_service as ml_service
+from app.services.pipeline_dag import file_fingerprint
+
+
+def run_pipeline(path: str):
+    ml_service.ANALYSIS_DAG.run(
+        {"file_path": path, "dataset_id": "profiler-overhead", "user_target_column": TARGET_COLUMN},
+        targets=ml_service.RETARGET_OUTPUTS,
+        fingerprints={"file_path": file_fingerprint(path)},
+        cache=None,
+    )
+
+
+def measure(path: str, repeats: int, interval_ms: float | None):
+    times, samples = [], 0
+    for _ in range(repeats):
+        profiler = SamplingProfiler(interval_ms / 1000) if interval_ms else None
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.start()
+        run_pipeline(path)
+        if profiler is not None:
+            profiler.stop()
+            samples = profiler.samples
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--intervals", default="10,1", help="sampling intervals in ms")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "profiler_overhead.csv")
+        make_dataset(DatasetSpec(rows=args.rows)).to_csv(path, index=False)
+        run_pipeline(path)  # warm imports / BLAS
+
+        off, _ = measure(path, args.repeats, None)
+        results = {"off": {"seconds": round(off, 3)}}
+        for interval in (float(i) for i in args.intervals.split(",")):
+            seconds, samples = measure(path, args.repeats, interval)
+            results[f"{interval:g}ms"] = {
+                "seconds": round(seconds, 3),
+                "overhead": f"{(seconds / off - 1) * 100:+.1f}%",
+                "samples": samples,
+            }
+
+    print(json.dumps({"rows": args.rows, "repeats": args.repeats, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Cold-start cost of the API process, measured with `python -X importtime`.
+
+    cd backend
+    python -m benchmarks.startup --runs 5 --top 15
+    python -m benchmarks.startup --warmup        # also time the background warmup
+
+Each run imports `app.main` in a fresh interpreter. Reports the median
+cumulative import time, the slowest modules of the median run and, with
+--warmup, how long each warmup component takes until /ready turns green.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+
+def parse_importtime(stderr: str):
+    """{module: (self_us, cumulative_us)} from `-X importtime` output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # header row
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def measure_import(module: str):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True
+    )
+    wall = time.perf_counter() - start
+    return wall, parse_importtime(proc.stderr)
+
+
+def measure_warmup():
+    code = (
+        "import json, time\n"
+        "start = time.perf_counter()\n"
+        "import app.main\n"
+        "imported = time.perf_counter() - start\n"
+        "from app.services.warmup import warmup, readiness\n"
+        "warmup()\n"
+        "print(json.dumps({'import_seconds': round(imported, 3), **readiness()}))\n"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--warmup", action="store_true")
+    args = parser.parse_args()
+
+    runs = [measure_import(args.module) for _ in range(args.runs)]
+    totals = [modules[args.module][1] for _, modules in runs]
+    median_run = sorted(runs, key=lambda run: run[1][args.module][1])[len(runs) // 2]
+    modules = median_run[1]
+
+    top_level = sorted(
+        ((name, cum) for name, (_, cum) in modules.items() if "." not in name),
+        key=lambda item: -item[1]
+    )
+    report = {
+        "module": args.module,
+        "runs": args.runs,
+        "import_seconds_median": round(statistics.median(totals) / 1e6, 3),
+        "import_seconds_all": [round(t / 1e6, 3) for t in totals],
+        "process_wall_seconds_median": round(statistics.median(w for w, _ in runs), 3),
+        "modules_imported": len(modules),
+        "slowest_packages": [
+            {"package": name, "cumulative_ms": round(cum / 1000, 1)}
+            for name, cum in top_level[:args.top]
+        ],
+        "slowest_self": [
+            {"module": name, "self_ms": round(self_us / 1000, 1)}
+            for name, (self_us, _) in sorted(modules.items(), key=lambda m: -m[1][0])[:args.top]
+        ],
+    }
+    if args.warmup:
+        report["warmup"] = measure_warmup()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Exact vs approximate (sketch-based) profiling statistics.
+
+    cd backend
+    python -m benchmarks.stats_modes --rows 5000000
+
+Prints wall time per mode and the observed error of the approximate
+quartiles, distinct counts and top-3 counts next to the reported bounds.
+"""
+import argparse
+import json
+import time
+import numpy as np
+import pandas as pd
+from app.services.data_analysis import analyze_dataset, compute_boxplot_stats
+from app.services.dataset_profile import build_dataset_profile
+
+
+def make_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "normal": rng.normal(size=rows),
+        "lognormal": rng.lognormal(size=rows),
+        "ints": rng.integers(0, 50_000, size=rows),
+        "zipf": rng.zipf(1.5, size=rows).astype(str),
+        "city": rng.choice([f"city_{i}" for i in range(200)], size=rows),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    results = {}
+
+    for mode in ("exact", "approximate"):
+        start = time.perf_counter()
+        # The pipeline builds one profile and shares it between both calls
+        profile = build_dataset_profile(df) if mode == "approximate" else None
+        box = compute_boxplot_stats(df, mode=mode, profile=profile)
+        analysis = analyze_dataset(df, mode=mode, profile=profile)
+        results[mode] = {"seconds": time.perf_counter() - start, "box": box, "analysis": analysis}
+
+    exact, approx = results["exact"], results["approximate"]
+
+    sorted_cols = {col: np.sort(df[col].to_numpy()) for col in exact["box"]}
+    rank_errors = [
+        abs(np.searchsorted(sorted_cols[col], approx["box"][col][key]) / args.rows - q)
+        for col in exact["box"]
+        for key, q in (("q1", 0.25), ("median", 0.5), ("q3", 0.75))
+    ]
+    distinct_errors = [
+        abs(approx["analysis"]["unique_counts"][col] - n) / n
+        for col, n in exact["analysis"]["unique_counts"].items()
+    ]
+    top_errors = [
+        abs(approx["analysis"]["categorical_distributions"][col].get(k, 0) - v)
+        for col, top in exact["analysis"]["categorical_distributions"].items()
+        for k, v in top.items()
+    ]
+
+    print(json.dumps({
+        "rows": args.rows,
+        "exact_seconds": round(exact["seconds"], 3),
+        "approximate_seconds": round(approx["seconds"], 3),
+        "observed": {
+            "max_quantile_rank_error": round(max(rank_errors), 5),
+            "max_distinct_count_relative_error": round(max(distinct_errors), 5),
+            "max_top_k_count_error": int(max(top_errors)),
+        },
+        "reported_bounds": approx["analysis"]["error_bounds"],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+"""
+Benchmark suite for the analysis services and the end-to-end pipeline.
+
+    cd backend
+    python -m benchmarks.suite run --preset small --out bench.json
+    python -m benchmarks.suite run --rows 100000 --task regression --cases pipeline,model_runner
+    python -m benchmarks.suite compare baseline.json bench.json
+
+Every case runs in a fresh interpreter on the same seeded synthetic CSV
+(see `benchmarks.synthetic`). Embeddings use a deterministic fake
+embedder and chat uses the in-process stub LLM server, so no model
+downloads or network access are needed.
+
+Per case the JSON records wall time (min and median over `--repeat`
+runs), the peak memory traced by tracemalloc during one extra run and
+the process peak RSS. `compare` exits with status 1 when a case is
+slower or larger than the baseline by more than the tolerance.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+from benchmarks.synthetic import DatasetSpec, TARGET_COLUMN, write_dataset
+
+PRESETS = {
+    "small": {"rows": 5_000},
+    "medium": {"rows": 50_000},
+    "large": {"rows": 500_000, "numeric": 16, "categorical": 8},
+}
+
+# Absolute differences below these are treated as noise by `compare`
+MIN_SECONDS_DELTA = 0.02
+MIN_MB_DELTA = 2.0
+
+
+# =====================================================
+# STUBS
+# =====================================================
+def _install_stubs(chroma_dir: str):
+    """Fake embedder + throwaway vector store directories for every RAG call site."""
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    import app.services.rag_service as rag_service
+    import app.services.vector_store as vector_store
+
+    embedder = DeterministicFakeEmbedding(size=384)
+    rag_service.get_embeddings = lambda: embedder
+    vector_store.CHROMA_PATH = os.path.join(chroma_dir, "chroma_db")
+    vector_store.VECTOR_STORE_PATH = os.path.join(chroma_dir, "vector_store")
+    rag_service.RAG_PROGRESS_DIR = os.path.join(chroma_dir, "rag_progress")
+
+
+def _configure_stub_llm(port: int):
+    # Must run before app modules are imported (config reads env at import)
+    os.environ["LLM_PROVIDER"] = "stub"
+    os.environ["LLM_STUB_URL"] = f"http://127.0.0.1:{port}/v1"
+    os.environ.setdefault("LLM_STUB_LATENCY_MS", "0")
+
+
+# =====================================================
+# CASES
+# =====================================================
+# Each case takes the worker context and returns a zero-argument callable;
+# everything outside that callable is setup and is not timed.
+def _frame(ctx):
+    if "df" not in ctx:
+        from app.services.dtype_optimizer import read_csv_optimized
+        ctx["df"], _ = read_csv_optimized(ctx["csv"])
+    return ctx["df"]
+
+
+def _target(ctx):
+    if ctx["spec"].task != "unsupervised":
+        return TARGET_COLUMN
+    from app.services.target_detection import detect_target_column
+    return detect_target_column(_frame(ctx))
+
+
+def case_load(ctx):
+    from app.services.dtype_optimizer import read_csv_optimized
+    return lambda: read_csv_optimized(ctx["csv"])
+
+
+def case_target_detection(ctx):
+    from app.services.target_detection import detect_target_column
+    df = _frame(ctx)
+    return lambda: detect_target_column(df)
+
+
+def case_problem_type(ctx):
+    from app.services.problem_detection import detect_problem_type
+    df, target = _frame(ctx), _target(ctx)
+    return lambda: detect_problem_type(df, target)
+
+
+def case_preprocessing(ctx):
+    from app.services.preprocessing import preprocess_dataset
+    df, target = _frame(ctx), _target(ctx)
+    return lambda: preprocess_dataset(df, target, fit=True)
+
+
+def case_boxplot(ctx):
+    from app.services.data_analysis import compute_boxplot_stats
+    df = _frame(ctx)
+    return lambda: compute_boxplot_stats(df)
+
+
+def case_data_analysis(ctx):
+    from app.services.data_analysis import analyze_dataset
+    df = _frame(ctx)
+    return lambda: analyze_dataset(df)
+
+
+def case_model_runner(ctx):
+    from app.services.preprocessing import preprocess_dataset
+    from app.services.problem_detection import detect_problem_type
+    from app.services.model_runner import train_and_evaluate_models
+
+    df, target = _frame(ctx), _target(ctx)
+    task = detect_problem_type(df, target)
+    X_processed, y, preprocessor, meta = preprocess_dataset(
+        df, target, fit=(task == "unsupervised")
+    )
+    if task == "unsupervised":
+        return lambda: train_and_evaluate_models(X_processed, task=task)
+    return lambda: train_and_evaluate_models(
+        meta["features"], y, task=task, preprocessor=preprocessor
+    )
+
+
+def case_rag_index(ctx):
+    from app.services.rag_service import index_dataset_for_rag
+    # Fresh collection per run so repeats do not grow one index
+    return lambda: index_dataset_for_rag(ctx["csv"], str(uuid.uuid4()))
+
+
+def case_pipeline(ctx):
+    from app.services.ml_service import process_and_analyze_dataset
+    from app.services.pipeline_dag import STAGE_CACHE
+    target = TARGET_COLUMN if ctx["spec"].task != "unsupervised" else None
+
+    def run():
+        # Cold run every time: repeats would otherwise hit the stage cache
+        STAGE_CACHE.clear()
+        return process_and_analyze_dataset(
+            file_path=ctx["csv"],
+            dataset_id=str(uuid.uuid4()),
+            user_target_column=target
+        )
+    return run
+
+
+def case_chat(ctx):
+    from benchmarks.llm_throughput import _start_stub_server
+    from app.services.rag_service import index_dataset_for_rag
+    from app.api.v1.chat import _answer, ChatRequest
+
+    ctx["server"] = _start_stub_server(ctx["port"])
+    dataset_id = str(uuid.uuid4())
+    index_dataset_for_rag(ctx["csv"], dataset_id)
+
+    # One loop for every run: the pooled HTTP client is bound to it
+    loop = ctx["loop"] = asyncio.new_event_loop()
+    request = ChatRequest(dataset_id=dataset_id, message="What is the average of num_0?")
+    # The handler body, without the per-request profiling hook
+    return lambda: loop.run_until_complete(_answer(request))
+
+
+CASES = {
+    "load": case_load,
+    "target_detection": case_target_detection,
+    "problem_type": case_problem_type,
+    "preprocessing": case_preprocessing,
+    "boxplot": case_boxplot,
+    "data_analysis": case_data_analysis,
+    "model_runner": case_model_runner,
+    "rag_index": case_rag_index,
+    "chat": case_chat,
+    "pipeline": case_pipeline,
+}
+
+
+# =====================================================
+# WORKER (one case, fresh interpreter)
+# =====================================================
+def _worker(case: str, csv_path: str, spec: DatasetSpec, repeat: int, port: int):
+    _configure_stub_llm(port)
+    with tempfile.TemporaryDirectory() as chroma_dir:
+        _install_stubs(chroma_dir)
+        ctx = {"csv": csv_path, "spec": spec, "port": port}
+        run = CASES[case](ctx)
+
+        try:
+            rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                run()
+                times.append(time.perf_counter() - start)
+            peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+            # Separate traced run: tracemalloc slows allocation-heavy code.
+            # Allocations in joblib worker processes are not included.
+            tracemalloc.start()
+            run()
+            _, traced_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        finally:
+            if "loop" in ctx:
+                from app.services.llm_service import close_http_client
+                ctx["loop"].run_until_complete(close_http_client())
+                ctx["loop"].close()
+            if "server" in ctx:
+                ctx["server"].should_exit = True
+
+    print(json.dumps({
+        "seconds": round(min(times), 4),
+        "seconds_median": round(statistics.median(times), 4),
+        "seconds_all": [round(t, 4) for t in times],
+        "peak_traced_mb": round(traced_peak / 2**20, 2),
+        # ru_maxrss is KiB on Linux; rss_delta excludes imports + setup
+        "peak_rss_mb": round(peak_rss / 1024, 1),
+        "rss_delta_mb": round((peak_rss - rss_before) / 1024, 1),
+    }))
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# =====================================================
+# RUN
+# =====================================================
+def run_suite(spec: DatasetSpec, cases, repeat: int = 3, port: int = 8766):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "bench.csv")
+        write_dataset(spec, csv_path)
+
+        for case in cases:
+            print(f"⏱️  {case} ...", file=sys.stderr, flush=True)
+            proc = subprocess.run(
+                [
+                    sys.executable, "-m", "benchmarks.suite", "worker", case,
+                    "--csv", csv_path, "--spec", json.dumps(spec.to_dict()),
+                    "--repeat", str(repeat), "--port", str(port),
+                ],
+                capture_output=True, text=True
+            )
+            if proc.returncode != 0:
+                results[case] = {"error": proc.stderr.strip().splitlines()[-1:]}
+                continue
+            results[case] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": repeat,
+            "dataset": spec.to_dict(),
+        },
+        "results": results,
+    }
+
+
+# =====================================================
+# COMPARE
+# =====================================================
+def compare_results(baseline: dict, current: dict, time_tolerance: float = 0.2,
+                    memory_tolerance: float = 0.2):
+    """
+    Rows of (case, metric, baseline, current, ratio, regressed).
+
+    A metric regresses when it grows by more than the tolerance *and* by
+    more than the absolute noise floor (tiny cases jitter by large ratios).
+    """
+    rows = []
+    checks = (
+        ("seconds", time_tolerance, MIN_SECONDS_DELTA),
+        ("peak_traced_mb", memory_tolerance, MIN_MB_DELTA),
+    )
+    for case, base in baseline["results"].items():
+        cur = current["results"].get(case)
+        if cur is None or "error" in base:
+            continue
+        if "error" in cur:
+            rows.append((case, "error", None, None, None, True))
+            continue
+        for metric, tolerance, floor in checks:
+            if metric not in base or metric not in cur:
+                continue
+            old, new = base[metric], cur[metric]
+            ratio = new / old if old else float("inf") if new else 1.0
+            regressed = ratio > 1 + tolerance and (new - old) > floor
+            rows.append((case, metric, old, new, round(ratio, 3), regressed))
+    return rows
+
+
+def _print_comparison(rows):
+    print(f"{'case':<18} {'metric':<15} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for case, metric, old, new, ratio, regressed in rows:
+        flag = "  ❌ REGRESSION" if regressed else ""
+        print(f"{case:<18} {metric:<15} {str(old):>10} {str(new):>10} {str(ratio):>7}{flag}")
+
+
+def _load(path: str):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _compare_and_report(baseline: dict, current: dict, args) -> int:
+    if baseline["meta"].get("dataset") != current["meta"].get("dataset"):
+        print("⚠️  Baseline was measured on a different dataset spec", file=sys.stderr)
+
+    rows = compare_results(baseline, current, args.time_tolerance, args.memory_tolerance)
+    _print_comparison(rows)
+    regressions = [row for row in rows if row[-1]]
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s)")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+# =====================================================
+# CLI
+# =====================================================
+def _add_compare_options(parser):
+    parser.add_argument("--time-tolerance", type=float, default=0.2,
+                        help="allowed relative slowdown (0.2 = 20%%)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.2,
+                        help="allowed relative growth of traced peak memory")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="run the benchmarks and write JSON")
+    run.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    run.add_argument("--rows", type=int)
+    run.add_argument("--numeric", type=int)
+    run.add_argument("--categorical", type=int)
+    run.add_argument("--cardinality", type=int)
+    run.add_argument("--missing", type=float)
+    run.add_argument("--task", choices=("classification", "regression", "unsupervised"))
+    run.add_argument("--seed", type=int)
+    run.add_argument("--cases", default=",".join(CASES),
+                     help=f"comma-separated subset of: {', '.join(CASES)}")
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--port", type=int, default=8766, help="stub LLM port (chat case)")
+    run.add_argument("--out", help="write results here (default: stdout)")
+    run.add_argument("--baseline", help="compare against this results file afterwards")
+    _add_compare_options(run)
+
+    compare = sub.add_parser("compare", help="flag regressions against a baseline")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    _add_compare_options(compare)
+
+    worker = sub.add_parser("worker")
+    worker.add_argument("case", choices=sorted(CASES))
+    worker.add_argument("--csv", required=True)
+    worker.add_argument("--spec", required=True)
+    worker.add_argument("--repeat", type=int, default=3)
+    worker.add_argument("--port", type=int, default=8766)
+
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        _worker(args.case, args.csv, DatasetSpec(**json.loads(args.spec)), args.repeat, args.port)
+        return
+
+    if args.command == "compare":
+        sys.exit(_compare_and_report(_load(args.baseline), _load(args.current), args))
+
+    overrides = {
+        field: getattr(args, field)
+        for field in ("rows", "numeric", "categorical", "cardinality", "missing", "task", "seed")
+        if getattr(args, field) is not None
+    }
+    spec = DatasetSpec(**{**PRESETS[args.preset], **overrides})
+
+    cases = [c.strip() for c in args.cases.split(",") if c.strip()]
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+
+    report = run_suite(spec, cases, repeat=args.repeat, port=args.port)
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+        print(f"📁 Results written to {args.out}", file=sys.stderr)
+    else:
+        print(output)
+
+    if args.baseline:
+        sys.exit(_compare_and_report(_load(args.baseline), report, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Recall, size and latency of quantized vector storage.
+
+    cd backend
+    python -m benchmarks.vector_quantization --vectors 100000 --queries 200
+    python -m benchmarks.vector_quantization --chroma    # also the Chroma (float32 HNSW) baseline
+
+Embeddings are synthetic: unit vectors scattered around random cluster
+centres (like sentence embeddings of similar rows). Ground truth is an
+exact float32 cosine top-k; each stored dtype reports recall@k against it,
+bytes on disk and query latency through the LocalVectorStore.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import numpy as np
+from app.services.vector_store import LocalVectorStore, ChromaVectorStore, VECTOR_DTYPES
+
+
+class _Chunk:
+    def __init__(self, i: int):
+        self.page_content = f"row {i}"
+        self.metadata = {"row": i}
+
+
+def make_embeddings(n: int, dim: int, clusters: int, seed: int = 0, noise: float = 0.6):
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim))
+    vectors = centres[rng.integers(0, clusters, size=n)] + noise * rng.normal(size=(n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype("float32")
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int):
+    scores = queries @ vectors.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def evaluate(store, name: str, queries, truth, k: int):
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        docs = store.search(name, query, k)
+        latencies.append(time.perf_counter() - start)
+        hits += len({doc.metadata["row"] for doc in docs} & set(expected.tolist()))
+    return {
+        f"recall@{k}": round(hits / truth.size, 4),
+        "query_ms_median": round(statistics.median(latencies) * 1000, 2),
+        "query_ms_p95": round(sorted(latencies)[int(len(latencies) * 0.95)] * 1000, 2),
+    }
+
+
+def _bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(r, f)) for r, _, files in os.walk(path) for f in files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--chroma", action="store_true")
+    args = parser.parse_args()
+
+    vectors = make_embeddings(args.vectors + args.queries, args.dim, args.clusters)
+    vectors, queries = vectors[:args.vectors], vectors[args.vectors:]
+    truth = exact_top_k(vectors, queries, args.k)
+    chunks = [_Chunk(i) for i in range(args.vectors)]
+
+    report = {"vectors": args.vectors, "dim": args.dim, "k": args.k, "stores": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        for dtype in VECTOR_DTYPES:
+            store = LocalVectorStore(os.path.join(tmp, dtype), dtype)
+            start = time.perf_counter()
+            store.add("bench", [c.page_content for c in chunks], [c.metadata for c in chunks], vectors)
+            write_seconds = time.perf_counter() - start
+            vector_bytes = sum(
+                os.path.getsize(os.path.join(tmp, dtype, "bench", f))
+                for f in ("vectors.bin", "scales.bin")
+                if os.path.exists(os.path.join(tmp, dtype, "bench", f))
+            )
+            report["stores"][f"local/{dtype}"] = {
+                "vector_bytes": vector_bytes,
+                "disk_bytes": _bytes(os.path.join(tmp, dtype)),
+                "write_seconds": round(write_seconds, 3),
+                **evaluate(store, "bench", queries, truth, args.k),
+            }
+
+        if args.chroma:
+            store = ChromaVectorStore(os.path.join(tmp, "chroma"))
+            start = time.perf_counter()
+            store.add("bench", [c.page_content for c in chunks], [c.metadata for c in chunks], vectors)
+            write_seconds = time.perf_counter() - start
+            report["stores"]["chroma/float32"] = {
+                "disk_bytes": _bytes(os.path.join(tmp, "chroma")),
+                "write_seconds": round(write_seconds, 3),
+                **evaluate(store, "bench", queries, truth, args.k),
+            }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
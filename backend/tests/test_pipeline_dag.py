@@ -0,0 +1,235 @@
+import threading
+import pytest
+from app.services.pipeline_dag import PipelineDAG, Stage, StageCache, SKIP
+
+
+class Calls:
+    """Counts how often each stage function actually ran."""
+
+    def __init__(self):
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, name, result):
+        def func(**kwargs):
+            with self._lock:
+                self.counts[name] = self.counts.get(name, 0) + 1
+            return result(**kwargs) if callable(result) else result
+        return func
+
+
+# =====================================================
+# SKIP PROPAGATION
+# =====================================================
+def test_skip_propagates_transitively_but_not_to_independent_branches():
+    calls = Calls()
+    dag = PipelineDAG([
+        Stage("gate", calls("gate", SKIP), ["x"], ["gated"]),
+        Stage("child", calls("child", 1), ["gated"], ["child_out"]),
+        Stage("grandchild", calls("grandchild", 2), ["child_out"], ["grandchild_out"]),
+        Stage("independent", calls("independent", lambda x: x + 1), ["x"], ["other"]),
+    ])
+
+    run = dag.run({"x": 1}, cache=None)
+
+    assert run.skipped == ["child", "grandchild"]
+    assert sorted(run.executed) == ["gate", "independent"]
+    assert run.outputs["child_out"] is SKIP
+    assert run.outputs["grandchild_out"] is SKIP
+    assert run.outputs["other"] == 2
+    assert "child" not in calls.counts and "grandchild" not in calls.counts
+
+
+def test_skip_from_one_input_skips_a_stage_with_several_inputs():
+    dag = PipelineDAG([
+        Stage("a", lambda x: SKIP, ["x"], ["a"]),
+        Stage("b", lambda x: 1, ["x"], ["b"]),
+        Stage("join", lambda a, b: (a, b), ["a", "b"], ["joined"]),
+    ])
+
+    run = dag.run({"x": 0}, cache=None)
+
+    assert run.skipped == ["join"]
+    assert run.outputs["joined"] is SKIP
+
+
+def test_skipped_outputs_are_not_cached():
+    calls = Calls()
+    cache = StageCache(max_entries=8)
+    dag = PipelineDAG([Stage("gate", calls("gate", SKIP), ["x"], ["gated"], cacheable=True)])
+
+    dag.run({"x": 1}, cache=cache)
+    run = dag.run({"x": 1}, cache=cache)
+
+    assert run.cached == []
+    assert calls.counts["gate"] == 2
+
+
+# =====================================================
+# ERROR HANDLING
+# =====================================================
+def test_stage_error_is_raised_and_stops_downstream_stages():
+    calls = Calls()
+
+    def fail(x):
+        raise RuntimeError("boom")
+
+    dag = PipelineDAG([
+        Stage("fail", fail, ["x"], ["failed"]),
+        Stage("after", calls("after", 1), ["failed"], ["after_out"]),
+    ])
+
+    with pytest.raises(RuntimeError, match="boom"):
+        dag.run({"x": 1}, cache=None)
+    assert "after" not in calls.counts
+
+
+def test_running_stages_finish_before_the_error_is_raised():
+    started, finished = threading.Event(), threading.Event()
+
+    def slow(x):
+        started.set()
+        threading.Event().wait(0.2)
+        finished.set()
+        return x
+
+    def fail(x):
+        started.wait(1)
+        raise ValueError("bad stage")
+
+    dag = PipelineDAG([
+        Stage("slow", slow, ["x"], ["slow_out"]),
+        Stage("fail", fail, ["x"], ["failed"]),
+    ])
+
+    with pytest.raises(ValueError, match="bad stage"):
+        dag.run({"x": 1}, max_workers=2, cache=None)
+    assert finished.is_set()
+
+
+def test_failed_stage_is_not_cached():
+    cache = StageCache(max_entries=8)
+    attempts = []
+
+    def flaky(x):
+        attempts.append(x)
+        if len(attempts) == 1:
+            raise RuntimeError("first attempt fails")
+        return x * 2
+
+    dag = PipelineDAG([Stage("flaky", flaky, ["x"], ["y"], cacheable=True)])
+
+    with pytest.raises(RuntimeError):
+        dag.run({"x": 3}, cache=cache)
+    run = dag.run({"x": 3}, cache=cache)
+
+    assert run.executed == ["flaky"]
+    assert run.outputs["y"] == 6
+
+
+def test_graph_errors():
+    with pytest.raises(ValueError, match="produced by both"):
+        PipelineDAG([Stage("a", int, ["x"], ["y"]), Stage("b", int, ["x"], ["y"])])
+    with pytest.raises(ValueError, match="Cycle"):
+        PipelineDAG([Stage("a", int, ["b"], ["a"]), Stage("b", int, ["a"], ["b"])])
+    with pytest.raises(ValueError, match="Missing pipeline input 'x'"):
+        PipelineDAG([Stage("a", int, ["x"], ["y"])]).run({}, cache=None)
+
+
+# =====================================================
+# CACHE KEYING
+# =====================================================
+def _chain(calls):
+    return PipelineDAG([
+        Stage("load", calls("load", lambda path: path.upper()), ["path"], ["raw"]),
+        Stage("stats", calls("stats", lambda raw, option: f"{raw}:{option}"),
+              ["raw", "option"], ["stats"], cacheable=True),
+    ])
+
+
+def test_identical_inputs_hit_the_cache():
+    calls, cache = Calls(), StageCache(max_entries=8)
+    dag = _chain(calls)
+
+    dag.run({"path": "a.csv", "option": 1}, targets=["stats"], cache=cache)
+    run = dag.run({"path": "a.csv", "option": 1}, targets=["stats"], cache=cache)
+
+    assert run.cached == ["stats"]
+    assert run.executed == []
+    assert run.outputs["stats"] == "A.CSV:1"
+    assert calls.counts == {"load": 1, "stats": 1}
+
+
+def test_any_upstream_input_change_misses_the_cache():
+    calls, cache = Calls(), StageCache(max_entries=8)
+    dag = _chain(calls)
+
+    dag.run({"path": "a.csv", "option": 1}, cache=cache)
+    # A direct input and an input of a (non-cacheable) upstream stage
+    dag.run({"path": "a.csv", "option": 2}, cache=cache)
+    dag.run({"path": "b.csv", "option": 1}, cache=cache)
+
+    assert calls.counts["stats"] == 3
+
+
+def test_explicit_fingerprints_key_the_cache_instead_of_the_value():
+    calls, cache = Calls(), StageCache(max_entries=8)
+    dag = _chain(calls)
+
+    dag.run({"path": "a.csv", "option": 1}, fingerprints={"path": "content-1"}, cache=cache)
+    # Same path, new content
+    dag.run({"path": "a.csv", "option": 1}, fingerprints={"path": "content-2"}, cache=cache)
+    # Different path, same content
+    run = dag.run({"path": "copy.csv", "option": 1}, fingerprints={"path": "content-2"}, cache=cache)
+
+    assert calls.counts["stats"] == 2
+    assert run.cached == ["stats"]
+
+
+def test_stage_version_is_part_of_the_key():
+    cache = StageCache(max_entries=8)
+    v1 = PipelineDAG([Stage("s", lambda x: "v1", ["x"], ["y"], cacheable=True)])
+    v2 = PipelineDAG([Stage("s", lambda x: "v2", ["x"], ["y"], cacheable=True, version=2)])
+
+    v1.run({"x": 1}, cache=cache)
+    run = v2.run({"x": 1}, cache=cache)
+
+    assert run.executed == ["s"]
+    assert run.outputs["y"] == "v2"
+
+
+def test_cached_outputs_are_copies():
+    cache = StageCache(max_entries=8)
+    dag = PipelineDAG([Stage("s", lambda x: {"values": [x]}, ["x"], ["y"], cacheable=True)])
+
+    dag.run({"x": 1}, cache=cache)
+    first = dag.run({"x": 1}, cache=cache).outputs["y"]
+    first["values"].append("mutated")
+    second = dag.run({"x": 1}, cache=cache).outputs["y"]
+
+    assert second == {"values": [1]}
+
+
+def test_unhashable_inputs_need_an_explicit_fingerprint():
+    dag = PipelineDAG([Stage("s", lambda obj: len(obj), ["obj"], ["n"])])
+
+    with pytest.raises(TypeError, match="fingerprint"):
+        dag.run({"obj": [1, 2]}, cache=None)
+    assert dag.run({"obj": [1, 2]}, fingerprints={"obj": "list-1"}, cache=None).outputs["n"] == 2
+
+
+def test_prefilled_outputs_skip_their_producers_and_unused_intermediates_are_released():
+    calls = Calls()
+    dag = PipelineDAG([
+        Stage("load", calls("load", lambda path: path), ["path"], ["raw"]),
+        Stage("parse", calls("parse", lambda raw: raw * 2), ["raw"], ["parsed"]),
+        Stage("report", calls("report", lambda parsed: len(parsed)), ["parsed"], ["report"]),
+    ])
+
+    prefilled = dag.run({"path": "x", "raw": "ab"}, targets=["report"], cache=None)
+    assert "load" not in calls.counts
+    assert prefilled.outputs["report"] == 4
+
+    run = dag.run({"path": "abc"}, targets=["report"], cache=None)
+    assert run.outputs["report"] == 6
+    assert "parsed" not in run.outputs
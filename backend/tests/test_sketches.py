@@ -0,0 +1,136 @@
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from app.services.sketches import MomentSketch, KLLSketch, HyperLogLog, SpaceSaving
+
+
+def _chunks(values, n_chunks):
+    return np.array_split(values, n_chunks)
+
+
+@pytest.fixture(scope="module")
+def values():
+    return np.random.default_rng(0).lognormal(size=100_000)
+
+
+# =====================================================
+# MOMENTS
+# =====================================================
+def test_moment_merge_matches_the_concatenated_data(values):
+    merged = MomentSketch()
+    for chunk in _chunks(values, 7):
+        merged.merge(MomentSketch().update(chunk))
+    series = pd.Series(values)
+
+    assert merged.n == len(values)
+    assert merged.mean == pytest.approx(series.mean(), rel=1e-12)
+    assert merged.variance == pytest.approx(series.var(), rel=1e-9)
+    assert merged.skewness == pytest.approx(series.skew(), rel=1e-9)
+    assert (merged.min, merged.max) == (values.min(), values.max())
+
+
+def test_moment_merge_is_order_independent_and_ignores_empty(values):
+    a, b = _chunks(values, 2)
+    ab = MomentSketch().update(a).merge(MomentSketch().update(b))
+    ba = MomentSketch().update(b).merge(MomentSketch().update(a)).merge(MomentSketch())
+
+    assert ab.n == ba.n
+    assert ab.mean == pytest.approx(ba.mean, rel=1e-12)
+    assert ab.m2 == pytest.approx(ba.m2, rel=1e-12)
+    assert ab.m3 == pytest.approx(ba.m3, rel=1e-9)
+
+
+def test_moments_skip_nan():
+    sketch = MomentSketch().update([1.0, np.nan, 3.0])
+
+    assert sketch.n == 2
+    assert sketch.mean == 2.0
+    assert math.isnan(MomentSketch().update([np.nan]).variance)
+
+
+# =====================================================
+# QUANTILES
+# =====================================================
+def _true_rank(sorted_values, value):
+    return np.searchsorted(sorted_values, value, side="left") / len(sorted_values)
+
+
+def test_kll_merge_preserves_total_weight(values):
+    merged = KLLSketch()
+    for chunk in _chunks(values, 9):
+        merged.merge(KLLSketch().update(chunk))
+
+    _, cum = merged._weighted_items()
+    assert merged.n == len(values)
+    assert cum[-1] == len(values)
+    # Memory stays O(k), not O(n)
+    assert sum(level.size for level in merged.levels) < 10 * merged.k
+
+
+@pytest.mark.parametrize("n_chunks", [1, 9])
+def test_kll_rank_and_quantile_within_rank_error(values, n_chunks):
+    sketch = KLLSketch()
+    for chunk in _chunks(values, n_chunks):
+        sketch.merge(KLLSketch().update(chunk))
+    ordered = np.sort(values)
+
+    for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+        exact = np.quantile(values, q)
+        assert abs(sketch.rank(exact) - _true_rank(ordered, exact)) <= sketch.rank_error
+        assert abs(_true_rank(ordered, sketch.quantile(q)) - q) <= sketch.rank_error
+
+
+def test_kll_quantiles_are_monotone_and_bounded(values):
+    sketch = KLLSketch().update(values)
+    qs = np.linspace(0, 1, 101)
+    estimates = sketch.quantile(qs)
+
+    assert np.all(np.diff(estimates) >= 0)
+    assert values.min() <= estimates[0] and estimates[-1] <= values.max()
+    assert sketch.rank(values.min()) == 0.0
+
+
+def test_kll_empty():
+    sketch = KLLSketch()
+
+    assert math.isnan(sketch.quantile(0.5))
+    assert math.isnan(sketch.rank(1.0))
+    assert KLLSketch().update([1.0, 2.0]).merge(sketch).n == 2
+
+
+# =====================================================
+# CARDINALITY
+# =====================================================
+def test_hll_merge_equals_sketch_of_the_union():
+    rng = np.random.default_rng(1)
+    a, b = rng.integers(0, 50_000, 80_000), rng.integers(25_000, 75_000, 80_000)
+    merged = HyperLogLog().update(a).merge(HyperLogLog().update(b))
+    union = HyperLogLog().update(np.concatenate([a, b]))
+
+    assert np.array_equal(merged.registers, union.registers)
+    true = len(np.unique(np.concatenate([a, b])))
+    assert abs(merged.count() - true) <= merged.relative_error * true
+
+
+def test_hll_rejects_mixed_precision():
+    with pytest.raises(ValueError, match="precision"):
+        HyperLogLog(p=12).merge(HyperLogLog(p=14))
+
+
+# =====================================================
+# HEAVY HITTERS
+# =====================================================
+def test_space_saving_merge_bounds_counts():
+    rng = np.random.default_rng(2)
+    values = rng.zipf(1.5, 60_000) % 1_000
+    true = pd.Series(values).value_counts()
+    merged = SpaceSaving(capacity=32)
+    for chunk in _chunks(values, 6):
+        merged.merge(SpaceSaving(capacity=32).update(chunk))
+
+    assert merged.n == len(values)
+    for key, count in merged.counts.items():
+        # Never under, over by at most n / capacity
+        assert true[key] <= count <= true[key] + merged.max_count_error
+    assert [key for key, _ in merged.top(3)] == list(true.index[:3])
@@ -32,6 +32,13 @@ const handleUpload = async (file, targetCol) => { // 1. Accept targetCol
       body: formData,
     });
     
+    // Not admitted: too large for the memory budget (413) or server busy (429 / 503)
+    if ([413, 429, 503].includes(response.status)) {
+      const { detail } = await response.json();
+      const retryAfter = response.headers.get('Retry-After');
+      alert(retryAfter ? `${detail} (try again in ~${retryAfter}s)` : detail);
+      return false;
+    }
     if (!response.ok) throw new Error("Server error during upload");
     
     const initialData = await response.json();
@@ -56,11 +63,14 @@ if (initialData.analysis_status === 'needs_user_input') {
     // Start Polling...
     const pollInterval = setInterval(async () => {
       try {
-        const statusRes = await fetch(`http://localhost:8000/api/v1/dataset/${initialData.id}`);
+        // Poll only the status; fetch the full entry once it is done
+        const statusRes = await fetch(`http://localhost:8000/api/v1/dataset/${initialData.id}?fields=analysis_status`);
         const updatedData = await statusRes.json();
 
         if (updatedData.analysis_status === 'completed') {
-          setDatasets((prev) => prev.map(d => d.id === initialData.id ? updatedData : d));
+          const fullRes = await fetch(`http://localhost:8000/api/v1/dataset/${initialData.id}`);
+          const fullData = await fullRes.json();
+          setDatasets((prev) => prev.map(d => d.id === initialData.id ? fullData : d));
           clearInterval(pollInterval);
         } else if (updatedData.analysis_status === 'failed') {
           clearInterval(pollInterval);
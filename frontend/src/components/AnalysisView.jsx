@@ -36,7 +36,7 @@ useEffect(() => {
   if (ragStatus === 'ready') return;
 
   const interval = setInterval(async () => {
-  const res = await fetch(`http://localhost:8000/api/v1/dataset/${dataset.id}`);
+  const res = await fetch(`http://localhost:8000/api/v1/dataset/${dataset.id}?fields=rag_status`);
     const data = await res.json();
     setRagStatus(data.rag_status);
   }, 3000);
@@ -242,6 +242,11 @@ useEffect(() => {
                       >
                         {f.importance}
                       </span>
+                      {f.importance_score != null && (
+                        <span className="ml-2 text-xs text-gray-500">
+                          {(f.importance_score * 100).toFixed(1)}%
+                        </span>
+                      )}
                     </td>
                     <td className="p-3 text-gray-600">{f.description}</td>
                   </tr>